@@ -1,11 +1,28 @@
+from typing import TYPE_CHECKING
+
 from .constants import __version__
 from . import constants
 from . import env
 from . import osplatform
 from ._config import config
 from . import cli
-from . import resources
-from . import core
-from ._app import FrmbApplication
-from ._app import get_qapp
-from ._window import FrmbMainWindow
+from ._lazy import get_lazy_attributes
+
+# Qt, jinja and the GUI modules are only imported on first use
+__getattr__, __dir__ = get_lazy_attributes(
+    __name__,
+    {
+        "core": ".core",
+        "resources": ".resources",
+        "FrmbApplication": "._app",
+        "get_qapp": "._app",
+        "FrmbMainWindow": "._window",
+    },
+)
+
+if TYPE_CHECKING:
+    from . import core
+    from . import resources
+    from ._app import FrmbApplication
+    from ._app import get_qapp
+    from ._window import FrmbMainWindow
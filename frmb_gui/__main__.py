@@ -3,13 +3,14 @@ import logging.config
 import sys
 
 import frmb_gui
-import frmb_gui._utils
 
 
 logger = logging.getLogger(f"frmb_gui.__main__")
 
 
 def launch_gui():
+    import frmb_gui._utils
+
     # XXX: since we subclass QApplication this create a crash on app close
     #   see issue https://bugreports.qt.io/browse/PYSIDE-1447
     app = frmb_gui.get_qapp()
@@ -23,15 +24,20 @@ def launch_gui():
 
 def main():
     """
-    Start the application.
+    Start the application, or execute the headless command if one was requested.
     """
+    cli = frmb_gui.cli.CLI()
     logging.basicConfig(
         level=logging.DEBUG if frmb_gui.config.debug else logging.INFO,
         format="{levelname: <7} | {asctime} [{name: >30}] {message}",
         style="{",
-        stream=sys.stdout,
+        # stdout is reserved to the json result of commands
+        stream=sys.stderr if cli.command else sys.stdout,
     )
 
+    if cli.command:
+        sys.exit(cli.run_command())
+
     logger.info(f"[main] Started {frmb_gui.__name__} v{frmb_gui.__version__}")
     frmb_gui.config.__debugging__()
     launch_gui()
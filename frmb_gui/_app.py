@@ -2,7 +2,9 @@
 Definition of the unique runtime QtApplication.
 """
 
+import collections
 import logging
+import time
 from pathlib import Path
 from typing import Callable
 from typing import Optional
@@ -13,7 +15,8 @@ from qtpy import QtGui
 from qtpy import QtWidgets
 
 import frmb_gui
-
+from ._paintguard import install_paint_guard
+from ._watcher import FileWatcherService
 
 LOGGER = logging.getLogger(__name__)
 
@@ -41,6 +44,65 @@ class ApplicationController(QtCore.QObject):
     """
 
 
+class IdleTaskQueue(QtCore.QObject):
+    """
+    Run non-critical tasks one at a time, when the event loop has nothing else to do.
+
+    Tasks are only run once :meth:`start` has been called, so they don't delay the
+    first paint of the application.
+    """
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._tasks: collections.deque[Callable[[], None]] = collections.deque()
+        self._started: bool = False
+        # a 0ms timer is triggered once all the pending events are processed
+        self._timer = QtCore.QTimer(self)
+        self._timer.setInterval(0)
+        self._timer.timeout.connect(self._run_next)
+
+    def is_started(self) -> bool:
+        return self._started
+
+    def add(self, task: Callable[[], None]):
+        """
+        Schedule the given callable to be run when the application is idle.
+
+        Nothing is done if the callable is already scheduled and not run yet.
+        """
+        if task in self._tasks:
+            return
+        self._tasks.append(task)
+        if self._started:
+            self._timer.start()
+
+    def start(self):
+        """
+        Start running the scheduled tasks and the ones added later.
+        """
+        self._started = True
+        if self._tasks:
+            self._timer.start()
+
+    def _run_next(self):
+        if not self._tasks:
+            self._timer.stop()
+            return
+
+        task = self._tasks.popleft()
+        start_time = time.perf_counter()
+        try:
+            task()
+        except Exception:
+            LOGGER.exception(f"error while running idle task {task}")
+        LOGGER.debug(
+            f"[{self.__class__.__name__}][_run_next] ran {task.__qualname__} in "
+            f"{(time.perf_counter() - start_time) * 1000:.1f}ms"
+        )
+        if not self._tasks:
+            self._timer.stop()
+
+
 class FrmbApplication(QtWidgets.QApplication):
     """
     QApplication to use as unique instance.
@@ -49,11 +111,21 @@ class FrmbApplication(QtWidgets.QApplication):
 
     Styles are a library of variables that allow to resolve a stylesheet.
     Both can be changed at runtime even if stylesheets are less frequent to be.
+
+    Work that is not needed to display the first frame should be scheduled with
+    :meth:`call_when_idle`, it is run after the first paint.
     """
 
     def __init__(self):
         super().__init__()
 
+        self._creation_time: float = time.perf_counter()
+        self._idle_queue = IdleTaskQueue(self)
+        if frmb_gui.config.debug:
+            install_paint_guard()
+        # removed once the first paint happened
+        self.installEventFilter(self)
+
         self._controller = ApplicationController()
         self._style_callbacks: list[Callable[[frmb_gui.resources.UiStyle], None]] = []
 
@@ -64,9 +136,11 @@ class FrmbApplication(QtWidgets.QApplication):
         self._style_name: str = "main"
         self._style_path: Path | None = None
         self._style: frmb_gui.resources.UiStyle | None = None
+        # stylesheet split per scope, as last applied
+        self._stylesheet_sections: dict[str, str] = {}
+        self._stylesheet_owners: dict[str, list[QtWidgets.QWidget]] = {}
 
-        self._file_watch_stylesheet: Optional[QtCore.QFileSystemWatcher] = None
-        self._file_watch_style: Optional[QtCore.QFileSystemWatcher] = None
+        self._file_watcher = FileWatcherService(parent=self)
 
         self.setOrganizationName(frmb_gui.constants.organisation)
         self.setApplicationName(frmb_gui.constants.name)
@@ -81,6 +155,13 @@ class FrmbApplication(QtWidgets.QApplication):
     def controller(self) -> ApplicationController:
         return self._controller
 
+    @property
+    def file_watcher(self) -> FileWatcherService:
+        """
+        Service to use to be notified of filesystem changes.
+        """
+        return self._file_watcher
+
     @property
     def current_style(self) -> frmb_gui.resources.UiStyle:
         """
@@ -88,6 +169,12 @@ class FrmbApplication(QtWidgets.QApplication):
         """
         return self._style
 
+    def call_when_idle(self, task: Callable[[], None]):
+        """
+        Run the given callable once the application is painted and has nothing to do.
+        """
+        self._idle_queue.add(task)
+
     def add_on_style_changed_callback(
         self, callback: Callable[[frmb_gui.resources.UiStyle], None]
     ):
@@ -99,6 +186,15 @@ class FrmbApplication(QtWidgets.QApplication):
         """
         self._style_callbacks.append(callback)
 
+    def remove_on_style_changed_callback(
+        self, callback: Callable[[frmb_gui.resources.UiStyle], None]
+    ):
+        """
+        Remove a callable added with :meth:`add_on_style_changed_callback`, if present.
+        """
+        if callback in self._style_callbacks:
+            self._style_callbacks.remove(callback)
+
     def reload_icon(self):
         """
         Reload the application icon from disk (doesn't work on Mac).
@@ -121,6 +217,9 @@ class FrmbApplication(QtWidgets.QApplication):
             }
         )
         LOGGER.debug(f"loaded font families: {fonts}")
+        # the other styles of the families are not needed for the first paint
+        if self._style.get_unloaded_font_files():
+            self.call_when_idle(self._load_unloaded_font)
         self.reload_stylesheet()
         self.reload_icon()
         for callback in self._style_callbacks:
@@ -129,9 +228,57 @@ class FrmbApplication(QtWidgets.QApplication):
     def reload_stylesheet(self):
         """
         Reapply the stylesheet after re-reading its content from disk.
+
+        Only the sections of the stylesheet that changed since the last call are
+        reapplied, so only their widgets are repolished.
         """
         stylesheet = self.current_style.get_stylesheet(name=self._stylesheet_name)
-        self.setStyleSheet(stylesheet)
+        sections = frmb_gui.resources.split_stylesheet(stylesheet)
+        previous_sections = self._stylesheet_sections
+        self._stylesheet_sections = sections
+
+        scopes = list(sections) + [
+            scope for scope in previous_sections if scope not in sections
+        ]
+        changed = [
+            scope
+            for scope in scopes
+            if sections.get(scope) != previous_sections.get(scope)
+        ]
+        prefix = self.__class__.__name__
+        if not changed:
+            LOGGER.debug(f"[{prefix}][reload_stylesheet] stylesheet is unchanged")
+            return
+
+        for scope in changed:
+            self._apply_stylesheet_section(scope)
+
+    def add_stylesheet_owner(
+        self,
+        widget: QtWidgets.QWidget,
+        scope: Optional[str] = None,
+    ):
+        """
+        Make the widget apply on itself the section of the stylesheet with the given scope.
+
+        Changes to that section then only repolish the widget and its children,
+        instead of the whole application.
+
+        Args:
+            widget: usually the top-level widget the section is styling.
+            scope: name of the section to apply, the widget class name if None.
+        """
+        scope = scope or widget.__class__.__name__
+        owners = self._stylesheet_owners.setdefault(scope, [])
+        owners.append(widget)
+        widget.destroyed.connect(lambda *args: owners.remove(widget))
+        widget.setStyleSheet(self._stylesheet_sections.get(scope, ""))
+
+    def get_stylesheet_sections(self) -> dict[str, str]:
+        """
+        Get the stylesheet currently applied, split per scope.
+        """
+        return self._stylesheet_sections.copy()
 
     def set_style(self, style_name: str):
         """
@@ -142,7 +289,7 @@ class FrmbApplication(QtWidgets.QApplication):
         """
         self._style_name = style_name
         self._style_path = frmb_gui.resources.get_style_path(self._style_name)
-        self._install_style_reload()
+        self.call_when_idle(self._install_style_reload)
         self.reload_style()
 
     def set_stylesheet(self, stylesheet_name: str):
@@ -154,52 +301,87 @@ class FrmbApplication(QtWidgets.QApplication):
         """
         self._stylesheet_name = stylesheet_name
         self._stylesheet_path = frmb_gui.resources.get_stylesheet_path(stylesheet_name)
-        self._install_stylesheet_reload()
+        self.call_when_idle(self._install_stylesheet_reload)
         self.reload_stylesheet()
 
+    def _apply_stylesheet_section(self, scope: str):
+        section = self._stylesheet_sections.get(scope, "")
+        start_time = time.perf_counter()
+        if scope == frmb_gui.resources.APPLICATION_SCOPE:
+            widgets = [self]
+        else:
+            widgets = self._stylesheet_owners.get(scope, [])
+        # the widgets are repolished synchronously
+        for widget in widgets:
+            widget.setStyleSheet(section)
+
+        prefix = self.__class__.__name__
+        LOGGER.debug(
+            f"[{prefix}][_apply_stylesheet_section] repolished <{scope}> for "
+            f"{len(widgets)} owners in {(time.perf_counter() - start_time) * 1000:.1f}ms"
+        )
+
+    def eventFilter(self, watched: QtCore.QObject, event: QtCore.QEvent) -> bool:
+        if event.type() == QtCore.QEvent.Type.Paint:
+            self.removeEventFilter(self)
+            # start once the paint is finished
+            QtCore.QTimer.singleShot(0, self._on_first_paint)
+        return super().eventFilter(watched, event)
+
+    def _on_first_paint(self):
+        prefix = self.__class__.__name__
+        duration = (time.perf_counter() - self._creation_time) * 1000
+        LOGGER.debug(
+            f"[{prefix}][_on_first_paint] time to first paint: {duration:.1f}ms "
+            f"since application creation"
+        )
+        self._idle_queue.start()
+
+    def _load_unloaded_font(self):
+        """
+        Register one of the font file not used by the style, one at a time to not
+        block the event loop.
+        """
+        font_paths = self._style.get_unloaded_font_files()
+        if font_paths:
+            self._style.load_font_file(font_paths[0])
+        if len(font_paths) > 1:
+            self.call_when_idle(self._load_unloaded_font)
+
     def _install_style_reload(self):
         """
-        Install a file watcher to reload the style when its corresponding file change.
+        Watch the style file to reload the style when it change.
         """
-        paths = [str(self._style_path)]
-        self._file_watch_style = QtCore.QFileSystemWatcher(paths, self)
-        self._file_watch_style.fileChanged.connect(self._on_style_file_changed)
-        prefix = self.__class__.__name__
-        LOGGER.debug(
-            f"[{prefix}][_install_stylesheet_reload] installed QFileSystemWatcher for "
-            f"style {self._style_path.name}"
+        # replace the watch of the previous style if any
+        self._file_watcher.watch(
+            "style",
+            [self._style_path],
+            self._on_style_file_changed,
         )
 
     def _install_stylesheet_reload(self):
         """
-        Install a file watcher to reload the stylesheet when its corresponding file change.
+        Watch the stylesheet file to reload the stylesheet when it change.
         """
         # TODO see if only desired in dev mode
         if not frmb_gui.config.developer_mode:
-            self._file_watch_stylesheet = None
+            self._file_watcher.unwatch("stylesheet")
             return
 
-        paths = [str(self._stylesheet_path)]
-        self._file_watch_stylesheet = QtCore.QFileSystemWatcher(paths, self)
-        self._file_watch_stylesheet.fileChanged.connect(
-            self._on_stylesheet_file_changed
-        )
-        prefix = self.__class__.__name__
-        LOGGER.debug(
-            f"[{prefix}][_install_stylesheet_reload] installed QFileSystemWatcher for "
-            f"stylesheet {self._stylesheet_path.name}"
+        self._file_watcher.watch(
+            "stylesheet",
+            [self._stylesheet_path],
+            self._on_stylesheet_file_changed,
         )
 
-    # XXX: the watcher might call this 2 times in a row depending on how the file
-    #   was changed. See https://forum.qt.io/topic/41401/solved-qfilesystemwatcher-reports-change-twice/7
-    def _on_style_file_changed(self, *args):
+    def _on_style_file_changed(self, paths: set[Path]):
         prefix = self.__class__.__name__
-        LOGGER.debug(f"[{prefix}][_on_style_file_changed] triggered by {args}")
+        LOGGER.debug(f"[{prefix}][_on_style_file_changed] triggered by {paths}")
         self.reload_style()
 
-    def _on_stylesheet_file_changed(self, *args):
+    def _on_stylesheet_file_changed(self, paths: set[Path]):
         prefix = self.__class__.__name__
-        LOGGER.debug(f"[{prefix}][_on_stylesheet_file_changed] triggered by {args}")
+        LOGGER.debug(f"[{prefix}][_on_stylesheet_file_changed] triggered by {paths}")
         self.reload_stylesheet()
 
 
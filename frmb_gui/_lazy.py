@@ -0,0 +1,54 @@
+"""
+Defer the import of the modules of a package until their attributes are used.
+
+Lowest level module.
+"""
+
+import importlib
+import sys
+from typing import Any
+from typing import Callable
+from typing import Mapping
+
+
+def get_lazy_attributes(
+    package: str,
+    attributes: Mapping[str, str],
+) -> tuple[Callable[[str], Any], Callable[[], list[str]]]:
+    """
+    Build the ``__getattr__`` and ``__dir__`` functions of a package so the given
+    attributes are only imported on first access.
+
+    Usage at the end of a package ``__init__``::
+
+        __getattr__, __dir__ = get_lazy_attributes(__name__, {"UiStyle": "._style"})
+
+    Args:
+        package: name of the package module the attributes belong to.
+        attributes:
+            ``{attribute name: module name}`` where the module name is relative to
+            the package. If the module name ends with the attribute name, the module
+            itself is the attribute.
+
+    Returns:
+        the ``__getattr__`` and ``__dir__`` functions to define in the package
+    """
+
+    def __getattr__(name: str) -> Any:
+        module_name = attributes.get(name)
+        if module_name is None:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+
+        module = importlib.import_module(module_name, package)
+        if module_name.rsplit(".", 1)[-1] == name:
+            value = module
+        else:
+            value = getattr(module, name)
+        # next accesses doesn't go through __getattr__ anymore
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> list[str]:
+        return sorted(set(vars(sys.modules[package])).union(attributes))
+
+    return __getattr__, __dir__
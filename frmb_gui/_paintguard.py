@@ -0,0 +1,108 @@
+"""
+Report the filesystem accesses happening while a widget is painted.
+
+Painting happens very often and must never wait on the disk: anything needed by a
+``paintEvent`` must be computed beforehand, usually when the data or the style
+change.
+"""
+
+import functools
+import logging
+import sys
+import threading
+import traceback
+from typing import Any
+from typing import Callable
+from typing import TypeVar
+
+LOGGER = logging.getLogger(__name__)
+
+# XXX: os.stat and os.path.exists are not audited by python, but most reads are.
+_FILESYSTEM_EVENTS = {
+    "open",
+    "os.listdir",
+    "os.scandir",
+    "os.mkdir",
+    "os.remove",
+    "os.rename",
+    "os.rmdir",
+    "glob.glob",
+    "shutil.copyfile",
+    "shutil.rmtree",
+}
+
+_INSTALLED = False
+# audit hooks cannot be removed, so the hook is only added once and disabled instead
+_HOOK_ADDED = False
+
+# paint events only happen in the main thread, but the audit hook is called from all
+# the threads, like the ones reading the hierarchy.
+_STATE = threading.local()
+
+T = TypeVar("T", bound=Callable[..., Any])
+
+
+def _audit_hook(event: str, args: tuple):
+    if not _INSTALLED or event not in _FILESYSTEM_EVENTS:
+        return
+    widget_name = getattr(_STATE, "widget_name", None)
+    if widget_name is None:
+        return
+
+    # prevent any filesystem access made while logging to be reported
+    _STATE.widget_name = None
+    try:
+        stack = "".join(traceback.format_stack(limit=6)[:-1])
+        LOGGER.warning(
+            f"filesystem access <{event}{args}> in {widget_name}.paintEvent:\n{stack}"
+        )
+    finally:
+        _STATE.widget_name = widget_name
+
+
+def install_paint_guard():
+    """
+    Start reporting the filesystem accesses made in paint events decorated with
+    :func:`guard_paint`.
+
+    Intended for debug mode only, as the underlying audit hook cannot be removed once
+    added, only disabled with :func:`uninstall_paint_guard`.
+    """
+    global _INSTALLED
+    global _HOOK_ADDED
+    if _INSTALLED:
+        return
+    if not _HOOK_ADDED:
+        sys.addaudithook(_audit_hook)
+        _HOOK_ADDED = True
+    _INSTALLED = True
+    LOGGER.debug("[install_paint_guard] reporting filesystem access in paint events")
+
+
+def uninstall_paint_guard():
+    """
+    Stop reporting the filesystem accesses made in paint events.
+    """
+    global _INSTALLED
+    _INSTALLED = False
+
+
+def guard_paint(paint_event: T) -> T:
+    """
+    Decorate a ``paintEvent`` method so its filesystem accesses are reported once
+    :func:`install_paint_guard` is called.
+    """
+
+    @functools.wraps(paint_event)
+    def wrapper(self, *args, **kwargs):
+        if not _INSTALLED:
+            return paint_event(self, *args, **kwargs)
+
+        previous = getattr(_STATE, "widget_name", None)
+        _STATE.widget_name = self.__class__.__name__
+        try:
+            return paint_event(self, *args, **kwargs)
+        finally:
+            _STATE.widget_name = previous
+
+    return wrapper
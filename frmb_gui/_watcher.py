@@ -0,0 +1,325 @@
+"""
+Watch files and directories for changes, delivered once per burst of events.
+"""
+
+import dataclasses
+import logging
+import os
+import time
+from pathlib import Path
+from typing import Callable
+from typing import Iterable
+from typing import Mapping
+from typing import Optional
+
+from qtpy import QtCore
+
+LOGGER = logging.getLogger(__name__)
+
+WatchCallbackType = Callable[[set[Path]], None]
+"""
+Called with the watched paths that changed since the last call.
+"""
+
+_PathSignature = Optional[tuple[int, int]]
+
+
+def _get_signature(path: Path) -> _PathSignature:
+    try:
+        stat = path.stat()
+    except OSError:
+        return None
+    return stat.st_mtime_ns, stat.st_size
+
+
+@dataclasses.dataclass
+class _Watch:
+    name: str
+    paths: set[Path]
+    callback: WatchCallbackType
+    timer: QtCore.QTimer
+    signatures: dict[Path, _PathSignature]
+    # watched paths per parent directory, as events are also received for the parents
+    children: dict[Path, set[Path]] = dataclasses.field(default_factory=dict)
+    # paths that received an event since the last timeout
+    pending: set[Path] = dataclasses.field(default_factory=set)
+    events: int = 0
+    calls: int = 0
+
+    def __post_init__(self):
+        for path in self.paths:
+            self.children.setdefault(path.parent, set()).add(path)
+
+    def add(self, path: Path, signature: _PathSignature):
+        self.paths.add(path)
+        self.signatures[path] = signature
+        self.children.setdefault(path.parent, set()).add(path)
+
+    def remove(self, path: Path):
+        self.paths.discard(path)
+        self.signatures.pop(path, None)
+        children = self.children.get(path.parent)
+        if children is not None:
+            children.discard(path)
+            if not children:
+                del self.children[path.parent]
+
+    def requires(self, path: Path) -> bool:
+        return path in self.paths or path in self.children
+
+    @property
+    def parents(self) -> set[Path]:
+        return set(self.children)
+
+    def get_candidates(self) -> set[Path]:
+        """
+        Get the watched paths that may have changed according to the pending events.
+        """
+        candidates = set()
+        for path in self.pending:
+            if path in self.paths:
+                candidates.add(path)
+            candidates.update(self.children.get(path, ()))
+        return candidates
+
+
+class FileWatcherService(QtCore.QObject):
+    """
+    Watch multiple groups of paths, each group having its own callback.
+
+    The events of a group are debounced: its callback is only called once no new
+    event happened for the given delay, and receive all the paths that changed
+    during the burst.
+
+    The parent directory of each path is also watched, so files replaced by an
+    atomic rename, as many editors save, keep being watched.
+
+    Only the paths concerned by the events of a burst are checked for changes, so
+    groups of thousands of paths stay cheap to watch.
+
+    The system can refuse to watch a path, like when its limit of watched files is
+    reached, in which case :attr:`failed` is emitted so another way of detecting the
+    changes can be used.
+
+    Args:
+        delay: amount of milliseconds without events before calling the callback.
+    """
+
+    failed = QtCore.Signal(str, object)
+    """
+    Emitted with the name of a group and the set of its existing paths that cannot
+    be watched, whose changes will not be detected.
+    """
+
+    def __init__(self, delay: int = 200, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self.delay: int = delay
+        self._watches: dict[str, _Watch] = {}
+        # amount of groups requiring each path, to watch them only once
+        self._required: dict[Path, int] = {}
+        self._watcher = QtCore.QFileSystemWatcher(self)
+        self._watcher.fileChanged.connect(self._on_path_changed)
+        self._watcher.directoryChanged.connect(self._on_path_changed)
+
+    def watch(
+        self,
+        name: str,
+        paths: Iterable[Path],
+        callback: WatchCallbackType,
+        signatures: Optional[Mapping[Path, _PathSignature]] = None,
+    ):
+        """
+        Start watching the given group of paths, replacing any group with the same name.
+
+        Args:
+            name: unique identifier of the group of paths.
+            paths: filesystem paths to files or directories that may not exist yet.
+            callback: called with the paths that changed, once per burst of events.
+            signatures:
+                ``(mtime_ns, size)`` of the paths when known by the caller, so they
+                don't need to be collected again. Missing paths are collected.
+        """
+        previous = self._watches.pop(name, None)
+        if previous is not None:
+            previous.timer.stop()
+            previous.timer.deleteLater()
+            released = previous.paths | previous.parents
+        else:
+            released = set()
+
+        timer = QtCore.QTimer(self)
+        timer.setSingleShot(True)
+        timer.setInterval(self.delay)
+        paths = set(paths)
+        signatures = signatures or {}
+        watch = _Watch(
+            name=name,
+            paths=paths,
+            callback=callback,
+            timer=timer,
+            signatures={
+                path: signatures[path] if path in signatures else _get_signature(path)
+                for path in paths
+            },
+        )
+        timer.timeout.connect(lambda: self._on_watch_timeout(watch))
+        self._watches[name] = watch
+        # the paths shared with the previous group stay watched
+        failed = self._update_watcher(paths | watch.parents, released)
+        LOGGER.debug(
+            f"[{self.__class__.__name__}][watch] watching {len(paths)} paths for {name}"
+        )
+        self._report_failed(failed)
+
+    def update(
+        self,
+        name: str,
+        added: Iterable[Path] = (),
+        removed: Iterable[Path] = (),
+        signatures: Optional[Mapping[Path, _PathSignature]] = None,
+    ):
+        """
+        Add or remove paths of an existing group, which is cheaper than watching the
+        whole group again when only a few paths are concerned.
+
+        Args:
+            name: unique identifier of an existing group of paths.
+            added: filesystem paths to start watching.
+            removed: filesystem paths to stop watching.
+            signatures: as for :meth:`watch`, for the added paths.
+        """
+        watch = self._watches[name]
+        added = set(added)
+        removed = set(removed)
+        signatures = signatures or {}
+
+        concerned = added | removed
+        concerned.update([path.parent for path in concerned])
+        previous = {path for path in concerned if watch.requires(path)}
+        for path in removed:
+            watch.remove(path)
+        for path in added:
+            signature = signatures[path] if path in signatures else _get_signature(path)
+            watch.add(path, signature)
+        current = {path for path in concerned if watch.requires(path)}
+
+        failed = self._update_watcher(current - previous, previous - current)
+        self._report_failed(failed)
+
+    def unwatch(self, name: str):
+        """
+        Stop watching the group of paths with the given name, if any.
+        """
+        watch = self._watches.pop(name, None)
+        if watch is None:
+            return
+        watch.timer.stop()
+        watch.timer.deleteLater()
+        self._update_watcher((), watch.paths | watch.parents)
+
+    def is_watching(self, name: str) -> bool:
+        return name in self._watches
+
+    def _update_watcher(
+        self,
+        required: Iterable[Path],
+        released: Iterable[Path],
+    ) -> set[Path]:
+        """
+        Watch the paths newly required by a group and stop watching the paths it
+        released that are not required by any other group.
+
+        Returns:
+            the existing paths that cannot be watched.
+        """
+        added = []
+        for path in required:
+            count = self._required.get(path, 0)
+            self._required[path] = count + 1
+            if not count:
+                added.append(str(path))
+
+        removed = []
+        for path in released:
+            count = self._required[path] - 1
+            if count:
+                self._required[path] = count
+            else:
+                del self._required[path]
+                removed.append(str(path))
+
+        if removed:
+            self._watcher.removePaths(removed)
+        return self._add_paths(added)
+
+    def _add_paths(self, paths: list[str]) -> set[Path]:
+        """
+        Start watching the given paths.
+
+        Returns:
+            the existing paths that cannot be watched.
+        """
+        if not paths:
+            return set()
+        failed = self._watcher.addPaths(paths)
+        # paths that don't exist yet or are already watched are also returned
+        failed = [path for path in failed if os.path.exists(path)]
+        if failed:
+            watched = set(self._watcher.files()) | set(self._watcher.directories())
+            failed = [path for path in failed if path not in watched]
+        return set(map(Path, failed))
+
+    def _report_failed(self, failed: set[Path]):
+        if not failed:
+            return
+        for watch in list(self._watches.values()):
+            paths = {path for path in failed if watch.requires(path)}
+            if not paths:
+                continue
+            LOGGER.warning(
+                f"cannot watch {len(paths)} paths of {watch.name}, their changes "
+                f"will not be detected, like {sorted(paths)[0]}"
+            )
+            self.failed.emit(watch.name, paths)
+
+    def _on_path_changed(self, path: str):
+        path = Path(path)
+        for watch in self._watches.values():
+            if watch.requires(path):
+                watch.events += 1
+                watch.pending.add(path)
+                # restart the countdown, so only the last event of a burst trigger it
+                watch.timer.start()
+
+    def _on_watch_timeout(self, watch: _Watch):
+        candidates = watch.get_candidates()
+        # files replaced by a rename are no longer watched, already watched paths
+        # are ignored by the watcher
+        existing = [str(path) for path in candidates | watch.pending if path.exists()]
+        failed = self._add_paths(existing)
+        watch.pending = set()
+
+        changed = set()
+        for path in candidates:
+            signature = _get_signature(path)
+            if signature != watch.signatures[path]:
+                watch.signatures[path] = signature
+                changed.add(path)
+
+        events = watch.events
+        watch.events = 0
+        self._report_failed(failed)
+        if not changed:
+            return
+
+        watch.calls += 1
+        start_time = time.perf_counter()
+        try:
+            watch.callback(changed)
+        except Exception:
+            LOGGER.exception(f"error while processing changes of {watch.name}")
+        LOGGER.debug(
+            f"[{self.__class__.__name__}][_on_watch_timeout] {watch.name} reload "
+            f"#{watch.calls} for {len(changed)} paths ({events} events) took "
+            f"{(time.perf_counter() - start_time) * 1000:.1f}ms"
+        )
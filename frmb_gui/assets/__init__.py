@@ -1,12 +1,41 @@
-from ._icon import StylesheetIconButton
-from ._icon import StylesheetIcon
-from ._switch import SwitchButton
-from ._switch import SwitchLabelWidget
-from ._basedialog import BaseDialog
-from ._headermenu import MainMenuBar
-from ._headerwidget import MainControlBarWidget
-from ._headerwidget import AppTitleWidget
-from ._hierarchybrowser import HierarchyBrowserWidget
-from ._overlay import TextOverlayWidget
-from ._delete import MenuDeleterDialog
-from ._rootcreate import RootFileCreatorDialog
+from typing import TYPE_CHECKING
+
+from frmb_gui._lazy import get_lazy_attributes
+
+__getattr__, __dir__ = get_lazy_attributes(
+    __name__,
+    {
+        "StylesheetIconButton": "._icon",
+        "StylesheetIcon": "._icon",
+        "IconCache": "._iconcache",
+        "IconLoader": "._iconcache",
+        "get_icon_cache": "._iconcache",
+        "SwitchButton": "._switch",
+        "SwitchLabelWidget": "._switch",
+        "BaseDialog": "._basedialog",
+        "MainMenuBar": "._headermenu",
+        "MainControlBarWidget": "._headerwidget",
+        "AppTitleWidget": "._headerwidget",
+        "HierarchyBrowserWidget": "._hierarchybrowser",
+        "TextOverlayWidget": "._overlay",
+        "MenuDeleterDialog": "._delete",
+        "RootFileCreatorDialog": "._rootcreate",
+    },
+)
+
+if TYPE_CHECKING:
+    from ._icon import StylesheetIconButton
+    from ._icon import StylesheetIcon
+    from ._iconcache import IconCache
+    from ._iconcache import IconLoader
+    from ._iconcache import get_icon_cache
+    from ._switch import SwitchButton
+    from ._switch import SwitchLabelWidget
+    from ._basedialog import BaseDialog
+    from ._headermenu import MainMenuBar
+    from ._headerwidget import MainControlBarWidget
+    from ._headerwidget import AppTitleWidget
+    from ._hierarchybrowser import HierarchyBrowserWidget
+    from ._overlay import TextOverlayWidget
+    from ._delete import MenuDeleterDialog
+    from ._rootcreate import RootFileCreatorDialog
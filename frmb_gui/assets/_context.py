@@ -12,8 +12,13 @@ class DependencyViewerTreeWidget(QtWidgets.QTreeWidget):
     """
     A TreeWidget that display all the dependencies in the python runtime environement
     as a pair of {name: version}
+
+    The dependencies are collected in a background thread, the widget is populated
+    once they are available.
     """
 
+    _dependencies_collected = QtCore.Signal(object)
+
     def __init__(self, parent: QtWidgets.QWidget):
         super().__init__(parent)
 
@@ -38,14 +43,24 @@ class DependencyViewerTreeWidget(QtWidgets.QTreeWidget):
 
         self.setContextMenuPolicy(QtCore.Qt.ContextMenuPolicy.CustomContextMenu)
         self.customContextMenuRequested.connect(self._on_context_menu)
+        self._dependencies_collected.connect(self._on_dependencies_collected)
 
         self.populate()
 
     def populate(self):
         self.clear()
         self._dependencies = {}
-        dependencies = frmb_gui.core.get_runtime_dependencies()
-        for dependency in dependencies:
+        future = frmb_gui.core.request_runtime_dependencies()
+        if not future.done():
+            self.setHeaderLabels(("Name (collecting ...)", "Version"))
+            future.add_done_callback(self._emit_dependencies_collected)
+            return
+
+        self.setHeaderLabels(("Name", "Version"))
+        if future.exception():
+            return
+
+        for dependency in future.result():
             self.add_dependency(dependency[0], dependency[1])
         self.sortByColumn(0, QtCore.Qt.SortOrder.AscendingOrder)
         return
@@ -57,6 +72,17 @@ class DependencyViewerTreeWidget(QtWidgets.QTreeWidget):
         treeitem.setText(1, version)
         return treeitem
 
+    def _emit_dependencies_collected(self, future):
+        # called from the collecting thread: the signal deliver it in the GUI thread
+        try:
+            self._dependencies_collected.emit(future)
+        except RuntimeError:
+            # widget already deleted
+            pass
+
+    def _on_dependencies_collected(self, *args):
+        self.populate()
+
     def _on_context_menu(self, *args):
         menu = QtWidgets.QMenu(self)
         action = QtWidgets.QAction("Copy All to Clipboard as JSON.", menu)
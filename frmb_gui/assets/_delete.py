@@ -184,6 +184,7 @@ class MenuDeleterDialog(BaseDialog):
 
         self.widget = MenuDeleterWidget(menu_files=menu_files)
         self.set_main_widget(action_button_label="Delete", widget=self.widget)
+        frmb_gui.get_qapp().add_stylesheet_owner(self)
 
     def _on_accepted(self):
         deleted = self.widget.delete_all_menus(dry_run=self._dry_run)
@@ -17,9 +17,11 @@ class MainMenuBar(QtWidgets.QMenuBar):
     def __init__(self, parent: QtWidgets.QMainWindow):
         super().__init__(parent)
 
+        # dialogs are only built on first use
+        self._dialog_issue: IssueDialog | None = None
+        self._dialog_about: AboutDialog | None = None
+
         # 1. Create
-        self.dialog_issue = IssueDialog()
-        self.dialog_about = AboutDialog()
 
         self.menu_file = self.addMenu("File")
         self.menu_edit = self.addMenu("Edit")
@@ -59,8 +61,23 @@ class MainMenuBar(QtWidgets.QMenuBar):
         self.action_discord.triggered.connect(self._on_open_discord_invite)
         self.action_open_root_explorer.triggered.connect(self._on_open_root_explorer)
 
+        app = frmb_gui.get_qapp()
         if frmb_gui.config.developer_mode:
-            self._build_dev_menu()
+            app.call_when_idle(self._build_dev_menu)
+        # so the about dialog is populated immediately once opened
+        app.call_when_idle(frmb_gui.core.request_runtime_dependencies)
+
+    @property
+    def dialog_issue(self) -> IssueDialog:
+        if self._dialog_issue is None:
+            self._dialog_issue = IssueDialog()
+        return self._dialog_issue
+
+    @property
+    def dialog_about(self) -> AboutDialog:
+        if self._dialog_about is None:
+            self._dialog_about = AboutDialog()
+        return self._dialog_about
 
     def _build_dev_menu(self):
         menu_debug = self.addMenu("Debug")
@@ -94,7 +111,9 @@ class MainMenuBar(QtWidgets.QMenuBar):
 
     @staticmethod
     def _on_print_stylesheet():
-        print(frmb_gui.get_qapp().styleSheet())
+        sections = frmb_gui.get_qapp().get_stylesheet_sections()
+        for scope, section in sections.items():
+            print(f"/* @scope {scope} */\n{section}")
 
     @staticmethod
     def _on_print_config():
@@ -26,6 +26,7 @@ class AppTitleWidget(QtWidgets.QFrame):
         self.layout_main.addWidget(self.title)
 
         # 3. modify
+        frmb_gui.get_qapp().add_stylesheet_owner(self)
         self.layout_main.setContentsMargins(0, 0, 0, 0)
 
 
@@ -42,6 +43,7 @@ class MainControlBarWidget(QtWidgets.QFrame):
         self.layout_main.addWidget(self.selector_widget)
 
         # 3. modify
+        frmb_gui.get_qapp().add_stylesheet_owner(self)
         self.layout_main.setContentsMargins(0, 0, 0, 0)
 
         # 4. connect
@@ -1,4 +1,10 @@
+import collections
 import logging
+import time
+from pathlib import Path
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
 from typing import Optional
 from typing import Sequence
 
@@ -6,17 +12,212 @@ from qtpy import QtCore
 from qtpy import QtGui
 from qtpy import QtWidgets
 
-import frmb
-
 import frmb_gui.core
+from frmb_gui._paintguard import guard_paint
+from ._hierarchyloader import HierarchyLoader
+from ._hierarchypoller import HierarchyPollingWatcher
 from ._icon import StylesheetIconButton
+from ._iconcache import IconLoader
 
 LOGGER = logging.getLogger(__name__)
 
+ChildrenGetterType = Callable[[Optional[Path]], Sequence["frmb_gui.core.FrmbNode"]]
+
+
+class _HierarchyItem:
+    """
+    Internal tree structure of the :class:`FrmbHierarchyModel`.
+    """
+
+    __slots__ = ("node", "parent", "row", "children", "icon")
+
+    def __init__(
+        self,
+        node: frmb_gui.core.FrmbNode | None,
+        parent: Optional["_HierarchyItem"] = None,
+        row: int = 0,
+    ):
+        self.node: frmb_gui.core.FrmbNode | None = node
+        self.parent: Optional["_HierarchyItem"] = parent
+        self.row: int = row
+        # None when the children have not been fetched yet
+        self.children: list["_HierarchyItem"] | None = None
+        # None when the icon has not been loaded yet
+        self.icon: QtGui.QIcon | None = None
+
+    def may_have_children(self) -> bool:
+        if self.children is not None:
+            return bool(self.children)
+        return self.node is None or self.node.has_children
+
+
+class HierarchyPopulator(QtCore.QObject):
+    """
+    Fetch all the descendants of an index of a :class:`FrmbHierarchyModel` in small
+    chunks, yielding back to the event loop between them.
+
+    Items can only be inserted in the GUI thread, so inserting tens of thousands of
+    them at once freezes the application. Instead, the items to fetch are an explicit
+    breadth-first queue that is processed until the :attr:`frame_budget` is spent,
+    then resumed on the next iteration of the event loop, so the views keep repainting
+    and responding meanwhile.
+
+    Args:
+        model: the model to fetch the items of, that owns the populator.
+    """
+
+    fetched = QtCore.Signal(QtCore.QModelIndex)
+    """
+    Emitted with the index of every item whose children were all inserted, including
+    the ones fetched before the population started.
+    """
+
+    finished = QtCore.Signal()
+    """
+    Emitted once all the descendants were fetched, but not when cancelled.
+    """
+
+    frame_budget: float = 0.008
+    """
+    Amount of seconds spent fetching before yielding to the event loop.
+
+    Repainting the views between the chunks can take longer than that, so the budget
+    is extended up to the time the event loop took since the previous chunk, within
+    :attr:`max_frame_budget`, so fetching still gets at least half of the time.
+    """
+
+    max_frame_budget: float = 0.032
+    """
+    Maximum amount of seconds spent fetching before yielding to the event loop.
+    """
+
+    chunk_size: int = 500
+    """
+    Maximum amount of rows inserted at once, so parents with a lot of children can
+    also be split across multiple iterations of the event loop.
+    """
+
+    def __init__(self, model: "FrmbHierarchyModel"):
+        super().__init__(model)
+        self._model = model
+        self._queue: collections.deque[_HierarchyItem] = collections.deque()
+        # the item whose children are being inserted, with all its children nodes
+        self._current: Optional[
+            tuple[_HierarchyItem, Sequence[frmb_gui.core.FrmbNode]]
+        ] = None
+        # for debugging: when the population started, and in how many chunks
+        self._start_time: float = 0.0
+        self._chunks: int = 0
+        # when the previous chunk ended
+        self._chunk_end_time: float = 0.0
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(0)
+
+        self._timer.timeout.connect(self._process)
+
+    def is_running(self) -> bool:
+        return bool(self._queue) or self._current is not None
+
+    def start(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()):
+        """
+        Start fetching all the descendants of the given index, in addition to any
+        population in progress.
+        """
+        if self._model._children_getter is None:
+            return
+        if not self.is_running():
+            self._start_time = time.perf_counter()
+            self._chunk_end_time = self._start_time
+            self._chunks = 0
+        self._queue.append(self._model._get_item(parent))
+        self._timer.start()
+
+    def cancel(self):
+        """
+        Stop fetching, without inserting the remaining rows of the current item.
+
+        Only intended for when the model is about to be reset.
+        """
+        self._timer.stop()
+        self._queue.clear()
+        self._current = None
+
+    def flush(self):
+        """
+        Insert the remaining rows of the item being inserted, if any, so all the items
+        of the model are either fetched entirely or not fetched.
 
-class FrmbFileTreeWidgetItem(QtWidgets.QTreeWidgetItem):
+        The population then resumes as usual.
+        """
+        if self._current is None:
+            return
+        item, nodes = self._current
+        self._current = None
+        self._model._insert_rows(item, nodes[len(item.children) :])
+        self._on_item_fetched(item)
+
+    def _process(self):
+        model = self._model
+        start_time = time.perf_counter()
+        budget = start_time - self._chunk_end_time
+        budget = min(max(budget, self.frame_budget), self.max_frame_budget)
+        deadline = start_time + budget
+        self._chunks += 1
+
+        while time.perf_counter() < deadline:
+            if self._current is not None:
+                item, nodes = self._current
+                start = len(item.children)
+                model._insert_rows(item, nodes[start : start + self.chunk_size])
+                if len(item.children) >= len(nodes):
+                    self._current = None
+                    self._on_item_fetched(item)
+                continue
+
+            if not self._queue:
+                LOGGER.debug(
+                    f"[{self.__class__.__name__}][_process] fetched "
+                    f"{len(model._items)} items in {self._chunks} chunks and "
+                    f"{(time.perf_counter() - self._start_time) * 1000:.1f}ms"
+                )
+                self.finished.emit()
+                return
+
+            item = self._queue.popleft()
+            # removed from the model since queued
+            if item.node is not None and model._items.get(item.node.path) is not item:
+                continue
+            if item.children is not None:
+                self._on_item_fetched(item)
+                continue
+            if not item.may_have_children():
+                continue
+            # set first so the views don't fetch it meanwhile
+            item.children = []
+            nodes = model._children_getter(item.node.path if item.node else None)
+            self._current = (item, nodes)
+
+        self._chunk_end_time = time.perf_counter()
+        self._timer.start()
+
+    def _on_item_fetched(self, item: _HierarchyItem):
+        if not item.children:
+            return
+        self._queue.extend(item.children)
+        if item.node is not None:
+            self.fetched.emit(self._model._get_item_index(item))
+
+
+class FrmbHierarchyModel(QtCore.QAbstractItemModel):
     """
-    A tree widget item that display the content of a FrmbFile instance.
+    A model that display the hierarchy of frmb files of a FrmbRoot.
+
+    Children are lazily resolved only when a view request them (usually when the
+    user expand their parent) using Qt's ``canFetchMore``/``fetchMore`` mechanism.
+
+    Icons are only decoded, in the background, once a view request them, which only
+    happens for visible rows. A placeholder is displayed meanwhile.
     """
 
     columns = {
@@ -27,7 +228,7 @@ class FrmbFileTreeWidgetItem(QtWidgets.QTreeWidgetItem):
         "file_name": {"index": 4, "label": "File Name"},
     }
     """
-    Configuration of every column in all the QTreeWidgetItems.
+    Configuration of every column in the model.
 
     Keys are simple identifier just use to retrieve a value in the dict. One key = one column.
 
@@ -37,64 +238,456 @@ class FrmbFileTreeWidgetItem(QtWidgets.QTreeWidgetItem):
     - ``resizeMode``: used in header.setSectionResizeMode
     """
 
-    def __init__(
-        self,
-        frmb_file: frmb.FrmbFile,
-        parent: QtWidgets.QTreeWidget | QtWidgets.QTreeWidgetItem = None,
-    ):
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
         super().__init__(parent)
-        self._frmb_file: frmb.FrmbFile = frmb_file
-        self.update_content()
+        self._root_item = _HierarchyItem(None)
+        self._children_getter: ChildrenGetterType | None = None
+        # every item created so far, per node path
+        self._items: dict[Path, _HierarchyItem] = {}
+        self._icon_loader = IconLoader(parent=self)
+        # items waiting for their icon to be decoded, per icon path
+        self._icon_waiting: dict[Path, list[_HierarchyItem]] = {}
+        self._icon_placeholder: QtGui.QIcon | None = None
+        self._name_font: QtGui.QFont | None = None
+        self.populator = HierarchyPopulator(self)
 
-    def __str__(self) -> str:
-        return f"<{self.__class__.__name__} file={self._frmb_file}>"
+        self._icon_loader.loaded.connect(self._on_icon_loaded)
 
     @classmethod
     def get_index(cls, name: str) -> int:
         return cls.columns[name]["index"]
 
-    def update_content(self):
+    def set_children_getter(self, getter: ChildrenGetterType | None):
         """
-        Update the data displayed in the item.
+        Change the source of the hierarchy and reset the model.
+
+        Args:
+            getter:
+                callable that receive the path of a node and return its children nodes.
+                The path is None to get the top-level nodes. None to empty the model.
+        """
+        self.populator.cancel()
+        self.beginResetModel()
+        self._children_getter = getter
+        self._root_item = _HierarchyItem(None)
+        self._items = {}
+        self._icon_loader.cancel()
+        self._icon_waiting = {}
+        self.endResetModel()
+
+    def update_children(
+        self,
+        getter: ChildrenGetterType,
+        parents: Iterable[Optional[Path]] | None = None,
+    ):
+        """
+        Change the source of the hierarchy without resetting the model.
+
+        The children of the given parents are compared with the new source, by path,
+        and only the rows that changed are inserted, removed or updated. So the
+        persistent indexes, like the expanded and selected rows of a view, are kept.
+
+        Args:
+            getter: as for :meth:`set_children_getter`.
+            parents:
+                path of the nodes whose children changed, None for the top-level.
+                The children of the other parents must be unchanged in the new
+                source. None to compare the children of every parent.
         """
-        LOGGER.debug(f"[{self.__class__.__name__}][update_content] updating {self}")
+        self.populator.flush()
+        self._children_getter = getter
+        if parents is None:
+            items = self._iterate_fetched_items()
+        else:
+            items = (
+                self._root_item if parent is None else self._items.get(parent)
+                for parent in parents
+            )
+
+        for item in items:
+            # never fetched: they are read from the new source once needed
+            if item is None or item.children is None:
+                continue
+            # removed while updating its parent
+            if item.node is not None and self._items.get(item.node.path) is not item:
+                continue
+            nodes = getter(item.node.path if item.node else None)
+            self._update_item_children(item, nodes)
+
+    def fetch_all(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()):
+        """
+        Fetch at once all the descendants of the given parent that were not fetched yet.
 
-        content = self._frmb_file.content(resolve_tokens=True)
+        This is the bulk alternative to fetching each level once expanded: the items of
+        a whole subtree are created level by level, then inserted with a single
+        ``beginInsertRows``, so views and proxies only process one insertion per
+        subtree instead of one per parent.
 
-        icon_path = content.icon
-        icon = QtGui.QIcon(str(icon_path)) if icon_path and icon_path.exists() else None
-        if icon is not None and icon.isNull():
-            LOGGER.warning(f"Cannot load existing icon <{icon_path}> to QIcon")
-        if icon_path:
-            icon_path = str(icon_path.name)
+        This blocks until done, the views use :attr:`populator` instead, which is
+        benchmarked against this.
+        """
+        if self._children_getter is None:
+            return
 
-        registry_paths = len(content.paths)
-        command = "yes" if content.command else "no"
+        self.populator.flush()
+        stack = [self._get_item(parent)]
+        while stack:
+            item = stack.pop()
+            if item.children is not None:
+                stack.extend(item.children)
+            elif item.may_have_children():
+                self._insert_subtree(item)
 
-        self.setCheckState(
-            0,
-            (
-                QtCore.Qt.CheckState.Checked
-                if content.enabled
-                else QtCore.Qt.CheckState.Unchecked
-            ),
+    def get_node(self, index: QtCore.QModelIndex) -> frmb_gui.core.FrmbNode | None:
+        """
+        Get the node corresponding to the given index, None if invalid.
+        """
+        return self._get_item(index).node
+
+    # overrides
+
+    def index(
+        self,
+        row: int,
+        column: int,
+        parent: QtCore.QModelIndex = QtCore.QModelIndex(),
+    ) -> QtCore.QModelIndex:
+        # XXX: checked here instead of with hasIndex(), which calls back rowCount()
+        #   and columnCount() through python for every index
+        if parent.column() > 0 or not 0 <= column < len(self.columns):
+            return QtCore.QModelIndex()
+        children = self._get_item(parent).children
+        if not children or not 0 <= row < len(children):
+            return QtCore.QModelIndex()
+        return self.createIndex(row, column, children[row])
+
+    def parent(self, index: QtCore.QModelIndex = None) -> QtCore.QModelIndex:
+        # XXX: overloaded by Qt with QObject.parent()
+        if index is None:
+            return super().parent()
+        if not index.isValid():
+            return QtCore.QModelIndex()
+        parent_item = index.internalPointer().parent
+        if parent_item is None or parent_item is self._root_item:
+            return QtCore.QModelIndex()
+        return self.createIndex(parent_item.row, 0, parent_item)
+
+    def rowCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        if parent.column() > 0:
+            return 0
+        return len(self._get_item(parent).children or [])
+
+    def columnCount(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> int:
+        return len(self.columns)
+
+    def hasChildren(self, parent: QtCore.QModelIndex = QtCore.QModelIndex()) -> bool:
+        if parent.column() > 0:
+            return False
+        return self._get_item(parent).may_have_children()
+
+    def canFetchMore(self, parent: QtCore.QModelIndex) -> bool:
+        if self._children_getter is None or parent.column() > 0:
+            return False
+        item = self._get_item(parent)
+        return item.children is None and item.may_have_children()
+
+    def fetchMore(self, parent: QtCore.QModelIndex):
+        if not self.canFetchMore(parent):
+            return
+
+        item = self._get_item(parent)
+        # set first so a failure doesn't make the view retry indefinitely
+        item.children = []
+        nodes = self._children_getter(item.node.path if item.node else None)
+        self._insert_rows(item, nodes)
+
+    def flags(self, index: QtCore.QModelIndex) -> QtCore.Qt.ItemFlag:
+        if not index.isValid():
+            return QtCore.Qt.ItemFlag.NoItemFlags
+        return QtCore.Qt.ItemFlag.ItemIsEnabled | QtCore.Qt.ItemFlag.ItemIsSelectable
+
+    def headerData(
+        self,
+        section: int,
+        orientation: QtCore.Qt.Orientation,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if (
+            orientation != QtCore.Qt.Orientation.Horizontal
+            or role != QtCore.Qt.ItemDataRole.DisplayRole
+        ):
+            return None
+        for column_id, column_config in self.columns.items():
+            if column_config["index"] == section:
+                return column_config.get("label", column_id)
+        return None
+
+    def data(
+        self,
+        index: QtCore.QModelIndex,
+        role: int = QtCore.Qt.ItemDataRole.DisplayRole,
+    ):
+        if not index.isValid():
+            return None
+
+        item: _HierarchyItem = index.internalPointer()
+        node = item.node
+        content = node.content
+        column = index.column()
+
+        if role == QtCore.Qt.ItemDataRole.DisplayRole:
+            if column == self.get_index("name"):
+                return content.name
+            if column == self.get_index("file_name"):
+                return node.path.stem
+            if column == self.get_index("icon"):
+                # only display the name of the icons that can't be displayed
+                broken = item.icon is not None and item.icon.isNull()
+                return content.icon.name if content.icon and broken else ""
+            if column == self.get_index("paths"):
+                return f"{len(content.paths)} paths" if node.at_root() else ""
+            if column == self.get_index("command"):
+                return "yes" if content.command else "no"
+
+        elif role == QtCore.Qt.ItemDataRole.DecorationRole:
+            if column == self.get_index("icon"):
+                return self._get_icon(item)
+
+        elif role == QtCore.Qt.ItemDataRole.CheckStateRole:
+            if column == self.get_index("name"):
+                return (
+                    QtCore.Qt.CheckState.Checked
+                    if content.enabled
+                    else QtCore.Qt.CheckState.Unchecked
+                )
+
+        elif role == QtCore.Qt.ItemDataRole.FontRole:
+            if column == self.get_index("name"):
+                if self._name_font is None:
+                    self._name_font = QtGui.QFont()
+                    self._name_font.setWeight(QtGui.QFont.Weight.Bold)
+                return self._name_font
+
+        return None
+
+    # private
+
+    def _get_item(self, index: QtCore.QModelIndex) -> _HierarchyItem:
+        if index.isValid():
+            return index.internalPointer()
+        return self._root_item
+
+    def _get_item_index(
+        self,
+        item: _HierarchyItem,
+        column: int = 0,
+    ) -> QtCore.QModelIndex:
+        if item is self._root_item:
+            return QtCore.QModelIndex()
+        return self.createIndex(item.row, column, item)
+
+    def _insert_subtree(self, item: _HierarchyItem):
+        """
+        Fetch all the descendants of the given unfetched item and insert them at once.
+        """
+        children = self._create_children(item)
+        # the descendants are not reachable by the views until the children are set
+        queue = collections.deque(children)
+        while queue:
+            child = queue.popleft()
+            if child.node.has_children:
+                child.children = self._create_children(child)
+                queue.extend(child.children)
+            else:
+                child.children = []
+
+        item.children = []
+        if not children:
+            return
+        self.beginInsertRows(self._get_item_index(item), 0, len(children) - 1)
+        item.children = children
+        self.endInsertRows()
+
+    def _insert_rows(
+        self,
+        item: _HierarchyItem,
+        nodes: Sequence[frmb_gui.core.FrmbNode],
+    ):
+        """
+        Append rows for the given nodes to the children of the given fetched item.
+        """
+        if not nodes:
+            return
+        start = len(item.children)
+        self.beginInsertRows(self._get_item_index(item), start, start + len(nodes) - 1)
+        new_children = [
+            _HierarchyItem(node, parent=item, row=row)
+            for row, node in enumerate(nodes, start)
+        ]
+        item.children.extend(new_children)
+        self._items.update((child.node.path, child) for child in new_children)
+        self.endInsertRows()
+
+    def _create_children(self, item: _HierarchyItem) -> list[_HierarchyItem]:
+        nodes = self._children_getter(item.node.path if item.node else None)
+        children = [
+            _HierarchyItem(node, parent=item, row=row) for row, node in enumerate(nodes)
+        ]
+        self._items.update((child.node.path, child) for child in children)
+        return children
+
+    def _update_item_children(
+        self,
+        item: _HierarchyItem,
+        nodes: Sequence[frmb_gui.core.FrmbNode],
+    ):
+        """
+        Make the children of the given fetched item match the given nodes, sorted by
+        path like the current children.
+        """
+        children = item.children
+        if len(children) == len(nodes) and all(
+            child.node is node for child, node in zip(children, nodes)
+        ):
+            return
+
+        parent_index = self._get_item_index(item)
+        paths = {node.path for node in nodes}
+
+        # remove from the end, one contiguous range of rows at a time
+        row = len(children) - 1
+        while row >= 0:
+            if children[row].node.path in paths:
+                row -= 1
+                continue
+            last = row
+            while row > 0 and children[row - 1].node.path not in paths:
+                row -= 1
+            self.beginRemoveRows(parent_index, row, last)
+            for child in children[row : last + 1]:
+                self._forget_item(child)
+            del children[row : last + 1]
+            self._update_rows(item, start=row)
+            self.endRemoveRows()
+            row -= 1
+
+        # the remaining children are now in the same order as the nodes
+        row = 0
+        while row < len(nodes):
+            if row < len(children) and children[row].node.path == nodes[row].path:
+                self._update_item(children[row], nodes[row])
+                row += 1
+                continue
+
+            next_path = children[row].node.path if row < len(children) else None
+            end = row + 1
+            while end < len(nodes) and nodes[end].path != next_path:
+                end += 1
+            self.beginInsertRows(parent_index, row, end - 1)
+            new_children = [
+                _HierarchyItem(node, parent=item) for node in nodes[row:end]
+            ]
+            children[row:row] = new_children
+            self._items.update((child.node.path, child) for child in new_children)
+            self._update_rows(item, start=row)
+            self.endInsertRows()
+            row = end
+
+    def _update_item(self, item: _HierarchyItem, node: frmb_gui.core.FrmbNode):
+        if item.node is node:
+            return
+        # read again but identical
+        if item.node == node:
+            item.node = node
+            return
+        if item.node.content.icon != node.content.icon:
+            item.icon = None
+        item.node = node
+        self.dataChanged.emit(
+            self._get_item_index(item),
+            self._get_item_index(item, column=len(self.columns) - 1),
         )
-        self.setText(self.get_index("name"), content.name)
-        self.setText(self.get_index("file_name"), self._frmb_file.path.stem)
-        self.setText(self.get_index("icon"), str(icon_path if not icon else ""))
-        self.setIcon(self.get_index("icon"), icon or QtGui.QIcon())
-        if self._frmb_file.at_root():
-            self.setText(self.get_index("paths"), f"{registry_paths} paths")
-        self.setText(self.get_index("command"), command)
 
-        font = QtGui.QFont()
-        font.setWeight(font.Weight.Bold)
-        self.setFont(self.get_index("name"), font)
+    def _iterate_fetched_items(self) -> Iterator[_HierarchyItem]:
+        """
+        Iterate breadth-first over the items whose children were fetched, parents first.
+        """
+        queue = collections.deque([self._root_item])
+        while queue:
+            item = queue.popleft()
+            if item.children is None:
+                continue
+            yield item
+            queue.extend(item.children)
+
+    def _forget_item(self, item: _HierarchyItem):
+        stack = [item]
+        while stack:
+            item = stack.pop()
+            self._items.pop(item.node.path, None)
+            stack.extend(item.children or [])
+
+    @staticmethod
+    def _update_rows(item: _HierarchyItem, start: int = 0):
+        for row in range(start, len(item.children)):
+            item.children[row].row = row
+
+    def _get_icon(self, item: _HierarchyItem) -> QtGui.QIcon:
+        if item.icon is not None:
+            return item.icon
+
+        icon_path = item.node.content.icon
+        if not icon_path:
+            item.icon = QtGui.QIcon()
+            return item.icon
 
+        icon = self._icon_loader.request_icon(icon_path)
+        # the cached icon, if any, is displayed until the file is checked
+        if self._icon_loader.is_pending(icon_path):
+            waiting = self._icon_waiting.setdefault(icon_path, [])
+            if item not in waiting:
+                waiting.append(item)
 
-class HierarchyBrowserTreeWidget(QtWidgets.QTreeWidget):
+        if icon is not None:
+            item.icon = icon
+            return icon
+
+        if self._icon_loader.cache.is_broken(icon_path):
+            item.icon = QtGui.QIcon()
+            return item.icon
+
+        return self._get_icon_placeholder()
+
+    def _get_icon_placeholder(self) -> QtGui.QIcon:
+        if self._icon_placeholder is None:
+            pixmap = QtGui.QPixmap(16, 16)
+            pixmap.fill(QtGui.QColor(128, 128, 128, 60))
+            self._icon_placeholder = QtGui.QIcon(pixmap)
+        return self._icon_placeholder
+
+    def _on_icon_loaded(self, icon_path: Path):
+        items = self._icon_waiting.pop(icon_path, [])
+        icon = self._icon_loader.cache.peek_icon(icon_path) or QtGui.QIcon()
+        column = self.get_index("icon")
+        for item in items:
+            # removed from the model since
+            if self._items.get(item.node.path) is not item:
+                continue
+            item.icon = icon
+            index = self.createIndex(item.row, column, item)
+            self.dataChanged.emit(index, index)
+
+
+class HierarchyBrowserTreeView(QtWidgets.QTreeView):
     """
-    A tree widget that display the hierarchy of a FrmbRoot.
+    A tree view that display the hierarchy of a FrmbRoot.
+    """
+
+    column_sample_size: int = 100
+    """
+    Maximum amount of rows measured to size the columns to their content.
+
+    Measuring a row is expensive, and a sample is enough to estimate the width.
     """
 
     def __init__(
@@ -104,6 +697,15 @@ class HierarchyBrowserTreeWidget(QtWidgets.QTreeWidget):
     ):
         super().__init__(parent)
         self._root: frmb_gui.core.FrmbRoot | None = hierarchy_root
+        self._hierarchy: frmb_gui.core.FrmbHierarchy | None = None
+        self._loading_text: str | None = None
+        # text painted over the empty view, computed outside the paint event
+        self._placeholder_text: str | None = None
+        self._model = FrmbHierarchyModel(self)
+        self._proxy_model = QtCore.QSortFilterProxyModel(self)
+
+        self._proxy_model.setSourceModel(self._model)
+        self.setModel(self._proxy_model)
 
         self.setAlternatingRowColors(True)
         self.setSortingEnabled(True)
@@ -113,16 +715,12 @@ class HierarchyBrowserTreeWidget(QtWidgets.QTreeWidget):
         self.setSelectionMode(self.SelectionMode.ExtendedSelection)
         self.setSelectionBehavior(self.SelectionBehavior.SelectRows)
 
-        # set model based on FrmbFileTreeWidgetItem
-
-        self.setColumnCount(len(FrmbFileTreeWidgetItem.columns))
-
         header = self.header()  # type: QtWidgets.QHeaderView
-        model = self.model()  # type: QtCore.QAbstractItemModel
         header.setSectionResizeMode(header.ResizeMode.Interactive)
         header.setSortIndicator(0, QtCore.Qt.SortOrder.AscendingOrder)
+        header.setResizeContentsPrecision(self.column_sample_size)
 
-        for column_id, column_config in FrmbFileTreeWidgetItem.columns.items():
+        for column_id, column_config in FrmbHierarchyModel.columns.items():
 
             column_index = column_config["index"]
             size_hint = column_config.get("sizeHint")
@@ -132,35 +730,28 @@ class HierarchyBrowserTreeWidget(QtWidgets.QTreeWidget):
             if resize_mode:
                 header.setSectionResizeMode(column_index, resize_mode)
 
-            column_name = column_config.get("label", column_id)
-            model.setHeaderData(
-                column_index,
-                QtCore.Qt.Orientation.Horizontal,
-                column_name,
-            )
+        app = frmb_gui.get_qapp()
+        self._on_style_changed(app.current_style)
+        self._update_placeholder_text()
+        self._model.modelReset.connect(self._update_placeholder_text)
+        self._model.rowsInserted.connect(self._update_placeholder_text)
+        self._model.rowsRemoved.connect(self._update_placeholder_text)
+        self._model.populator.fetched.connect(self._on_item_fetched)
+        app.add_on_style_changed_callback(self._on_style_changed)
+        self.destroyed.connect(
+            lambda *args: app.remove_on_style_changed_callback(self._on_style_changed)
+        )
 
     # overrides
 
+    @guard_paint
     def paintEvent(self, event: QtGui.QPaintEvent):
         """
         Paint a useful text when there is no root, or it has no children.
         """
-        style = frmb_gui.get_qapp().current_style
-        indentation = (
-            style.content.get("widget", {}).get("treewidget", {}).get("indent", 30)
-        )
-        self.setIndentation(indentation)
-
         super().paintEvent(event)
 
-        text = None
-
-        if not self._root:
-            text = "No root set."
-
-        elif not self._root.children:
-            text = f"No children yet for root {self._root.path}."
-
+        text = self._placeholder_text
         if not text:
             return
 
@@ -172,31 +763,174 @@ class HierarchyBrowserTreeWidget(QtWidgets.QTreeWidget):
         )
         return
 
-    def change_root(self, new_root: frmb_gui.core.FrmbRoot | None):
+    def change_root(
+        self,
+        new_root: frmb_gui.core.FrmbRoot | None,
+        populate: bool = True,
+    ):
+        """
+        Args:
+            new_root: root to display the hierarchy of, None to display nothing.
+            populate:
+                True to read the hierarchy immediately, False to only clear the view
+                and let the caller call :meth:`populate` once the hierarchy is read.
+        """
         self._root = new_root
-        self.populate()
+        if populate:
+            self.populate()
+        else:
+            self._hierarchy = None
+            self._model.set_children_getter(None)
+            self._update_placeholder_text()
 
-    def populate(self):
-        self.clear()
+    def set_loading(self, loading: bool, done: int = 0, total: int = 0):
+        """
+        Display or hide the loading state of the view.
+
+        Args:
+            loading: True if the hierarchy is being read.
+            done: amount of files read so far, for progress display.
+            total: total amount of files to read, for progress display.
+        """
+        if not loading:
+            self._loading_text = None
+        elif total:
+            self._loading_text = f"Loading hierarchy ... {done}/{total} files"
+        else:
+            self._loading_text = "Loading hierarchy ..."
+        self._update_placeholder_text()
+
+    def populate(self, hierarchy: frmb_gui.core.FrmbHierarchy | None = None):
+        """
+        Display the given hierarchy, that must belong to the current root.
+
+        Rows are only created when their parent is expanded. If a snapshot of the
+        same root is already displayed, the rows are reconciled with the new one
+        instead of being created again.
+
+        Args:
+            hierarchy:
+                snapshot of the current root hierarchy, read immediately from the root
+                if not provided.
+        """
         if not self._root:
+            self._hierarchy = None
+            self._model.set_children_getter(None)
+            self._update_placeholder_text()
             return
-        self._populate(children=self._root.children, parent=self)
+
+        if hierarchy is None:
+            hierarchy = self._root.hierarchy
+
+        previous = self._hierarchy
+        self._hierarchy = hierarchy
+        # a newer snapshot of the same root: only update the rows that changed,
+        # keeping the expanded and selected rows, the scroll position and the
+        # column widths.
+        if previous is not None and previous.root_dir == hierarchy.root_dir:
+            was_empty = not self._model.rowCount()
+            self._model.update_children(hierarchy.get_children)
+            if was_empty:
+                header = self.header()  # type: QtWidgets.QHeaderView
+                header.resizeSections(header.ResizeMode.ResizeToContents)
+            self._update_placeholder_text()
+            return
+
+        self._model.set_children_getter(hierarchy.get_children)
+        self._model.fetchMore(QtCore.QModelIndex())
         header = self.header()  # type: QtWidgets.QHeaderView
         header.resizeSections(header.ResizeMode.ResizeToContents)
+        self._update_placeholder_text()
 
-    # private
+    def expand_all(self):
+        """
+        Expand every row of the hierarchy.
+
+        Rows are fetched and expanded progressively, in chunks that yield back to the
+        event loop, so the view keeps responding on huge hierarchies, see
+        :class:`HierarchyPopulator`.
+        """
+        self._model.populator.start()
 
-    def _populate(
+    def update_hierarchy(
         self,
-        children: Sequence[frmb.FrmbFile],
-        parent: QtWidgets.QTreeWidget | QtWidgets.QTreeWidgetItem,
+        hierarchy: frmb_gui.core.FrmbHierarchy,
+        changed_parents: Iterable[Path],
     ):
-        for file in children:
-            item = FrmbFileTreeWidgetItem(frmb_file=file, parent=parent)
-            self._populate(file.children, parent=item)
+        """
+        Display a newer snapshot of the current hierarchy, by only updating the rows
+        of the given parents, so the rest of the view is preserved.
+
+        Args:
+            hierarchy: new snapshot of the current root hierarchy.
+            changed_parents:
+                path of the nodes whose children changed since the displayed snapshot,
+                the ``root_dir`` for the top-level nodes.
+        """
+        root_dir = hierarchy.root_dir
+        self._hierarchy = hierarchy
+        self._model.update_children(
+            hierarchy.get_children,
+            [None if parent == root_dir else parent for parent in changed_parents],
+        )
+        self._update_placeholder_text()
+
+    def _update_placeholder_text(self, *args):
+        """
+        Update the text painted when there is no root, or it has no children.
+
+        Args:
+            args: ignored, so it can be connected to the model signals
+        """
+        if not self._root:
+            text = "No root set."
+        elif self._loading_text is not None:
+            text = self._loading_text
+        elif not self._model.rowCount():
+            text = f"No children yet for root {self._root.path}."
+        else:
+            text = None
+
+        if text != self._placeholder_text:
+            self._placeholder_text = text
+            self.viewport().update()
+
+    def _on_item_fetched(self, index: QtCore.QModelIndex):
+        self.expand(self._proxy_model.mapFromSource(index))
+
+    def _on_style_changed(self, style: frmb_gui.resources.UiStyle):
+        indentation = (
+            style.content.get("widget", {}).get("treewidget", {}).get("indent", 30)
+        )
+        self.setIndentation(indentation)
+
+    @property
+    def root(self) -> frmb_gui.core.FrmbRoot | None:
+        return self._root
+
+    @property
+    def hierarchy(self) -> frmb_gui.core.FrmbHierarchy | None:
+        """
+        The hierarchy snapshot currently displayed.
+        """
+        return self._hierarchy
+
+    def get_selected_nodes(self) -> list[frmb_gui.core.FrmbNode]:
+        """
+        Get the nodes corresponding to the rows currently selected by the user.
+        """
+        return [
+            self._model.get_node(self._proxy_model.mapToSource(index))
+            for index in self.selectionModel().selectedRows()
+        ]
 
 
 class HierarchyBrowserWidget(QtWidgets.QFrame):
+    watch_name = "hierarchy"
+    """
+    Name of the paths watched for the current root, in the application file watcher.
+    """
+
     def __init__(self, parent: Optional[QtWidgets.QWidget] = None):
         super().__init__(parent)
 
@@ -204,27 +938,161 @@ class HierarchyBrowserWidget(QtWidgets.QFrame):
         self.layout_main = QtWidgets.QVBoxLayout()
         self.toolbar = QtWidgets.QToolBar()
         self.button_update = StylesheetIconButton("refresh")
-        self.treewidget = HierarchyBrowserTreeWidget()
+        self.button_expand = StylesheetIconButton("expand-all")
+        self.progressbar = QtWidgets.QProgressBar()
+        self.treeview = HierarchyBrowserTreeView()
+        self.loader = HierarchyLoader(self)
+        self.poller = HierarchyPollingWatcher(self)
 
         # 2. build layout
         self.setLayout(self.layout_main)
         self.toolbar.addWidget(self.button_update)
+        self.toolbar.addWidget(self.button_expand)
+        # XXX: widgets in a toolbar can only be hidden through their action
+        self.action_progressbar = self.toolbar.addWidget(self.progressbar)
         self.layout_main.addWidget(self.toolbar)
-        self.layout_main.addWidget(self.treewidget)
+        self.layout_main.addWidget(self.treeview)
 
         # 3. modify
+        frmb_gui.get_qapp().add_stylesheet_owner(self)
         self.toolbar.setContentsMargins(0, 0, 0, 0)
         self.layout_main.setContentsMargins(0, 0, 0, 0)
         self.layout_main.setSpacing(0)
         self.button_update.setToolTip("Refresh tree widget content.")
+        self.button_expand.setToolTip("Expand all the rows of the hierarchy.")
+        self.action_progressbar.setVisible(False)
+        self.progressbar.setTextVisible(False)
+        self.progressbar.setMaximumWidth(150)
 
         # 4. connect
         controller = frmb_gui.get_qapp().controller
         controller.root_changed_signal.connect(self._on_root_changed)
         self.button_update.clicked.connect(self._on_refresh)
+        self.button_expand.clicked.connect(self._on_expand_all)
+        self.loader.started.connect(self._on_load_started)
+        self.loader.cached.connect(self._on_load_cached)
+        self.loader.progressed.connect(self._on_load_progressed)
+        self.loader.loaded.connect(self._on_load_finished)
+        self.loader.failed.connect(self._on_load_failed)
+        self.poller.changed.connect(self._on_root_files_changed)
+        frmb_gui.get_qapp().file_watcher.failed.connect(self._on_watch_failed)
+
+    def _watch_root(self, hierarchy: frmb_gui.core.FrmbHierarchy):
+        """
+        Watch every directory and frmb file of the given hierarchy of the current root.
+
+        Roots on network shares, that don't deliver change notifications, are polled
+        instead, as well as the roots whose paths cannot all be watched.
+        """
+        if self.poller.root_dir == hierarchy.root_dir:
+            return
+        if frmb_gui.core.is_polling_required(hierarchy.root_dir):
+            self.poller.start(hierarchy.root_dir, hierarchy.signature)
+            return
+
+        frmb_gui.get_qapp().file_watcher.watch(
+            self.watch_name,
+            hierarchy.signature.keys(),
+            self._on_root_files_changed,
+            signatures=hierarchy.signature,
+        )
+
+    def _on_watch_failed(self, name: str, paths: set[Path]):
+        hierarchy = self.treeview.hierarchy
+        if name != self.watch_name or hierarchy is None:
+            return
+        # the changes of the paths not watched would be missed
+        LOGGER.warning(f"polling {hierarchy.root_dir} instead of watching it")
+        frmb_gui.get_qapp().file_watcher.unwatch(self.watch_name)
+        self.poller.start(hierarchy.root_dir, hierarchy.signature)
+
+    def _on_root_files_changed(self, paths: set[Path]):
+        root = self.treeview.root
+        previous = self.treeview.hierarchy
+        # the loader is reading the files again anyway
+        if root is None or previous is None or self.loader.is_loading():
+            return
+
+        start_time = time.perf_counter()
+        try:
+            hierarchy, changed_parents = root.patch(paths)
+        except Exception as error:
+            LOGGER.warning(f"cannot update {root} for {len(paths)} changes: {error!r}")
+            self.loader.load(root)
+            return
+
+        self.treeview.update_hierarchy(hierarchy, changed_parents)
+        file_watcher = frmb_gui.get_qapp().file_watcher
+        added = hierarchy.signature.keys() - previous.signature.keys()
+        removed = previous.signature.keys() - hierarchy.signature.keys()
+        if (added or removed) and file_watcher.is_watching(self.watch_name):
+            file_watcher.update(
+                self.watch_name,
+                added=added,
+                removed=removed,
+                signatures=hierarchy.signature,
+            )
+        LOGGER.debug(
+            f"[{self.__class__.__name__}][_on_root_files_changed] updated "
+            f"{len(changed_parents)} parents for {len(paths)} changes in "
+            f"{(time.perf_counter() - start_time) * 1000:.1f}ms"
+        )
 
     def _on_root_changed(self, new_root: frmb_gui.core.FrmbRoot | None):
-        self.treewidget.change_root(new_root)
+        frmb_gui.get_qapp().file_watcher.unwatch(self.watch_name)
+        self.poller.stop()
+        self.treeview.change_root(new_root, populate=False)
+        if new_root is None:
+            self.loader.cancel()
+            self._on_load_stopped()
+            return
+        self.loader.load(new_root)
 
     def _on_refresh(self, *args):
-        self.treewidget.populate()
+        root = self.treeview.root
+        if root is None:
+            return
+        self.loader.load(root, refresh=True)
+
+    def _on_expand_all(self, *args):
+        self.treeview.expand_all()
+
+    def _on_load_started(self, root: frmb_gui.core.FrmbRoot):
+        self.treeview.set_loading(True)
+        self.progressbar.setRange(0, 0)
+        self.action_progressbar.setVisible(True)
+
+    def _on_load_cached(
+        self,
+        root: frmb_gui.core.FrmbRoot,
+        hierarchy: frmb_gui.core.FrmbHierarchy,
+    ):
+        # display the last known hierarchy while checking it is still up-to-date
+        if root is not self.treeview.root:
+            return
+        self.treeview.populate(hierarchy)
+
+    def _on_load_progressed(self, done: int, total: int):
+        self.treeview.set_loading(True, done=done, total=total)
+        self.progressbar.setRange(0, total)
+        self.progressbar.setValue(done)
+
+    def _on_load_finished(
+        self,
+        root: frmb_gui.core.FrmbRoot,
+        hierarchy: frmb_gui.core.FrmbHierarchy,
+    ):
+        self._on_load_stopped()
+        if root is not self.treeview.root:
+            return
+        if hierarchy is not self.treeview.hierarchy:
+            self.treeview.populate(hierarchy)
+        self._watch_root(hierarchy)
+
+    def _on_load_failed(self, root: frmb_gui.core.FrmbRoot, message: str):
+        self._on_load_stopped()
+        LOGGER.error(f"Cannot read the hierarchy of {root}: {message}")
+
+    def _on_load_stopped(self):
+        self.treeview.set_loading(False)
+        self.action_progressbar.setVisible(False)
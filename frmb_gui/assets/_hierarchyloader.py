@@ -0,0 +1,185 @@
+import logging
+import threading
+from typing import Optional
+
+from qtpy import QtCore
+
+import frmb_gui.core
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _HierarchyLoadSignals(QtCore.QObject):
+    """
+    Signals emitted from the worker thread, delivered in the thread of the loader.
+    """
+
+    cached = QtCore.Signal(int, object)
+    progressed = QtCore.Signal(int, int, int)
+    finished = QtCore.Signal(int, object)
+    failed = QtCore.Signal(int, str)
+
+
+class _HierarchyLoadRunnable(QtCore.QRunnable):
+    """
+    Read the hierarchy of a root in a worker thread.
+    """
+
+    def __init__(
+        self,
+        load_id: int,
+        root: frmb_gui.core.FrmbRoot,
+        refresh: bool,
+        signals: _HierarchyLoadSignals,
+        cancel_event: threading.Event,
+    ):
+        super().__init__()
+        self._load_id = load_id
+        self._root = root
+        self._refresh = refresh
+        self._signals = signals
+        self._cancel_event = cancel_event
+        self._last_percent: int = -1
+
+    def run(self):
+        try:
+            cached = self._root.get_cached_hierarchy()
+            if cached is not None and not self._cancel_event.is_set():
+                self._signals.cached.emit(self._load_id, cached)
+            hierarchy = self._root.get_hierarchy(
+                refresh=self._refresh,
+                progress_callback=self._on_progress,
+                cancel_event=self._cancel_event,
+            )
+        except frmb_gui.core.HierarchyLoadCancelled:
+            LOGGER.debug(f"[{self.__class__.__name__}] cancelled load of {self._root}")
+            return
+        except Exception as error:
+            LOGGER.exception(f"error while reading the hierarchy of {self._root}")
+            self._signals.failed.emit(self._load_id, str(error))
+            return
+
+        self._signals.finished.emit(self._load_id, hierarchy)
+
+    def _on_progress(self, done: int, total: int):
+        # avoid flooding the event loop of the receiving thread
+        percent = int(done / total * 100) if total else 100
+        if percent == self._last_percent:
+            return
+        self._last_percent = percent
+        self._signals.progressed.emit(self._load_id, done, total)
+
+
+class HierarchyLoader(QtCore.QObject):
+    """
+    Read the hierarchy of roots in a background thread.
+
+    Only one load can be active at a time: starting a new one cancel the previous
+    one, whose result will never be delivered.
+
+    The last known hierarchy of the root, persisted in its index, is delivered first
+    with :attr:`cached` so it can be displayed while checking if it is outdated.
+    """
+
+    started = QtCore.Signal(object)
+    """
+    Emitted when a new load start, with the FrmbRoot being loaded.
+    """
+
+    cached = QtCore.Signal(object, object)
+    """
+    Emitted with the FrmbRoot and its last known FrmbHierarchy, which may be outdated,
+    before the up-to-date one is read.
+    """
+
+    progressed = QtCore.Signal(int, int)
+    """
+    Emitted with the amount of files read so far and the total amount to read.
+    """
+
+    loaded = QtCore.Signal(object, object)
+    """
+    Emitted with the FrmbRoot and its FrmbHierarchy when a load finished.
+    """
+
+    failed = QtCore.Signal(object, str)
+    """
+    Emitted with the FrmbRoot and an error message when a load failed.
+    """
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._thread_pool = QtCore.QThreadPool(self)
+        self._signals = _HierarchyLoadSignals(self)
+        self._load_id: int = 0
+        self._root: frmb_gui.core.FrmbRoot | None = None
+        self._cancel_event: threading.Event | None = None
+
+        self._signals.cached.connect(self._on_cached)
+        self._signals.progressed.connect(self._on_progressed)
+        self._signals.finished.connect(self._on_finished)
+        self._signals.failed.connect(self._on_failed)
+
+    def is_loading(self) -> bool:
+        return self._cancel_event is not None
+
+    def load(self, root: frmb_gui.core.FrmbRoot, refresh: bool = False):
+        """
+        Start reading the hierarchy of the given root, cancelling any active load.
+
+        Args:
+            root: root to read the hierarchy of
+            refresh: True to read from disk, even if the hierarchy didn't change.
+        """
+        self.cancel()
+        self._load_id += 1
+        self._root = root
+        self._cancel_event = threading.Event()
+        runnable = _HierarchyLoadRunnable(
+            load_id=self._load_id,
+            root=root,
+            refresh=refresh,
+            signals=self._signals,
+            cancel_event=self._cancel_event,
+        )
+        LOGGER.debug(f"[{self.__class__.__name__}][load] started loading {root}")
+        self.started.emit(root)
+        self._thread_pool.start(runnable)
+
+    def cancel(self):
+        """
+        Interrupt the active load if any.
+        """
+        if self._cancel_event is None:
+            return
+        self._cancel_event.set()
+        self._cancel_event = None
+        self._root = None
+
+    # private
+
+    def _on_cached(self, load_id: int, hierarchy: frmb_gui.core.FrmbHierarchy):
+        if load_id != self._load_id or not self.is_loading():
+            return
+        self.cached.emit(self._root, hierarchy)
+
+    def _on_progressed(self, load_id: int, done: int, total: int):
+        if load_id != self._load_id or not self.is_loading():
+            return
+        self.progressed.emit(done, total)
+
+    def _on_finished(self, load_id: int, hierarchy: frmb_gui.core.FrmbHierarchy):
+        if load_id != self._load_id or not self.is_loading():
+            return
+        root = self._root
+        self._cancel_event = None
+        self._root = None
+        self.loaded.emit(root, hierarchy)
+
+    def _on_failed(self, load_id: int, message: str):
+        if load_id != self._load_id or not self.is_loading():
+            return
+        root = self._root
+        self._cancel_event = None
+        self._root = None
+        self.failed.emit(root, message)
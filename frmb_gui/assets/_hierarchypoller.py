@@ -0,0 +1,121 @@
+import logging
+from pathlib import Path
+from typing import Mapping
+from typing import Optional
+
+from qtpy import QtCore
+
+import frmb_gui.core
+
+LOGGER = logging.getLogger(__name__)
+
+
+class _HierarchyPollSignals(QtCore.QObject):
+    """
+    Signals emitted from the worker thread, delivered in the thread of the watcher.
+    """
+
+    finished = QtCore.Signal(int, object)
+
+
+class _HierarchyPollRunnable(QtCore.QRunnable):
+    """
+    Scan a hierarchy for changes in a worker thread.
+    """
+
+    def __init__(
+        self,
+        poll_id: int,
+        poller: frmb_gui.core.HierarchyPoller,
+        signals: _HierarchyPollSignals,
+    ):
+        super().__init__()
+        self._poll_id = poll_id
+        self._poller = poller
+        self._signals = signals
+
+    def run(self):
+        try:
+            changes = self._poller.poll()
+        except Exception:
+            LOGGER.exception(f"error while polling {self._poller.root_dir}")
+            changes = frmb_gui.core.HierarchyChanges()
+        self._signals.finished.emit(self._poll_id, changes)
+
+
+class HierarchyPollingWatcher(QtCore.QObject):
+    """
+    Detect the changes in the hierarchy of a root by scanning it periodically in a
+    background thread, for filesystems that don't deliver change notifications.
+
+    The interval between 2 scans adapts to the activity of the hierarchy, see
+    :class:`frmb_gui.core.HierarchyPoller`.
+    """
+
+    changed = QtCore.Signal(object)
+    """
+    Emitted with the set of paths that were added, removed or modified since the
+    previous scan.
+    """
+
+    def __init__(self, parent: Optional[QtCore.QObject] = None):
+        super().__init__(parent)
+        self._thread_pool = QtCore.QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(1)
+        self._signals = _HierarchyPollSignals(self)
+        self._poll_id: int = 0
+        self._poller: frmb_gui.core.HierarchyPoller | None = None
+        self._timer = QtCore.QTimer(self)
+        self._timer.setSingleShot(True)
+
+        self._timer.timeout.connect(self._poll)
+        self._signals.finished.connect(self._on_finished)
+
+    @property
+    def root_dir(self) -> Path | None:
+        """
+        The directory being polled, if any.
+        """
+        return self._poller.root_dir if self._poller else None
+
+    def start(
+        self,
+        root_dir: Path,
+        signature: Optional[Mapping[Path, tuple[int, int]]] = None,
+    ):
+        """
+        Start polling the hierarchy in the given directory, stopping any previous one.
+
+        Args:
+            root_dir: filesystem path to the root directory of the hierarchy.
+            signature:
+                stat signature of the hierarchy when it was read, so the changes
+                made since then are reported by the first scan. Else the first scan
+                only records the current state of the hierarchy.
+        """
+        self.stop()
+        self._poller = frmb_gui.core.HierarchyPoller(root_dir, signature=signature)
+        LOGGER.debug(f"[{self.__class__.__name__}][start] polling {root_dir}")
+        self._poll()
+
+    def stop(self):
+        """
+        Stop polling, any scan in progress is ignored.
+        """
+        self._timer.stop()
+        self._poller = None
+        # results of the previous scans will be ignored
+        self._poll_id += 1
+
+    def _poll(self):
+        if self._poller is None:
+            return
+        runnable = _HierarchyPollRunnable(self._poll_id, self._poller, self._signals)
+        self._thread_pool.start(runnable)
+
+    def _on_finished(self, poll_id: int, changes: frmb_gui.core.HierarchyChanges):
+        if poll_id != self._poll_id or self._poller is None:
+            return
+        if changes:
+            self.changed.emit(changes.paths)
+        self._timer.start(int(self._poller.interval * 1000))
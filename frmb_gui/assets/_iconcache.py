@@ -0,0 +1,432 @@
+import collections
+import dataclasses
+import hashlib
+import logging
+from pathlib import Path
+from typing import Optional
+
+from qtpy import QtCore
+from qtpy import QtGui
+
+LOGGER = logging.getLogger(__name__)
+
+_IconKey = tuple[str, int, int]
+"""
+(resolved path, mtime_ns, size) of an icon file.
+"""
+
+
+@dataclasses.dataclass
+class IconCacheStatistics:
+    """
+    Counters describing how efficient the cache is.
+    """
+
+    hits: int = 0
+    """
+    Icons found in cache.
+    """
+
+    misses: int = 0
+    """
+    Icons that had to be read from disk.
+    """
+
+    deduplicated: int = 0
+    """
+    Misses whose file content was identical to an already cached icon.
+    """
+
+    broken_hits: int = 0
+    """
+    Requests of icons already known to be missing or unreadable.
+    """
+
+    evictions: int = 0
+    """
+    Icons removed from the cache to stay under the memory budget.
+    """
+
+    cost: int = 0
+    """
+    Estimated amount of memory used by the cached icons, in bytes.
+    """
+
+
+@dataclasses.dataclass
+class _IconEntry:
+    icon: QtGui.QIcon
+    cost: int
+    keys: set[_IconKey] = dataclasses.field(default_factory=set)
+    paths: set[Path] = dataclasses.field(default_factory=set)
+
+
+class IconCache:
+    """
+    A cache of QIcon loaded from files on disk.
+
+    Icons are identified by their resolved path and their stat signature so an icon
+    modified on disk is read again. Files with identical content share the same QIcon.
+
+    The least recently used icons are discarded once the estimated memory used by the
+    decoded icons exceed the budget.
+
+    Icons that are missing or cannot be decoded are remembered, so they are neither
+    accessed nor reported again until :meth:`clear` is called.
+
+    Must only be used from the GUI thread, use :class:`IconLoader` to decode icons
+    in the background.
+
+    Args:
+        max_cost: memory budget in bytes.
+    """
+
+    def __init__(self, max_cost: int = 64 * 1024 * 1024):
+        self.max_cost: int = max_cost
+        # ordered from least to most recently used
+        self._entries: collections.OrderedDict[str, _IconEntry] = (
+            collections.OrderedDict()
+        )
+        self._digests: dict[_IconKey, str] = {}
+        # last known key of a requested path
+        self._paths: dict[Path, _IconKey] = {}
+        self._broken: set[Path] = set()
+        # sum of the cost of all the entries
+        self._cost: int = 0
+        self._statistics = IconCacheStatistics()
+
+    @property
+    def statistics(self) -> IconCacheStatistics:
+        """
+        Copy of the current statistics of the cache.
+        """
+        return dataclasses.replace(self._statistics, cost=self._cost)
+
+    def clear(self):
+        """
+        Discard all the cached icons, including the broken ones.
+        """
+        self._entries.clear()
+        self._cost = 0
+        self._digests.clear()
+        self._paths.clear()
+        self._broken.clear()
+
+    def is_broken(self, path: Path) -> bool:
+        """
+        True if the given icon path was already found to be missing or not decodable.
+        """
+        return path in self._broken
+
+    def mark_broken(self, path: Path):
+        """
+        Remember the given icon path as missing or not decodable.
+        """
+        self._broken.add(path)
+
+    def get_key(self, path: Path) -> Optional[_IconKey]:
+        """
+        Get the key of the given path when its icon was last cached.
+
+        Returns:
+            None if the path has not been cached.
+        """
+        key = self._paths.get(path)
+        return key if key in self._digests else None
+
+    def peek_icon(self, path: Path) -> Optional[QtGui.QIcon]:
+        """
+        Get the icon last cached for the given path, without accessing the filesystem.
+
+        The icon may be outdated if the file was modified since it was cached, see
+        :meth:`get_cached_icon` to use an up-to-date key instead. It is not counted
+        in the statistics.
+
+        Returns:
+            None if the path has not been cached.
+        """
+        digest = self._digests.get(self._paths.get(path))
+        if digest is None:
+            return None
+        return self._entries[digest].icon
+
+    def get_cached_icon(self, path: Path, key: _IconKey) -> Optional[QtGui.QIcon]:
+        """
+        Get the icon cached for the given file, without accessing the filesystem.
+
+        Args:
+            path: filesystem path to the image file, as requested.
+            key: current (resolved path, mtime_ns, size) of the image file.
+
+        Returns:
+            None if the file with this key has not been cached.
+        """
+        digest = self._digests.get(key)
+        if digest is None:
+            return None
+        self._statistics.hits += 1
+        self._entries.move_to_end(digest)
+        self._entries[digest].paths.add(path)
+        self._paths[path] = key
+        return self._entries[digest].icon
+
+    def get_icon(self, path: Path) -> Optional[QtGui.QIcon]:
+        """
+        Get the icon for the given image file.
+
+        Args:
+            path: filesystem path to an image file that may not exist.
+
+        Returns:
+            None if the file doesn't exist or cannot be decoded.
+        """
+        if path in self._broken:
+            self._statistics.broken_hits += 1
+            return None
+
+        try:
+            resolved = path.resolve()
+            stat = resolved.stat()
+        except OSError:
+            self._broken.add(path)
+            return None
+
+        key = (str(resolved), stat.st_mtime_ns, stat.st_size)
+        icon = self.get_cached_icon(path, key)
+        if icon is not None:
+            return icon
+
+        data = resolved.read_bytes()
+        return self.add_icon_data(path=path, key=key, data=data)
+
+    def add_icon_data(
+        self,
+        path: Path,
+        key: _IconKey,
+        data: bytes,
+        image: Optional[QtGui.QImage] = None,
+    ) -> Optional[QtGui.QIcon]:
+        """
+        Register in the cache the icon read from the given file.
+
+        Args:
+            path: filesystem path to the image file, as requested.
+            key: (resolved path, mtime_ns, size) of the image file.
+            data: content of the image file.
+            image: the decoded data if already available.
+
+        Returns:
+            the icon or None if the data cannot be decoded.
+        """
+        self._statistics.misses += 1
+        digest = hashlib.sha1(data).hexdigest()
+        entry = self._entries.get(digest)
+        if entry is not None:
+            self._statistics.deduplicated += 1
+            self._entries.move_to_end(digest)
+            entry.keys.add(key)
+            entry.paths.add(path)
+            self._digests[key] = digest
+            self._paths[path] = key
+            return entry.icon
+
+        if image is None:
+            image = QtGui.QImage.fromData(data)
+        if image.isNull():
+            LOGGER.warning(f"Cannot load existing icon <{path}> to QIcon")
+            self._broken.add(path)
+            return None
+
+        icon = QtGui.QIcon(QtGui.QPixmap.fromImage(image))
+        self._entries[digest] = _IconEntry(icon=icon, cost=image.sizeInBytes())
+        self._cost += self._entries[digest].cost
+        self._entries[digest].keys.add(key)
+        self._entries[digest].paths.add(path)
+        self._digests[key] = digest
+        self._paths[path] = key
+        self._evict()
+        return icon
+
+    def _evict(self):
+        # always keep the most recent entry, even if bigger than the budget
+        while self._cost > self.max_cost and len(self._entries) > 1:
+            digest, entry = self._entries.popitem(last=False)
+            for key in entry.keys:
+                self._digests.pop(key, None)
+            for path in entry.paths:
+                if self._paths.get(path) in entry.keys:
+                    del self._paths[path]
+            self._cost -= entry.cost
+            self._statistics.evictions += 1
+
+
+class _IconLoaderSignals(QtCore.QObject):
+    """
+    Signals emitted from the worker threads, delivered in the thread of the loader.
+    """
+
+    decoded = QtCore.Signal(object, object, object, object)
+    failed = QtCore.Signal(object)
+
+
+class _IconDecodeRunnable(QtCore.QRunnable):
+    """
+    Read and decode an image file in a worker thread.
+
+    The file is only read if its key differs from the one already cached, else it is
+    emitted without any data.
+    """
+
+    def __init__(
+        self,
+        path: Path,
+        signals: _IconLoaderSignals,
+        cached_key: Optional[_IconKey] = None,
+    ):
+        super().__init__()
+        self._path = path
+        self._signals = signals
+        self._cached_key = cached_key
+
+    def run(self):
+        try:
+            resolved = self._path.resolve()
+            stat = resolved.stat()
+            key = (str(resolved), stat.st_mtime_ns, stat.st_size)
+            if key == self._cached_key:
+                self._signals.decoded.emit(self._path, key, None, None)
+                return
+            data = resolved.read_bytes()
+        except OSError:
+            self._signals.failed.emit(self._path)
+            return
+
+        # QImage, unlike QPixmap, can be safely created outside the GUI thread
+        image = QtGui.QImage.fromData(data)
+        self._signals.decoded.emit(self._path, key, data, image)
+
+
+class IconLoader(QtCore.QObject):
+    """
+    Decode icons in background threads and store them in an :class:`IconCache`.
+
+    Requesting an icon that is not cached yet returns nothing immediately, and
+    :attr:`loaded` is emitted once it is available.
+
+    The file of an icon already cached is checked in the background the first time
+    it is requested, and decoded again if modified: meanwhile the cached icon is
+    returned, and :attr:`loaded` is emitted once checked.
+
+    Args:
+        cache: where to store the icons, the application cache if not provided.
+    """
+
+    loaded = QtCore.Signal(object)
+    """
+    Emitted with the requested path once its icon was decoded or found broken.
+    """
+
+    def __init__(
+        self,
+        cache: Optional[IconCache] = None,
+        parent: Optional[QtCore.QObject] = None,
+    ):
+        super().__init__(parent)
+        self._cache: IconCache = cache or get_icon_cache()
+        self._pending: set[Path] = set()
+        # key of the paths checked to be up-to-date in the cache
+        self._checked: dict[Path, _IconKey] = {}
+        self._thread_pool = QtCore.QThreadPool(self)
+        self._thread_pool.setMaxThreadCount(2)
+        self._signals = _IconLoaderSignals(self)
+        self._signals.decoded.connect(self._on_decoded)
+        self._signals.failed.connect(self._on_failed)
+
+    @property
+    def cache(self) -> IconCache:
+        return self._cache
+
+    def is_pending(self, path: Path) -> bool:
+        """
+        True if the icon of the given path is being checked or decoded.
+        """
+        return path in self._pending
+
+    def request_icon(self, path: Path) -> Optional[QtGui.QIcon]:
+        """
+        Get the icon for the given path if already cached, else start decoding it.
+
+        Returns:
+            None if the icon is not available yet or is broken, which can be checked
+            with :meth:`IconCache.is_broken`. The icon may be outdated while
+            :meth:`is_pending`.
+        """
+        if self._cache.is_broken(path):
+            return None
+
+        key = self._checked.get(path)
+        if key is not None:
+            icon = self._cache.get_cached_icon(path, key)
+            if icon is not None:
+                return icon
+            # evicted since checked
+            del self._checked[path]
+
+        if path not in self._pending:
+            self._start(path, cached_key=self._cache.get_key(path))
+        return self._cache.peek_icon(path)
+
+    def cancel(self):
+        """
+        Forget about the icons that are not started decoding yet.
+
+        The cached icons are checked again the next time they are requested.
+        """
+        self._thread_pool.clear()
+        self._pending.clear()
+        self._checked.clear()
+
+    def _start(self, path: Path, cached_key: Optional[_IconKey] = None):
+        self._pending.add(path)
+        runnable = _IconDecodeRunnable(path, self._signals, cached_key=cached_key)
+        self._thread_pool.start(runnable)
+
+    def _on_decoded(
+        self,
+        path: Path,
+        key: _IconKey,
+        data: Optional[bytes],
+        image: Optional[QtGui.QImage],
+    ):
+        if path not in self._pending:
+            return
+        self._pending.discard(path)
+        if data is not None:
+            self._cache.add_icon_data(path=path, key=key, data=data, image=image)
+        # unchanged on disk, but evicted meanwhile
+        elif self._cache.get_cached_icon(path, key) is None:
+            self._start(path)
+            return
+        if not self._cache.is_broken(path):
+            self._checked[path] = key
+        self.loaded.emit(path)
+
+    def _on_failed(self, path: Path):
+        if path not in self._pending:
+            return
+        self._pending.discard(path)
+        self._cache.mark_broken(path)
+        self.loaded.emit(path)
+
+
+_ICON_CACHE: Optional[IconCache] = None
+
+
+def get_icon_cache() -> IconCache:
+    """
+    Get the icon cache shared by the whole application.
+    """
+    global _ICON_CACHE
+    if _ICON_CACHE is None:
+        _ICON_CACHE = IconCache()
+    return _ICON_CACHE
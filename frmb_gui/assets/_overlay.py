@@ -4,6 +4,8 @@ from qtpy import QtCore
 from qtpy import QtGui
 from qtpy import QtWidgets
 
+from frmb_gui._paintguard import guard_paint
+
 
 class TextOverlayWidget(QtWidgets.QFrame):
     """
@@ -37,6 +39,7 @@ class TextOverlayWidget(QtWidgets.QFrame):
         self._text = new_text
         self.update()
 
+    @guard_paint
     def paintEvent(self, event: QtGui.QPaintEvent):
         qpainter = QtGui.QPainter(self)
         qstyleoption = QtWidgets.QStyleOption()
@@ -91,6 +91,7 @@ class RootFileCreatorWidget(QtWidgets.QFrame):
         self.layout_main.addWidget(self.linededit)
 
         # 3. modify
+        frmb_gui.get_qapp().add_stylesheet_owner(self)
         self.layout_main.setContentsMargins(0, 0, 0, 0)
         self.label_path.setObjectName("path-label")
         self.label_path.setTextInteractionFlags(
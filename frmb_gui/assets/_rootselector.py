@@ -45,6 +45,7 @@ class DeleteWarningDialog(BaseDialog):
         self.layout_main.addWidget(self.label_footer)
 
         # 3. modify
+        frmb_gui.get_qapp().add_stylesheet_owner(self)
         self.set_main_widget(action_button_label="Delete", widget=self.widget)
         self.layout_main.setContentsMargins(0, 0, 0, 0)
         self.layout_main.setAlignment(
@@ -65,6 +66,10 @@ class MenuRootSelectorWidget(QtWidgets.QFrame):
     def __init__(self, parent: Optional[QtWidgets.QWidget] = None):
         super().__init__(parent)
 
+        self._catalog = frmb_gui.core.get_root_catalog()
+        # roots are only instanced when selected
+        self._roots: dict[Path, frmb_gui.core.FrmbRoot] = {}
+
         # 1. create
         self.layout_main = QtWidgets.QHBoxLayout()
         self.layout_box = QtWidgets.QVBoxLayout()
@@ -97,6 +102,7 @@ class MenuRootSelectorWidget(QtWidgets.QFrame):
         self.button_add.setToolTip("Import new Root")
         self.button_remove.setToolTip("Remove current Root")
         self.button_delete.setToolTip("Delete current Root from disk")
+        self._fill_from_catalog()
 
         # 4. connect
         self.button_add.clicked.connect(self._on_add_root)
@@ -110,27 +116,36 @@ class MenuRootSelectorWidget(QtWidgets.QFrame):
         controller.open_root_explorer_action = self._on_open_root_in_explorer
         controller.add_root_action = self._on_add_root
 
+        # the restored root is notified once the listeners are connected
+        if self.main_combobox.currentIndex() >= 0:
+            QtCore.QTimer.singleShot(0, self._on_index_changed)
+
     @property
     def current_root(self) -> frmb_gui.core.FrmbRoot | None:
         """
         Return the root currently selected by the user.
         """
-        return self.main_combobox.currentData()
+        root_path = self.main_combobox.currentData()
+        if root_path is None:
+            return None
+        return self._get_root(Path(root_path))
 
     def add_root(self, root_path: Path) -> int:
         """
-        Add the given root item to the combobox
+        Add the given root item to the combobox, and to the persisted catalog.
 
         Returns:
             index at which the root was added, -1 if None.
         """
-        root = frmb_gui.core.FrmbRoot(root_path)
-        if self.has_root(root):
+        root_path = root_path.absolute()
+        if root_path in self._catalog:
             # TODO display dialog ?
             return -1
 
-        self.main_combobox.addItem(str(root.path), root)
-        index = self.main_combobox.findData(root)
+        self._catalog.add(root_path)
+        self._catalog.save()
+        self.main_combobox.addItem(str(root_path), str(root_path))
+        index = self.main_combobox.count() - 1
         self.main_combobox.setCurrentIndex(index)
         return index
 
@@ -140,15 +155,45 @@ class MenuRootSelectorWidget(QtWidgets.QFrame):
 
         Return True even if it is stored in a different instance.
         """
-        for index in range(self.main_combobox.count()):
-            child_root = self.main_combobox.itemData(index)
-            if child_root == root:
-                return True
-
-        return False
+        return root.path in self._catalog
 
     # private
 
+    def _get_root(self, root_path: Path) -> frmb_gui.core.FrmbRoot:
+        root = self._roots.get(root_path)
+        if root is None:
+            root = frmb_gui.core.FrmbRoot(
+                root_path,
+                index_path=frmb_gui.core.get_index_path(root_path),
+            )
+            self._roots[root_path] = root
+        return root
+
+    def _fill_from_catalog(self):
+        """
+        Replace the content of the combobox with the roots of the catalog, selecting
+        the last selected one.
+        """
+        items = []
+        for entry in self._catalog:
+            item = QtGui.QStandardItem(str(entry.path))
+            item.setData(str(entry.path), QtCore.Qt.ItemDataRole.UserRole)
+            items.append(item)
+
+        # a single insertion for all the rows
+        model = QtGui.QStandardItemModel(self.main_combobox)
+        if items:
+            model.invisibleRootItem().appendRows(items)
+        self.main_combobox.setModel(model)
+
+        last_selected = self._catalog.last_selected
+        index = self.main_combobox.findData(str(last_selected)) if last_selected else 0
+        self.main_combobox.setCurrentIndex(max(index, 0) if items else -1)
+        LOGGER.debug(
+            f"[{self.__class__.__name__}][_fill_from_catalog] restored {len(items)} "
+            f"roots from {self._catalog.path}"
+        )
+
     def _on_context_menu_combobox(self):
 
         if not self.current_root:
@@ -169,6 +214,11 @@ class MenuRootSelectorWidget(QtWidgets.QFrame):
         webbrowser.open(str(path))
 
     def _on_index_changed(self, *args):
+        root_path = self.main_combobox.currentData()
+        last_selected = Path(root_path) if root_path is not None else None
+        if last_selected != self._catalog.last_selected:
+            self._catalog.last_selected = last_selected
+            self._catalog.save()
         self.root_changed_signal.emit()
 
     def _on_add_root(self):
@@ -189,6 +239,12 @@ class MenuRootSelectorWidget(QtWidgets.QFrame):
         self.add_root(Path(dir_path))
 
     def _on_remove_root(self):
+        root_path = self.main_combobox.currentData()
+        if root_path is None:
+            return
+        self._catalog.remove(Path(root_path))
+        self._catalog.save()
+        self._roots.pop(Path(root_path), None)
         self.main_combobox.removeItem(self.main_combobox.currentIndex())
 
     def _on_delete_root(self):
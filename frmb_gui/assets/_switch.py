@@ -6,6 +6,8 @@ from qtpy import QtGui
 from qtpy import QtWidgets
 from qtpy.QtWidgets import QStyle
 
+from frmb_gui._paintguard import guard_paint
+
 LOGGER = logging.getLogger(__name__)
 
 from frmb_gui.assets import StylesheetIcon
@@ -77,6 +79,7 @@ class SwitchButton(QtWidgets.QAbstractButton):
         self._position = new_position
         self.update()
 
+    @guard_paint
     def paintEvent(self, event: QtGui.QPaintEvent):
         qpainter = QtGui.QPainter(self)
         qpainter.setRenderHint(qpainter.RenderHint.Antialiasing)
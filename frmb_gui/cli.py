@@ -1,9 +1,199 @@
+"""
+Command line interface of the application.
+
+Subcommands are headless: they only use :mod:`frmb_gui.core` and never import Qt,
+so they can be used in scripts and CI. They print their result as json on stdout.
+
+The exit code is 2 when a given root directory doesn't exist.
+"""
+
 import argparse
+import json
 import sys
+from pathlib import Path
+from typing import Any
+from typing import Callable
+from typing import Optional
 
 import frmb_gui
 
 
+def _check_roots(*root_dirs: Path) -> Optional[tuple[Any, int]]:
+    """
+    Get the result of a command given a root directory that doesn't exist.
+
+    Returns:
+        None if all the given root directories exist.
+    """
+    for root_dir in root_dirs:
+        if not root_dir.is_dir():
+            return {"root": str(root_dir), "error": "root directory doesn't exist"}, 2
+    return None
+
+
+def _relative(path: Path, root_dir: Path) -> str:
+    return path.relative_to(root_dir).as_posix()
+
+
+def _serialize_node(node: "frmb_gui.core.FrmbNode") -> dict[str, Any]:
+    content = node.content
+    return {
+        "file": _relative(node.path, node.root_dir),
+        "name": content.name,
+        "icon": str(content.icon) if content.icon else None,
+        "command": list(content.command),
+        "paths": list(content.paths),
+        "enabled": content.enabled,
+    }
+
+
+def _get_file_digests(root_dir: Path) -> dict[str, str]:
+    digester = frmb_gui.core.HierarchyDigester()
+    signature = frmb_gui.core.get_hierarchy_signature(root_dir)
+    return {
+        _relative(path, root_dir): digester.get_file_digest(path, stat)
+        for path, stat in signature.items()
+        if path.suffix == ".frmb" and path != root_dir
+    }
+
+
+def run_scan(parsed: argparse.Namespace) -> tuple[Any, int]:
+    """
+    List all the menus of a root.
+    """
+    root_dir: Path = parsed.root
+    error = _check_roots(root_dir)
+    if error:
+        return error
+    hierarchy = frmb_gui.core.load_hierarchy(root_dir)
+    menus = [_relative(node.path, root_dir) for node in hierarchy.iterate()]
+    depth = max((menu.count("/") + 1 for menu in menus), default=0)
+    result = {
+        "root": str(root_dir),
+        "files": len(hierarchy),
+        "depth": depth,
+        "menus": menus,
+    }
+    return result, 0
+
+
+def run_hash(parsed: argparse.Namespace) -> tuple[Any, int]:
+    """
+    Compute the digest of a root content.
+    """
+    root_dir: Path = parsed.root
+    error = _check_roots(root_dir)
+    if error:
+        return error
+    digest = frmb_gui.core.HierarchyDigester().digest(root_dir)
+    result = {"root": str(root_dir), "digest": digest.digest}
+    if parsed.nodes:
+        result["nodes"] = {
+            _relative(path, root_dir): node_digest
+            for path, node_digest in sorted(digest.nodes.items())
+        }
+    return result, 0
+
+
+def run_validate(parsed: argparse.Namespace) -> tuple[Any, int]:
+    """
+    Report the invalid menus of a root; exit code is 1 if any error is found.
+    """
+    root_dir: Path = parsed.root
+    issues = frmb_gui.core.validate_hierarchy(root_dir)
+    errors = [issue for issue in issues if issue.is_error]
+    result = {
+        "root": str(root_dir),
+        "valid": not errors,
+        "issues": [
+            {
+                "file": str(issue.path),
+                "message": issue.message,
+                "level": "error" if issue.is_error else "warning",
+            }
+            for issue in issues
+        ],
+    }
+    return result, 1 if errors else 0
+
+
+def run_diff(parsed: argparse.Namespace) -> tuple[Any, int]:
+    """
+    Compare the menus of 2 roots; exit code is 1 if they are different.
+    """
+    error = _check_roots(parsed.root, parsed.other)
+    if error:
+        return error
+    digests = _get_file_digests(parsed.root)
+    other_digests = _get_file_digests(parsed.other)
+    result = {
+        "root": str(parsed.root),
+        "other": str(parsed.other),
+        "added": sorted(set(other_digests).difference(digests)),
+        "removed": sorted(set(digests).difference(other_digests)),
+        "changed": sorted(
+            path
+            for path, digest in digests.items()
+            if path in other_digests and other_digests[path] != digest
+        ),
+    }
+    different = result["added"] or result["removed"] or result["changed"]
+    return result, 1 if different else 0
+
+
+def run_export(parsed: argparse.Namespace) -> tuple[Any, int]:
+    """
+    Export the content of all the menus of a root as a nested tree.
+    """
+    root_dir: Path = parsed.root
+    error = _check_roots(root_dir)
+    if error:
+        return error
+    hierarchy = frmb_gui.core.load_hierarchy(root_dir)
+
+    def serialize(parent: Optional[Path]) -> list[dict]:
+        serialized = []
+        for node in hierarchy.get_children(parent):
+            menu = _serialize_node(node)
+            menu["children"] = serialize(node.path)
+            serialized.append(menu)
+        return serialized
+
+    result = {"root": str(root_dir), "menus": serialize(None)}
+    return result, 0
+
+
+def run_install(parsed: argparse.Namespace) -> tuple[Any, int]:
+    """
+    Install the menus of a root in the registry, only writing what changed.
+    """
+    root_dir: Path = parsed.root
+    error = _check_roots(root_dir)
+    if error:
+        return error
+    if parsed.registry:
+        backend = frmb_gui.core.FileRegistryBackend(parsed.registry)
+        manifest_path = parsed.registry.with_name(
+            f"{parsed.registry.stem}-{root_dir.name}.manifest.json"
+        )
+    else:
+        backend = frmb_gui.core.get_registry_backend()
+        manifest_path = frmb_gui.core.get_manifest_path(root_dir)
+
+    installer = frmb_gui.core.RegistryInstaller(backend, manifest_path)
+    root = frmb_gui.core.FrmbRoot(root_dir)
+    operations = installer.install(root, dry_run=parsed.dry_run)
+    result = {
+        "root": str(root_dir),
+        "dry_run": parsed.dry_run,
+        "operations": [
+            {"action": operation.action.value, "key": operation.key}
+            for operation in operations
+        ],
+    }
+    return result, 0
+
+
 class CLI:
     """
     Retrieve user argument provided in the command line as convenient python object.
@@ -20,6 +210,59 @@ class CLI:
         )
         self.parser.add_argument("--debug", action="store_true")
         self.parser.add_argument("--devmode", action="store_true")
+
+        subparsers = self.parser.add_subparsers(
+            dest="command",
+            title="commands",
+            description="headless commands printing json; the GUI starts if omitted.",
+        )
+
+        root_help = "filesystem path to the root directory of a hierarchy."
+        parser = subparsers.add_parser("scan", help=run_scan.__doc__.strip())
+        parser.add_argument("root", type=Path, help=root_help)
+        parser.set_defaults(function=run_scan)
+
+        parser = subparsers.add_parser("hash", help=run_hash.__doc__.strip())
+        parser.add_argument("root", type=Path, help=root_help)
+        parser.add_argument(
+            "--nodes",
+            action="store_true",
+            help="also print the digest of every file and directory.",
+        )
+        parser.set_defaults(function=run_hash)
+
+        parser = subparsers.add_parser("validate", help=run_validate.__doc__.strip())
+        parser.add_argument("root", type=Path, help=root_help)
+        parser.set_defaults(function=run_validate)
+
+        parser = subparsers.add_parser("diff", help=run_diff.__doc__.strip())
+        parser.add_argument("root", type=Path, help=root_help)
+        parser.add_argument("other", type=Path, help="root to compare with.")
+        parser.set_defaults(function=run_diff)
+
+        parser = subparsers.add_parser("export", help=run_export.__doc__.strip())
+        parser.add_argument("root", type=Path, help=root_help)
+        parser.add_argument(
+            "--output",
+            type=Path,
+            help="json file to write to instead of printing.",
+        )
+        parser.set_defaults(function=run_export)
+
+        parser = subparsers.add_parser("install", help=run_install.__doc__.strip())
+        parser.add_argument("root", type=Path, help=root_help)
+        parser.add_argument(
+            "--dry-run",
+            action="store_true",
+            help="only print the registry operations that would be applied.",
+        )
+        parser.add_argument(
+            "--registry",
+            type=Path,
+            help="json file to use as registry instead of the system one.",
+        )
+        parser.set_defaults(function=run_install)
+
         self.parsed = self.parser.parse_args(argv)
 
     @property
@@ -29,3 +272,29 @@ class CLI:
     @property
     def devmode(self) -> bool:
         return self.parsed.devmode
+
+    @property
+    def command(self) -> Optional[str]:
+        """
+        Name of the headless command to execute, None to start the GUI.
+        """
+        return self.parsed.command
+
+    def run_command(self) -> int:
+        """
+        Execute the headless command and print its result.
+
+        Returns:
+            exit code of the command
+        """
+        function: Callable[[argparse.Namespace], tuple[Any, int]]
+        function = self.parsed.function
+        result, exit_code = function(self.parsed)
+
+        serialized = json.dumps(result, indent=4)
+        output: Optional[Path] = getattr(self.parsed, "output", None)
+        if output:
+            output.write_text(serialized, "utf-8")
+        else:
+            print(serialized)
+        return exit_code
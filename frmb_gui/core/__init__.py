@@ -1,6 +1,45 @@
 from ._context import get_runtime_context
 from ._context import get_runtime_dependencies
+from ._context import load_runtime_dependencies
+from ._context import request_runtime_dependencies
 from ._context import get_context_reporting_url
+from ._catalog import RootCatalog
+from ._catalog import RootCatalogEntry
+from ._catalog import get_root_catalog
 from ._root import FrmbRoot
 from ._root import FrmbRootFile
 from ._root import delete_root_from_disk
+from ._digest import HierarchyDigest
+from ._digest import HierarchyDigester
+from ._hierarchy import FrmbHierarchy
+from ._hierarchy import FrmbNode
+from ._hierarchy import FrmbNodeContent
+from ._hierarchy import HierarchyLoadCancelled
+from ._hierarchy import get_children_dir
+from ._hierarchy import get_hierarchy_signature
+from ._hierarchy import patch_hierarchy
+from ._hierarchy import read_hierarchy
+from ._hierarchy import read_hierarchy_level
+from ._index import HierarchyIndex
+from ._index import get_index_path
+from ._loader import load_hierarchy
+from ._poll import HierarchyChanges
+from ._poll import HierarchyPoller
+from ._poll import HierarchyScan
+from ._poll import compare_scans
+from ._poll import is_network_path
+from ._poll import is_polling_required
+from ._registry import FileRegistryBackend
+from ._registry import InMemoryRegistryBackend
+from ._registry import InstallManifest
+from ._registry import RegistryAction
+from ._registry import RegistryBackend
+from ._registry import RegistryInstaller
+from ._registry import RegistryOperation
+from ._registry import WindowsRegistryBackend
+from ._registry import get_manifest_path
+from ._registry import get_registry_backend
+from ._registry import plan_install
+from ._utils import slugify
+from ._validate import HierarchyIssue
+from ._validate import validate_hierarchy
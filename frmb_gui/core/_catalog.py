@@ -0,0 +1,194 @@
+"""
+Persist the list of roots the user is working with, across sessions.
+"""
+
+import dataclasses
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Iterator
+from typing import Optional
+
+import frmb_gui
+from ._root import FrmbRoot
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class RootCatalogEntry:
+    """
+    A root known by the catalog.
+
+    The instance is immutable.
+    """
+
+    path: Path
+    """
+    Absolute filesystem path to the root directory, that may not exist anymore.
+    """
+
+    uuid: Optional[str] = None
+    """
+    Unique identifier of the root, as stored in its root file when it was added.
+    """
+
+    name: Optional[str] = None
+    """
+    Pretty name of the root, as stored in its root file when it was added.
+    """
+
+
+class RootCatalog:
+    """
+    An ordered collection of roots, indexed by path and by uuid, that can be
+    persisted on disk.
+
+    Only the catalog file is read to restore it: the roots themselves are not
+    accessed until used.
+
+    Args:
+        path: filesystem path to the json file storing the catalog, that may not exist.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+        self._by_path: dict[Path, RootCatalogEntry] = {}
+        self._by_uuid: dict[str, RootCatalogEntry] = {}
+        self._last_selected: Optional[Path] = None
+
+    def __len__(self) -> int:
+        return len(self._by_path)
+
+    def __iter__(self) -> Iterator[RootCatalogEntry]:
+        # dict preserve the insertion order
+        return iter(self._by_path.values())
+
+    def __contains__(self, path: Path) -> bool:
+        return path.absolute() in self._by_path
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    @property
+    def last_selected(self) -> Optional[Path]:
+        """
+        Path of the root that was selected last, if still in the catalog.
+        """
+        return self._last_selected
+
+    @last_selected.setter
+    def last_selected(self, path: Optional[Path]):
+        self._last_selected = path.absolute() if path else None
+
+    def get_by_path(self, path: Path) -> Optional[RootCatalogEntry]:
+        return self._by_path.get(path.absolute())
+
+    def get_by_uuid(self, uuid: str) -> Optional[RootCatalogEntry]:
+        return self._by_uuid.get(uuid)
+
+    def add(self, path: Path) -> RootCatalogEntry:
+        """
+        Add the given root directory to the catalog, if not already.
+
+        Its root file is read, if any, to retrieve its uuid and name.
+
+        Returns:
+            the new entry, or the existing one.
+        """
+        path = path.absolute()
+        entry = self._by_path.get(path)
+        if entry is not None:
+            return entry
+
+        try:
+            root_file = FrmbRoot(path).root_file
+        except (OSError, ValueError, KeyError) as error:
+            LOGGER.warning(f"cannot read root file of {path}: {error!r}")
+            root_file = None
+
+        if root_file is None:
+            entry = RootCatalogEntry(path)
+        else:
+            entry = RootCatalogEntry(path, uuid=root_file.uuid, name=root_file.name)
+        self._add_entry(entry)
+        return entry
+
+    def remove(self, path: Path):
+        """
+        Remove the given root directory from the catalog, if present.
+        """
+        entry = self._by_path.pop(path.absolute(), None)
+        if entry is None:
+            return
+        if entry.uuid and self._by_uuid.get(entry.uuid) is entry:
+            del self._by_uuid[entry.uuid]
+        if self._last_selected == entry.path:
+            self._last_selected = None
+
+    def _add_entry(self, entry: RootCatalogEntry):
+        self._by_path[entry.path] = entry
+        if entry.uuid:
+            self._by_uuid[entry.uuid] = entry
+
+    def load(self):
+        """
+        Replace the content of the catalog with the one persisted on disk, if any.
+        """
+        self._by_path.clear()
+        self._by_uuid.clear()
+        self._last_selected = None
+        try:
+            content = json.loads(self._path.read_text("utf-8"))
+        except FileNotFoundError:
+            return
+        except (OSError, ValueError) as error:
+            LOGGER.warning(f"cannot read root catalog {self._path}: {error!r}")
+            return
+
+        for root in content.get("roots", []):
+            entry = RootCatalogEntry(
+                path=Path(root["path"]),
+                uuid=root.get("uuid"),
+                name=root.get("name"),
+            )
+            self._add_entry(entry)
+        last_selected = content.get("last_selected")
+        if last_selected and Path(last_selected) in self._by_path:
+            self._last_selected = Path(last_selected)
+
+    def save(self):
+        """
+        Persist the content of the catalog on disk.
+        """
+        content = {
+            "roots": [
+                {"path": str(entry.path), "uuid": entry.uuid, "name": entry.name}
+                for entry in self
+            ],
+            "last_selected": str(self._last_selected) if self._last_selected else None,
+        }
+        try:
+            self._path.parent.mkdir(parents=True, exist_ok=True)
+            # write then rename so an interrupted write never lose the catalog
+            tmp_path = self._path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(json.dumps(content, indent=4), "utf-8")
+            os.replace(tmp_path, self._path)
+        except OSError as error:
+            LOGGER.warning(f"cannot write root catalog {self._path}: {error}")
+
+
+_ROOT_CATALOG: Optional[RootCatalog] = None
+
+
+def get_root_catalog() -> RootCatalog:
+    """
+    Get the catalog of roots of the user, loaded from the user data directory.
+    """
+    global _ROOT_CATALOG
+    if _ROOT_CATALOG is None:
+        _ROOT_CATALOG = RootCatalog(frmb_gui.config.user_data_dir / "roots.json")
+        _ROOT_CATALOG.load()
+    return _ROOT_CATALOG
@@ -1,21 +1,53 @@
+import concurrent.futures
+import hashlib
 import json
+import logging
+import os
+import platform
 import sys
+import threading
 import urllib.parse
-
-# TODO find non-deprecated alternative
-import pkg_resources
-import platform
+from pathlib import Path
+from typing import Optional
 
 import frmb_gui
 
+LOGGER = logging.getLogger(__name__)
 
-def get_runtime_dependencies() -> list[tuple[str, str]]:
+
+def get_interpreter_fingerprint() -> str:
+    """
+    Get an identifier of the current python interpreter and of its installed packages.
+
+    The fingerprint changes when packages are installed or removed, as it modifies
+    the directories of the python path. Only the directories are stat, so it is cheap.
+    """
+    parts = [sys.executable, sys.version, sys.prefix]
+    for path in sys.path:
+        try:
+            parts.append(f"{path}:{os.stat(path).st_mtime_ns}")
+        except OSError:
+            continue
+    return hashlib.sha1("\n".join(parts).encode("utf-8")).hexdigest()
+
+
+def get_dependencies_cache_path() -> Path:
+    """
+    Get the file where the dependencies of the current interpreter are persisted.
+    """
+    fingerprint = get_interpreter_fingerprint()
+    return frmb_gui.config.user_data_dir / "dependencies" / f"{fingerprint[:16]}.json"
+
+
+def collect_runtime_dependencies() -> list[tuple[str, str]]:
     """
     Get all the installed packages/library in the current python environment.
 
     If we are in a frozen application context, the dependencies must come from
     an environement variable.
 
+    This is uncached and can be slow, prefer :func:`get_runtime_dependencies`.
+
     Returns:
         list of [packageName, version]
     """
@@ -35,14 +67,105 @@ def get_runtime_dependencies() -> list[tuple[str, str]]:
         ]
         return dependencies
 
-    dependencies = list()
-    for pkg in pkg_resources.working_set:
-        dependencies.append((pkg.project_name, pkg.version))
+    # XXX: slow to import, only needed here
+    import importlib.metadata
 
+    dependencies = set()
+    for distribution in importlib.metadata.distributions():
+        name = distribution.metadata["Name"]
+        if name:
+            dependencies.add((name, distribution.version))
+
+    dependencies = sorted(dependencies, key=lambda dependency: dependency[0].lower())
     dependencies.append(("python", platform.python_version()))
     return dependencies
 
 
+def load_runtime_dependencies(cache_path: Optional[Path]) -> list[tuple[str, str]]:
+    """
+    Get the dependencies from the given cache file, collecting then persisting them
+    if the file doesn't exist.
+
+    Args:
+        cache_path: filesystem path to a json file that may not exist. None to not
+            use any persistent cache.
+    """
+    if cache_path and cache_path.exists():
+        try:
+            dependencies = json.loads(cache_path.read_text("utf-8"))
+            return [tuple(dependency) for dependency in dependencies]
+        except (OSError, ValueError) as error:
+            LOGGER.warning(f"cannot read dependencies cache {cache_path}: {error}")
+
+    dependencies = collect_runtime_dependencies()
+    if cache_path and not frmb_gui.constants.is_frozen:
+        try:
+            cache_path.parent.mkdir(parents=True, exist_ok=True)
+            cache_path.write_text(json.dumps(dependencies), "utf-8")
+        except OSError as error:
+            LOGGER.warning(f"cannot write dependencies cache {cache_path}: {error}")
+    return dependencies
+
+
+_DEPENDENCIES: Optional[concurrent.futures.Future] = None
+_DEPENDENCIES_LOCK = threading.Lock()
+
+
+def request_runtime_dependencies(
+    persist: bool = True,
+) -> concurrent.futures.Future:
+    """
+    Start collecting the runtime dependencies in a background thread.
+
+    The dependencies are only collected once per process: every call return the same
+    future, whose result is the same as :func:`get_runtime_dependencies`.
+
+    Args:
+        persist:
+            True to also cache the dependencies on disk, for the current interpreter.
+            Only used by the first call.
+
+    Returns:
+        a future whose result is a list of [packageName, version]
+    """
+    global _DEPENDENCIES
+
+    with _DEPENDENCIES_LOCK:
+        if _DEPENDENCIES is not None:
+            return _DEPENDENCIES
+        future = concurrent.futures.Future()
+        _DEPENDENCIES = future
+
+    def collect():
+        try:
+            cache_path = get_dependencies_cache_path() if persist else None
+            future.set_result(load_runtime_dependencies(cache_path))
+        except Exception as error:
+            LOGGER.exception("error while collecting the runtime dependencies")
+            future.set_exception(error)
+
+    thread = threading.Thread(
+        target=collect,
+        name=f"{__name__}.request_runtime_dependencies",
+        daemon=True,
+    )
+    thread.start()
+    return future
+
+
+def get_runtime_dependencies() -> list[tuple[str, str]]:
+    """
+    Get all the installed packages/library in the current python environment.
+
+    Collected once per process, blocking until done. Use
+    :func:`request_runtime_dependencies` to not block.
+
+    Returns:
+        list of [packageName, version]
+    """
+    return request_runtime_dependencies().result()
+
+
 def get_runtime_context() -> str:
     """
     Return the execution context to help at troubleshooting.
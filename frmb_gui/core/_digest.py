@@ -0,0 +1,229 @@
+"""
+Deterministic content digest of a Frmb hierarchy, computed as a Merkle tree.
+"""
+
+import dataclasses
+import hashlib
+import logging
+import types
+from pathlib import Path
+from typing import Mapping
+from typing import Optional
+
+from ._hierarchy import FRMB_SUFFIX
+from ._hierarchy import StatSignature
+from ._hierarchy import get_children_dir
+from ._hierarchy import get_hierarchy_signature
+
+LOGGER = logging.getLogger(__name__)
+
+
+def _hash(*parts: bytes) -> str:
+    hasher = hashlib.sha256()
+    for part in parts:
+        # prefix with the length so 2 different sequences of parts can't collide
+        hasher.update(len(part).to_bytes(8, "little"))
+        hasher.update(part)
+    return hasher.hexdigest()
+
+
+@dataclasses.dataclass(frozen=True)
+class HierarchyDigest:
+    """
+    Digest of a whole hierarchy with the intermediate digest of each of its node.
+
+    Digests are sha256 hexadecimal strings that only depend on the content of the
+    frmb files and their name relative to the root directory; they are stable
+    across processes and machines.
+
+    The instance is immutable.
+    """
+
+    root_dir: Path
+
+    digest: str
+    """
+    Digest of the whole hierarchy.
+    """
+
+    nodes: Mapping[Path, str]
+    """
+    Digest of every frmb file and directory as ``{path: digest}``.
+
+    The digest of a frmb file include its children, the digest of a directory include
+    all the frmb files it contains.
+    """
+
+    def get_changed(self, other: Optional["HierarchyDigest"]) -> set[Path]:
+        """
+        Get the paths whose digest is different between this digest and the given one.
+
+        Paths that only exist in one of the 2 digests are considered changed. If one
+        path changed, all its ancestors are changed too.
+
+        Args:
+            other: the digest to compare with, None to consider everything changed.
+        """
+        if other is None:
+            return set(self.nodes)
+        paths = set(self.nodes) | set(other.nodes)
+        return {path for path in paths if self.nodes.get(path) != other.nodes.get(path)}
+
+
+@dataclasses.dataclass
+class _DigestState:
+    """
+    What is needed to update the digest of a hierarchy after some of its paths changed.
+    """
+
+    signature: dict[Path, StatSignature]
+    files: dict[Path, list[Path]]
+    """
+    Sorted frmb files of each directory.
+    """
+
+    digest: HierarchyDigest
+
+
+class HierarchyDigester:
+    """
+    Compute the :class:`HierarchyDigest` of hierarchies.
+
+    The last digest of each hierarchy is kept with its stat signature, so computing
+    it again only reads the files whose signature changed, and only hash again
+    those files and their ancestors. Use one instance for the lifetime of the
+    process to benefit from the cache.
+    """
+
+    def __init__(self):
+        self._file_cache: dict[Path, tuple[StatSignature, str]] = {}
+        self._states: dict[Path, _DigestState] = {}
+
+    def clear(self):
+        """
+        Discard all the cached digests.
+        """
+        self._file_cache.clear()
+        self._states.clear()
+
+    def get_file_digest(self, path: Path, stat: StatSignature) -> str:
+        """
+        Get the digest of the content of the given file, from cache if not modified.
+
+        Args:
+            path: filesystem path to an existing file.
+            stat: current stat signature of the file.
+        """
+        cached = self._file_cache.get(path)
+        if cached and cached[0] == stat:
+            return cached[1]
+
+        digest = _hash(b"file", path.read_bytes())
+        self._file_cache[path] = (stat, digest)
+        return digest
+
+    def digest(
+        self,
+        root_dir: Path,
+        signature: Optional[Mapping[Path, StatSignature]] = None,
+    ) -> HierarchyDigest:
+        """
+        Compute the digest of the hierarchy stored in the given directory.
+
+        Args:
+            root_dir: filesystem path to the root directory of the hierarchy.
+            signature:
+                stat signature of the hierarchy as returned by
+                :func:`get_hierarchy_signature`. Collected from disk if not provided.
+        """
+        if signature is None:
+            signature = get_hierarchy_signature(root_dir)
+
+        previous = self._states.get(root_dir)
+        if previous is None:
+            previous_signature = {}
+            files = {}
+            nodes = {}
+        else:
+            previous_signature = previous.signature
+            files = previous.files
+            nodes = dict(previous.digest.nodes)
+
+        changed = {path for path, _ in previous_signature.items() ^ signature.items()}
+        if previous is not None and not changed:
+            return previous.digest
+
+        # the directories to digest again, with all their ancestors
+        dirty: set[Path] = set()
+        added: dict[Path, list[Path]] = {}
+        removed: dict[Path, set[Path]] = {}
+        for path in changed:
+            if path != root_dir and path.suffix == FRMB_SUFFIX:
+                directory = path.parent
+                if path not in signature:
+                    removed.setdefault(directory, set()).add(path)
+                    self._file_cache.pop(path, None)
+                    nodes.pop(path, None)
+                elif path not in previous_signature:
+                    added.setdefault(directory, []).append(path)
+            else:
+                directory = path
+                if path not in signature:
+                    nodes.pop(path, None)
+
+            while directory not in dirty:
+                dirty.add(directory)
+                if directory == root_dir:
+                    break
+                directory = directory.parent
+
+        for directory in added.keys() | removed.keys():
+            directory_removed = removed.get(directory, set())
+            directory_files = [
+                path
+                for path in files.get(directory, [])
+                if path not in directory_removed
+            ]
+            directory_files.extend(added.get(directory, []))
+            directory_files.sort()
+            if directory_files:
+                files[directory] = directory_files
+            else:
+                files.pop(directory, None)
+
+        # deepest directories first so children are always digested before parents
+        for directory in sorted(dirty, key=lambda path: len(path.parts), reverse=True):
+            if directory not in signature:
+                continue
+            entries = []
+            for path in files.get(directory, []):
+                children_dir = get_children_dir(path)
+                node_digest = nodes.get(path)
+                if node_digest is None or path in changed or children_dir in dirty:
+                    file_digest = self.get_file_digest(path, signature[path])
+                    children_digest = nodes.get(children_dir, "")
+                    node_digest = _hash(
+                        b"node",
+                        path.name.encode("utf-8"),
+                        file_digest.encode("utf-8"),
+                        children_digest.encode("utf-8"),
+                    )
+                    nodes[path] = node_digest
+                entries.append(node_digest.encode("utf-8"))
+            nodes[directory] = _hash(b"dir", *entries)
+
+        digest = HierarchyDigest(
+            root_dir=root_dir,
+            digest=nodes[root_dir] if root_dir in nodes else _hash(b"dir"),
+            nodes=types.MappingProxyType(nodes),
+        )
+        self._states[root_dir] = _DigestState(
+            signature=dict(signature),
+            files=files,
+            digest=digest,
+        )
+        LOGGER.debug(
+            f"[{self.__class__.__name__}][digest] {len(changed)} paths changed in "
+            f"{root_dir}, digested {len(dirty)} directories"
+        )
+        return digest
@@ -0,0 +1,541 @@
+"""
+Immutable snapshots of a Frmb hierarchy as read from the filesystem.
+"""
+
+import collections
+import dataclasses
+import logging
+import os
+import threading
+import types
+from pathlib import Path
+from typing import Callable
+from typing import Iterable
+from typing import Iterator
+from typing import Mapping
+from typing import Optional
+
+import frmb
+
+LOGGER = logging.getLogger(__name__)
+
+FRMB_SUFFIX = ".frmb"
+
+StatSignature = tuple[int, int]
+"""
+A pair of ``(mtime_ns, size)`` used to detect if a filesystem entry changed.
+"""
+
+ProgressCallbackType = Callable[[int, int], None]
+"""
+Callable receiving the amount of files read so far and the total amount of files to read.
+"""
+
+
+class HierarchyLoadCancelled(Exception):
+    """
+    Raised when the reading of a hierarchy is cancelled before it finished.
+    """
+
+
+def get_children_dir(path: Path) -> Path:
+    """
+    Args:
+        path: filesystem path to a frmb file
+
+    Returns:
+        filesystem path to the directory storing the children of the given frmb file,
+        which might not exist.
+    """
+    return path.parent / path.stem
+
+
+@dataclasses.dataclass(frozen=True)
+class FrmbNodeContent:
+    """
+    The parsed content of a frmb file, with its tokens resolved.
+
+    The instance is immutable.
+    """
+
+    name: str
+    icon: Optional[Path]
+    command: tuple[str, ...]
+    paths: tuple[str, ...]
+    enabled: bool
+
+    @classmethod
+    def from_frmb_file(cls, frmb_file: frmb.FrmbFile):
+        """
+        Parse the given file from disk.
+        """
+        content = frmb_file.content(resolve_tokens=True)
+        return cls(
+            name=content.name,
+            icon=Path(content.icon) if content.icon else None,
+            command=tuple(content.command or ()),
+            paths=tuple(content.paths or ()),
+            enabled=bool(content.enabled),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class FrmbNode:
+    """
+    A frmb file of the hierarchy, with its content already parsed.
+
+    The instance is immutable.
+    """
+
+    path: Path
+    """
+    Filesystem path to the frmb file.
+    """
+
+    root_dir: Path
+    """
+    Filesystem path to the root directory of the hierarchy the file belongs to.
+    """
+
+    content: FrmbNodeContent
+
+    stat: StatSignature
+    """
+    ``(mtime_ns, size)`` of the file at the time it was read.
+    """
+
+    has_children: bool = False
+    """
+    True if the file had a children directory at the time it was read.
+    """
+
+    @property
+    def file(self) -> frmb.FrmbFile:
+        """
+        The frmb file corresponding to this node, as expected by the frmb API.
+        """
+        return frmb.FrmbFile(self.path, root_dir=self.root_dir)
+
+    @property
+    def children_dir(self) -> Path:
+        return get_children_dir(self.path)
+
+    def at_root(self) -> bool:
+        """
+        True if the node is directly at the root of the hierarchy.
+        """
+        return self.path.parent == self.root_dir
+
+
+@dataclasses.dataclass(frozen=True)
+class FrmbHierarchy:
+    """
+    A snapshot of a whole frmb hierarchy at a given point in time.
+
+    Nodes are stored flat and indexed by path; the parent/child links are stored
+    separately so any part of the hierarchy can be accessed without recursion.
+
+    The instance is immutable.
+    """
+
+    root_dir: Path
+    """
+    Filesystem path to the directory the hierarchy was read from.
+    """
+
+    nodes: Mapping[Path, FrmbNode]
+    """
+    All the nodes in the hierarchy as ``{node path: node}``.
+    """
+
+    links: Mapping[Path, tuple[Path, ...]]
+    """
+    Children of every parent as ``{parent path: children paths}``.
+
+    The parent of the top-level nodes is the ``root_dir``. Children are sorted by path.
+    """
+
+    signature: Mapping[Path, StatSignature]
+    """
+    Stat signature of every directory and frmb file that was read to build the snapshot.
+    """
+
+    version: int = 0
+    """
+    Incremented every time the hierarchy of the same root is rebuilt.
+    """
+
+    def __len__(self) -> int:
+        return len(self.nodes)
+
+    @classmethod
+    def from_nodes(
+        cls,
+        root_dir: Path,
+        nodes: list[FrmbNode],
+        signature: Mapping[Path, StatSignature],
+        version: int = 0,
+    ):
+        """
+        Build the snapshot from an unordered list of nodes.
+        """
+        links: dict[Path, list[Path]] = {root_dir: []}
+        for node in sorted(nodes, key=lambda _node: _node.path):
+            parent = node.path.parent
+            # the parent is the frmb file next to the directory
+            if parent != root_dir:
+                parent = parent.parent / f"{parent.name}{FRMB_SUFFIX}"
+            links.setdefault(parent, []).append(node.path)
+
+        return cls(
+            root_dir=root_dir,
+            nodes=types.MappingProxyType({node.path: node for node in nodes}),
+            links=types.MappingProxyType(
+                {parent: tuple(children) for parent, children in links.items()}
+            ),
+            signature=types.MappingProxyType(dict(signature)),
+            version=version,
+        )
+
+    def get_children(self, parent: Optional[Path] = None) -> tuple[FrmbNode, ...]:
+        """
+        Args:
+            parent: path of the node to get the children of, None for the top-level nodes.
+
+        Returns:
+            the direct children of the given parent sorted by path.
+        """
+        parent = self.root_dir if parent is None else parent
+        return tuple(self.nodes[path] for path in self.links.get(parent, ()))
+
+    def iterate(self, parent: Optional[Path] = None) -> Iterator[FrmbNode]:
+        """
+        Iterate depth-first over all the descendants of the given parent.
+
+        Args:
+            parent: path of the node to start from, None to iterate the whole hierarchy.
+        """
+        stack = list(reversed(self.get_children(parent)))
+        while stack:
+            node = stack.pop()
+            yield node
+            stack.extend(reversed(self.get_children(node.path)))
+
+
+def get_hierarchy_signature(
+    root_dir: Path,
+    cancel_event: Optional[threading.Event] = None,
+) -> dict[Path, StatSignature]:
+    """
+    Collect the stat signature of all the filesystem entries that compose a hierarchy.
+
+    This only stat entries and never read their content, making it cheap compared
+    to reading the hierarchy, while still allowing to detect any change in it.
+
+    Args:
+        root_dir: filesystem path to the root directory of the hierarchy.
+        cancel_event:
+            when set from another thread, interrupt the walk by raising
+            :exc:`HierarchyLoadCancelled`.
+
+    Returns:
+        dict of ``{path: stat signature}`` for every directory and frmb file.
+    """
+    signature: dict[Path, StatSignature] = {}
+    directories = [root_dir]
+    while directories:
+        if cancel_event and cancel_event.is_set():
+            raise HierarchyLoadCancelled(f"Walking of {root_dir} was cancelled.")
+        directory = directories.pop()
+        try:
+            stat = directory.stat()
+            entries = list(os.scandir(directory))
+        except (FileNotFoundError, NotADirectoryError):
+            continue
+        signature[directory] = (stat.st_mtime_ns, stat.st_size)
+
+        dir_names = {entry.name for entry in entries if entry.is_dir()}
+        for entry in entries:
+            if not entry.name.endswith(FRMB_SUFFIX) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            path = Path(entry.path)
+            signature[path] = (stat.st_mtime_ns, stat.st_size)
+            if path.stem in dir_names:
+                directories.append(get_children_dir(path))
+
+    return signature
+
+
+def read_node(
+    path: Path,
+    root_dir: Path,
+    stat: StatSignature,
+    has_children: bool,
+) -> FrmbNode:
+    """
+    Read and parse a single frmb file of the hierarchy.
+
+    Args:
+        path: filesystem path to an existing frmb file.
+        root_dir: filesystem path to the root directory of the hierarchy.
+        stat: current stat signature of the file.
+        has_children: True if the file has a children directory.
+    """
+    frmb_file = frmb.FrmbFile(path, root_dir=root_dir)
+    return FrmbNode(
+        path=path,
+        root_dir=root_dir,
+        content=FrmbNodeContent.from_frmb_file(frmb_file),
+        stat=stat,
+        has_children=has_children,
+    )
+
+
+def read_hierarchy_level(directory: Path, root_dir: Path) -> tuple[FrmbNode, ...]:
+    """
+    Read and parse only the frmb files directly stored in the given directory.
+
+    This allows to read a hierarchy lazily, one level at a time.
+
+    Args:
+        directory: root_dir or the children directory of a frmb file of the hierarchy.
+        root_dir: filesystem path to the root directory of the hierarchy.
+
+    Returns:
+        nodes sorted by path, empty if the directory doesn't exist.
+    """
+    try:
+        entries = list(os.scandir(directory))
+    except (FileNotFoundError, NotADirectoryError):
+        return tuple()
+
+    dir_names = {entry.name for entry in entries if entry.is_dir()}
+    nodes = []
+    for entry in entries:
+        if not entry.name.endswith(FRMB_SUFFIX) or not entry.is_file():
+            continue
+        stat = entry.stat()
+        path = Path(entry.path)
+        node = read_node(
+            path=path,
+            root_dir=root_dir,
+            stat=(stat.st_mtime_ns, stat.st_size),
+            has_children=path.stem in dir_names,
+        )
+        nodes.append(node)
+
+    return tuple(sorted(nodes, key=lambda _node: _node.path))
+
+
+def get_unchanged_node(
+    hierarchy: FrmbHierarchy,
+    path: Path,
+    signature: Mapping[Path, StatSignature],
+) -> Optional[FrmbNode]:
+    """
+    Get the node of the given hierarchy if it is still up-to-date with the filesystem.
+
+    Args:
+        hierarchy: a previous snapshot of the hierarchy.
+        path: filesystem path of the node to get.
+        signature: the current stat signature of the hierarchy.
+
+    Returns:
+        None if the node doesn't exist in the hierarchy or changed since.
+    """
+    node = hierarchy.nodes.get(path)
+    if node is None or node.stat != signature.get(path):
+        return None
+    if node.has_children != (get_children_dir(path) in signature):
+        return None
+    return node
+
+
+def read_hierarchy(
+    root_dir: Path,
+    version: int = 0,
+    progress_callback: Optional[ProgressCallbackType] = None,
+    cancel_event: Optional[threading.Event] = None,
+    previous: Optional[FrmbHierarchy] = None,
+) -> FrmbHierarchy:
+    """
+    Read and parse the whole hierarchy of frmb files stored in the given directory.
+
+    Args:
+        root_dir: filesystem path to an existing directory.
+        version: version number to assign to the snapshot.
+        progress_callback: called after each file is read.
+        cancel_event:
+            when set from another thread, interrupt the reading by raising
+            :exc:`HierarchyLoadCancelled`.
+        previous:
+            a previous snapshot of the same hierarchy, whose nodes are reused for the
+            files that didn't change since, instead of being read again.
+    """
+    # collected first so any change happening while reading is detected on next check
+    signature = get_hierarchy_signature(root_dir, cancel_event=cancel_event)
+    total = sum(1 for path in signature if path.suffix == FRMB_SUFFIX)
+    nodes: list[FrmbNode] = []
+
+    frmb_files = list(frmb.read_menu_hierarchy_as_file(root_dir))
+    while frmb_files:
+        if cancel_event and cancel_event.is_set():
+            raise HierarchyLoadCancelled(f"Reading of {root_dir} was cancelled.")
+
+        frmb_file = frmb_files.pop()
+        frmb_files.extend(frmb_file.children)
+
+        node = previous and get_unchanged_node(previous, frmb_file.path, signature)
+        if node:
+            nodes.append(node)
+            continue
+
+        stat = signature.get(frmb_file.path)
+        if stat is None:
+            stat = frmb_file.path.stat()
+            stat = (stat.st_mtime_ns, stat.st_size)
+        node = FrmbNode(
+            path=frmb_file.path,
+            root_dir=root_dir,
+            content=FrmbNodeContent.from_frmb_file(frmb_file),
+            stat=stat,
+            has_children=get_children_dir(frmb_file.path) in signature,
+        )
+        nodes.append(node)
+        if progress_callback:
+            progress_callback(len(nodes), max(total, len(nodes)))
+
+    return FrmbHierarchy.from_nodes(
+        root_dir=root_dir,
+        nodes=nodes,
+        signature=signature,
+        version=version,
+    )
+
+
+def _get_level_parent(directory: Path, root_dir: Path) -> Path:
+    """
+    Get the path of the node whose children are stored in the given directory.
+    """
+    if directory == root_dir:
+        return root_dir
+    return directory.parent / f"{directory.name}{FRMB_SUFFIX}"
+
+
+def patch_hierarchy(
+    hierarchy: FrmbHierarchy,
+    changed_paths: Iterable[Path],
+    version: int = 0,
+) -> tuple[FrmbHierarchy, set[Path]]:
+    """
+    Build a new snapshot of the hierarchy by only reading again the parts affected by
+    the given changed paths.
+
+    Each changed path is mapped to the level directory it belongs to: the directory
+    itself, or the parent directory of a frmb file. Only those levels are listed
+    again; their frmb files whose stat signature didn't change are reused, new
+    children directories are read entirely and removed ones are dropped.
+
+    Args:
+        hierarchy: the current snapshot of the hierarchy.
+        changed_paths: filesystem paths of the directories and frmb files that changed.
+        version: version number to assign to the new snapshot.
+
+    Returns:
+        the new snapshot and the path of the parents whose children changed, where
+        the ``root_dir`` stands for the top-level nodes.
+    """
+    root_dir = hierarchy.root_dir
+    # copy() of a mapping proxy copies the underlying dict, without hashing any key
+    nodes = hierarchy.nodes.copy()
+    links = hierarchy.links.copy()
+    signature = hierarchy.signature.copy()
+    changed_parents: set[Path] = set()
+
+    def remove_level(directory: Path):
+        signature.pop(directory, None)
+        parent = _get_level_parent(directory, root_dir)
+        for child_path in links.pop(parent, ()):
+            remove_node(child_path)
+
+    def remove_node(path: Path):
+        nodes.pop(path, None)
+        signature.pop(path, None)
+        remove_level(get_children_dir(path))
+
+    levels = set()
+    for path in changed_paths:
+        level = path.parent if path.suffix == FRMB_SUFFIX else path
+        if level == root_dir or level.is_relative_to(root_dir):
+            levels.add(level)
+
+    # parents first, so a level is only read once its parent node is known
+    pending = collections.deque(sorted(levels, key=lambda _path: len(_path.parts)))
+    while pending:
+        directory = pending.popleft()
+        parent = _get_level_parent(directory, root_dir)
+        if parent != root_dir and parent not in nodes:
+            # not a level of the hierarchy: a random directory or an orphan one
+            continue
+
+        try:
+            stat = directory.stat()
+            entries = list(os.scandir(directory))
+        except (FileNotFoundError, NotADirectoryError):
+            if directory == root_dir:
+                entries = []
+            else:
+                if directory in signature:
+                    remove_level(directory)
+                    changed_parents.add(parent)
+                continue
+        else:
+            signature[directory] = (stat.st_mtime_ns, stat.st_size)
+
+        dir_names = {entry.name for entry in entries if entry.is_dir()}
+        children: list[Path] = []
+        for entry in entries:
+            if not entry.name.endswith(FRMB_SUFFIX) or not entry.is_file():
+                continue
+            stat = entry.stat()
+            stat = (stat.st_mtime_ns, stat.st_size)
+            path = Path(entry.path)
+            has_children = path.stem in dir_names
+            children.append(path)
+            signature[path] = stat
+
+            node = nodes.get(path)
+            if node is None or node.stat != stat or node.has_children != has_children:
+                nodes[path] = read_node(path, root_dir, stat, has_children)
+                changed_parents.add(parent)
+
+            children_dir = get_children_dir(path)
+            if has_children and children_dir not in signature:
+                # a new children directory, read entirely
+                pending.append(children_dir)
+            elif not has_children and children_dir in signature:
+                remove_level(children_dir)
+                changed_parents.add(path)
+
+        children.sort()
+        children = tuple(children)
+        previous_children = links.get(parent, ())
+        if children != previous_children:
+            removed = set(previous_children).difference(children)
+            for path in removed:
+                remove_node(path)
+            changed_parents.add(parent)
+        if children or parent == root_dir:
+            links[parent] = children
+        else:
+            links.pop(parent, None)
+
+    new_hierarchy = FrmbHierarchy(
+        root_dir=root_dir,
+        nodes=types.MappingProxyType(nodes),
+        links=types.MappingProxyType(links),
+        signature=types.MappingProxyType(signature),
+        version=version,
+    )
+    return new_hierarchy, changed_parents
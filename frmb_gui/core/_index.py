@@ -0,0 +1,233 @@
+"""
+Persist hierarchy snapshots on disk so they can be displayed without reading the hierarchy.
+"""
+
+import contextlib
+import hashlib
+import json
+import logging
+import sqlite3
+from pathlib import Path
+from typing import Iterator
+from typing import Optional
+
+import frmb_gui
+from ._hierarchy import FrmbHierarchy
+from ._hierarchy import FrmbNode
+from ._hierarchy import FrmbNodeContent
+from ._utils import slugify
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_index_path(root_dir: Path) -> Path:
+    """
+    Get the default location of the index of the given root, in the user data directory.
+
+    Args:
+        root_dir: filesystem path to the root directory of a hierarchy.
+
+    Returns:
+        filesystem path to a file that may not exist.
+    """
+    root_id = hashlib.sha1(str(root_dir.absolute()).encode("utf-8")).hexdigest()
+    name = f"{slugify(root_dir.name)}-{root_id[:12]}.sqlite"
+    return frmb_gui.config.user_data_dir / "indexes" / name
+
+
+class HierarchyIndex:
+    """
+    A SQLite database storing a snapshot of a single hierarchy.
+
+    It stores the parsed content and stat signature of every file with its parent,
+    so the hierarchy can be restored without reading a single frmb file, and then
+    compared against the filesystem to know what changed.
+
+    A new connection is opened for every operation so the index can be used from
+    any thread.
+
+    Args:
+        path: filesystem path to the database file, that may not exist yet.
+    """
+
+    schema_version = 1
+    """
+    Incremented on every change of the database structure, to discard older indexes.
+    """
+
+    def __init__(self, path: Path):
+        self._path = path
+
+    def __repr__(self) -> str:
+        return f"{self.__class__.__name__}(path=Path({self._path}))"
+
+    @property
+    def path(self) -> Path:
+        return self._path
+
+    def read(self, root_dir: Path) -> Optional[FrmbHierarchy]:
+        """
+        Restore the hierarchy stored in the index.
+
+        Args:
+            root_dir: filesystem path to the root directory the index was written for.
+
+        Returns:
+            None if the index doesn't exist or is not compatible.
+        """
+        if not self._path.exists():
+            return None
+
+        try:
+            with self._connect() as connection:
+                meta = dict(connection.execute("SELECT key, value FROM meta"))
+                schema_version = meta.get("schema_version")
+                if schema_version != str(self.schema_version):
+                    return None
+                if meta.get("root_dir") != str(root_dir):
+                    return None
+
+                nodes = [
+                    FrmbNode(
+                        path=Path(path),
+                        root_dir=root_dir,
+                        content=FrmbNodeContent(
+                            name=name,
+                            icon=Path(icon) if icon else None,
+                            command=tuple(json.loads(command)),
+                            paths=tuple(json.loads(paths)),
+                            enabled=bool(enabled),
+                        ),
+                        stat=(mtime_ns, size),
+                        has_children=bool(has_children),
+                    )
+                    for (
+                        path,
+                        name,
+                        icon,
+                        command,
+                        paths,
+                        enabled,
+                        mtime_ns,
+                        size,
+                        has_children,
+                    ) in connection.execute(
+                        "SELECT path, name, icon, command, paths, enabled, mtime_ns, "
+                        "size, has_children FROM nodes"
+                    )
+                ]
+                signature = {
+                    Path(path): (mtime_ns, size)
+                    for path, mtime_ns, size in connection.execute(
+                        "SELECT path, mtime_ns, size FROM signature"
+                    )
+                }
+        except sqlite3.DatabaseError as error:
+            LOGGER.warning(f"cannot read index {self._path}: {error}")
+            return None
+
+        return FrmbHierarchy.from_nodes(
+            root_dir=root_dir,
+            nodes=nodes,
+            signature=signature,
+            version=int(meta.get("version", 0)),
+        )
+
+    def write(
+        self,
+        hierarchy: FrmbHierarchy,
+        previous: Optional[FrmbHierarchy] = None,
+    ):
+        """
+        Store the given hierarchy in the index, replacing the one already stored.
+
+        Args:
+            hierarchy: snapshot to store.
+            previous:
+                the snapshot currently stored in the index, if known, in which case only
+                the differences with it are written.
+        """
+        self._path.parent.mkdir(parents=True, exist_ok=True)
+
+        with self._connect() as connection:
+            meta = dict(connection.execute("SELECT key, value FROM meta"))
+            if previous is None or meta.get("schema_version") != str(
+                self.schema_version
+            ):
+                previous = None
+                connection.execute("DELETE FROM nodes")
+                connection.execute("DELETE FROM signature")
+
+            previous_nodes = previous.nodes if previous else {}
+            previous_signature = previous.signature if previous else {}
+
+            removed = set(previous_nodes).difference(hierarchy.nodes)
+            connection.executemany(
+                "DELETE FROM nodes WHERE path = ?",
+                [(str(path),) for path in removed],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO nodes VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)",
+                [
+                    (
+                        str(node.path),
+                        str(node.path.parent),
+                        node.content.name,
+                        str(node.content.icon) if node.content.icon else None,
+                        json.dumps(node.content.command),
+                        json.dumps(node.content.paths),
+                        int(node.content.enabled),
+                        node.stat[0],
+                        node.stat[1],
+                        int(node.has_children),
+                    )
+                    for path, node in hierarchy.nodes.items()
+                    if previous_nodes.get(path) != node
+                ],
+            )
+
+            removed = set(previous_signature).difference(hierarchy.signature)
+            connection.executemany(
+                "DELETE FROM signature WHERE path = ?",
+                [(str(path),) for path in removed],
+            )
+            connection.executemany(
+                "INSERT OR REPLACE INTO signature VALUES (?, ?, ?)",
+                [
+                    (str(path), stat[0], stat[1])
+                    for path, stat in hierarchy.signature.items()
+                    if previous_signature.get(path) != stat
+                ],
+            )
+
+            connection.executemany(
+                "INSERT OR REPLACE INTO meta VALUES (?, ?)",
+                [
+                    ("schema_version", str(self.schema_version)),
+                    ("root_dir", str(hierarchy.root_dir)),
+                    ("version", str(hierarchy.version)),
+                ],
+            )
+
+    @contextlib.contextmanager
+    def _connect(self) -> Iterator[sqlite3.Connection]:
+        connection = sqlite3.connect(self._path)
+        try:
+            # commit on success or rollback on error
+            with connection:
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS meta (key TEXT PRIMARY KEY, value TEXT)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS nodes ("
+                    "path TEXT PRIMARY KEY, parent TEXT NOT NULL, name TEXT, icon TEXT, "
+                    "command TEXT, paths TEXT, enabled INTEGER, mtime_ns INTEGER, "
+                    "size INTEGER, has_children INTEGER)"
+                )
+                connection.execute(
+                    "CREATE TABLE IF NOT EXISTS signature ("
+                    "path TEXT PRIMARY KEY, mtime_ns INTEGER, size INTEGER)"
+                )
+                yield connection
+        finally:
+            connection.close()
@@ -0,0 +1,121 @@
+"""
+Read a Frmb hierarchy from disk using multiple threads.
+"""
+
+import concurrent.futures
+import logging
+import threading
+from pathlib import Path
+from typing import Optional
+
+import frmb_gui
+from ._hierarchy import FRMB_SUFFIX
+from ._hierarchy import FrmbHierarchy
+from ._hierarchy import HierarchyLoadCancelled
+from ._hierarchy import ProgressCallbackType
+from ._hierarchy import get_children_dir
+from ._hierarchy import get_hierarchy_signature
+from ._hierarchy import get_unchanged_node
+from ._hierarchy import read_hierarchy
+from ._hierarchy import read_node
+
+LOGGER = logging.getLogger(__name__)
+
+
+def get_loading_workers() -> Optional[int]:
+    """
+    Get the amount of threads to use to read a hierarchy, as configured by the user.
+
+    Returns:
+        0 to read sequentially, None to let python pick a default.
+    """
+    workers = frmb_gui.env.loading_workers.get()
+    if workers is None or workers == "":
+        return None
+    return max(0, int(workers))
+
+
+def load_hierarchy(
+    root_dir: Path,
+    version: int = 0,
+    max_workers: Optional[int] = None,
+    parallel: bool = True,
+    progress_callback: Optional[ProgressCallbackType] = None,
+    cancel_event: Optional[threading.Event] = None,
+    previous: Optional[FrmbHierarchy] = None,
+) -> FrmbHierarchy:
+    """
+    Read and parse the whole hierarchy of frmb files stored in the given directory.
+
+    All the files are discovered in a single pass over the directories, then read
+    and parsed concurrently on a pool of threads, as file access latency usually
+    dominates the parsing time. The result is identical to :func:`read_hierarchy`.
+
+    Args:
+        root_dir: filesystem path to an existing directory.
+        version: version number to assign to the snapshot.
+        max_workers:
+            maximum number of threads to use, None to let python pick a default.
+            0 is equivalent to ``parallel=False``.
+        parallel: False to read sequentially using the frmb API instead.
+        progress_callback: called after each file is read.
+        cancel_event:
+            when set from another thread, interrupt the reading by raising
+            :exc:`HierarchyLoadCancelled`. Files already being read are finished first.
+        previous:
+            a previous snapshot of the same hierarchy, whose nodes are reused for the
+            files that didn't change since, instead of being read again.
+    """
+    if not parallel or max_workers == 0:
+        return read_hierarchy(
+            root_dir,
+            version=version,
+            progress_callback=progress_callback,
+            cancel_event=cancel_event,
+            previous=previous,
+        )
+
+    signature = get_hierarchy_signature(root_dir, cancel_event=cancel_event)
+    paths = []
+    nodes = []
+    for path in signature:
+        if path == root_dir or path.suffix != FRMB_SUFFIX:
+            continue
+        node = get_unchanged_node(previous, path, signature) if previous else None
+        if node:
+            nodes.append(node)
+        else:
+            paths.append(path)
+
+    if previous and paths:
+        LOGGER.debug(f"[load_hierarchy] {len(paths)} files changed in {root_dir}")
+
+    reused = len(nodes)
+    with concurrent.futures.ThreadPoolExecutor(
+        max_workers=max_workers,
+        thread_name_prefix=f"{__name__}.load_hierarchy",
+    ) as executor:
+        futures = [
+            executor.submit(
+                read_node,
+                path=path,
+                root_dir=root_dir,
+                stat=signature[path],
+                has_children=get_children_dir(path) in signature,
+            )
+            for path in paths
+        ]
+        for future in concurrent.futures.as_completed(futures):
+            if cancel_event and cancel_event.is_set():
+                executor.shutdown(wait=False, cancel_futures=True)
+                raise HierarchyLoadCancelled(f"Reading of {root_dir} was cancelled.")
+            nodes.append(future.result())
+            if progress_callback:
+                progress_callback(len(nodes) - reused, len(paths))
+
+    return FrmbHierarchy.from_nodes(
+        root_dir=root_dir,
+        nodes=nodes,
+        signature=signature,
+        version=version,
+    )
@@ -0,0 +1,387 @@
+"""
+Detect changes in a Frmb hierarchy by periodically scanning it, for filesystems that
+don't deliver change notifications, like network shares.
+"""
+
+import array
+import dataclasses
+import itertools
+import logging
+import operator
+import os
+import subprocess
+import time
+from pathlib import Path
+from typing import Mapping
+from typing import Optional
+
+import frmb_gui
+from ._hierarchy import FRMB_SUFFIX
+from ._hierarchy import StatSignature
+
+LOGGER = logging.getLogger(__name__)
+
+# amount of consecutive paths compared at once when 2 scans have the same paths
+_BLOCK_SIZE = 1024
+
+_NETWORK_FILESYSTEMS = {
+    "9p",
+    "afpfs",
+    "cifs",
+    "davfs",
+    "fuse.sshfs",
+    "nfs",
+    "nfs4",
+    "smb3",
+    "smbfs",
+    "webdav",
+}
+
+# amount of seconds the mount points are reused before being listed again
+_MOUNTS_MAX_AGE = 60.0
+# (time of the listing, mount points) as returned by _get_mount_types
+_MOUNTS_CACHE: Optional[tuple[float, dict[str, str]]] = None
+
+
+def _get_mount_types() -> dict[str, str]:
+    """
+    Get the filesystem type of every mount point as ``{mount point: type}``.
+
+    Listing them require a subprocess on macOS, so the result is reused for
+    :data:`_MOUNTS_MAX_AGE` seconds.
+    """
+    global _MOUNTS_CACHE
+    if _MOUNTS_CACHE and time.monotonic() - _MOUNTS_CACHE[0] < _MOUNTS_MAX_AGE:
+        return _MOUNTS_CACHE[1]
+
+    mounts = {}
+    if frmb_gui.osplatform.is_linux():
+        with open("/proc/mounts", encoding="utf-8") as file:
+            for line in file:
+                parts = line.split()
+                if len(parts) >= 3:
+                    # spaces in mount points are escaped as octal
+                    mounts[parts[1].replace("\\040", " ")] = parts[2]
+    elif frmb_gui.osplatform.is_mac():
+        # "//user@server/share on /Volumes/share (smbfs, nodev, nosuid)"
+        output = subprocess.run(["mount"], capture_output=True, text=True).stdout
+        for line in output.splitlines():
+            _, _, line = line.partition(" on ")
+            mount_point, _, options = line.rpartition(" (")
+            if mount_point:
+                mounts[mount_point] = options.split(",")[0]
+    _MOUNTS_CACHE = (time.monotonic(), mounts)
+    return mounts
+
+
+def is_network_path(path: Path) -> bool:
+    """
+    Return True if the given path is stored on a network share, where filesystem
+    change notifications are usually not delivered.
+    """
+    path = path.absolute()
+    # UNC path like \\server\share
+    if str(path).startswith("\\\\"):
+        return True
+
+    if frmb_gui.osplatform.is_windows():
+        import ctypes
+
+        drive_remote = 4
+        drive_type = ctypes.windll.kernel32.GetDriveTypeW(f"{path.drive}\\")
+        return drive_type == drive_remote
+
+    try:
+        mounts = _get_mount_types()
+    except OSError as error:
+        LOGGER.warning(f"cannot list mount points: {error}")
+        return False
+    # the deepest mount point containing the path
+    for parent in [path, *path.parents]:
+        filesystem = mounts.get(str(parent))
+        if filesystem is not None:
+            return filesystem in _NETWORK_FILESYSTEMS
+    return False
+
+
+def is_polling_required(root_dir: Path) -> bool:
+    """
+    Return True if the changes of the given hierarchy must be detected by polling it,
+    as configured by the user, or because it is stored on a network share.
+    """
+    polling = frmb_gui.env.watch_polling.get()
+    if polling is not None and polling != "":
+        return bool(int(polling))
+    return is_network_path(root_dir)
+
+
+@dataclasses.dataclass(frozen=True)
+class HierarchyScan:
+    """
+    The stat of every directory and frmb file of a hierarchy at a given point in time.
+
+    Stats are stored as compact arrays sharing the index of :attr:`paths`, so 2 scans
+    can be compared without creating any Python object per path.
+
+    Inodes are only compared when both scans have them.
+
+    The instance is immutable.
+    """
+
+    paths: tuple[str, ...]
+    """
+    Filesystem path of every directory and frmb file, in scanning order.
+    """
+
+    inodes: Optional[array.array]
+    """
+    None when unknown, like for a scan created from a hierarchy signature.
+    """
+
+    sizes: array.array
+    mtimes: array.array
+    """
+    Modification time in nanoseconds.
+    """
+
+    def __len__(self) -> int:
+        return len(self.paths)
+
+    @classmethod
+    def from_directory(cls, root_dir: Path):
+        """
+        Scan the hierarchy stored in the given directory.
+
+        Like :func:`get_hierarchy_signature`, only the directories that are the
+        children directory of a frmb file are scanned.
+        """
+        paths = []
+        inodes = array.array("Q")
+        sizes = array.array("q")
+        mtimes = array.array("q")
+
+        directories = [str(root_dir)]
+        while directories:
+            directory = directories.pop()
+            try:
+                stat = os.stat(directory)
+                entries = list(os.scandir(directory))
+            except (FileNotFoundError, NotADirectoryError):
+                continue
+            paths.append(directory)
+            inodes.append(stat.st_ino)
+            sizes.append(stat.st_size)
+            mtimes.append(stat.st_mtime_ns)
+
+            dir_names = {entry.name for entry in entries if entry.is_dir()}
+            for entry in entries:
+                name = entry.name
+                if not name.endswith(FRMB_SUFFIX) or not entry.is_file():
+                    continue
+                # on windows the stat of an entry is given by the directory listing
+                stat = entry.stat()
+                paths.append(entry.path)
+                inodes.append(entry.inode())
+                sizes.append(stat.st_size)
+                mtimes.append(stat.st_mtime_ns)
+                stem = name[: -len(FRMB_SUFFIX)]
+                if stem in dir_names:
+                    directories.append(os.path.join(directory, stem))
+
+        return cls(paths=tuple(paths), inodes=inodes, sizes=sizes, mtimes=mtimes)
+
+    @classmethod
+    def from_signature(cls, signature: Mapping[Path, StatSignature]):
+        """
+        Create a scan from the given stat signature of a hierarchy, without any
+        filesystem access.
+
+        Args:
+            signature: as returned by :func:`get_hierarchy_signature`.
+        """
+        return cls(
+            paths=tuple(map(str, signature.keys())),
+            inodes=None,
+            sizes=array.array("q", map(operator.itemgetter(1), signature.values())),
+            mtimes=array.array("q", map(operator.itemgetter(0), signature.values())),
+        )
+
+
+@dataclasses.dataclass(frozen=True)
+class HierarchyChanges:
+    """
+    The difference between 2 scans of the same hierarchy.
+
+    The instance is immutable.
+    """
+
+    added: frozenset[Path] = frozenset()
+    removed: frozenset[Path] = frozenset()
+    modified: frozenset[Path] = frozenset()
+    """
+    Paths whose inode, size or modification time changed.
+    """
+
+    def __bool__(self) -> bool:
+        return bool(self.added or self.removed or self.modified)
+
+    @property
+    def paths(self) -> set[Path]:
+        """
+        All the paths that changed in any way.
+        """
+        return set(self.added | self.removed | self.modified)
+
+
+def _get_compared_fields(
+    previous: HierarchyScan,
+    current: HierarchyScan,
+) -> tuple[str, ...]:
+    if previous.inodes is None or current.inodes is None:
+        return "mtimes", "sizes"
+    return "mtimes", "sizes", "inodes"
+
+
+def _get_modified(
+    paths: tuple[str, ...],
+    previous: HierarchyScan,
+    previous_indices: array.array,
+    current: HierarchyScan,
+    current_indices: array.array,
+) -> frozenset[Path]:
+    # all the iterations happen in C, through map and compress
+    changed = map(
+        any,
+        zip(
+            *(
+                map(
+                    operator.ne,
+                    map(getattr(previous, name).__getitem__, previous_indices),
+                    map(getattr(current, name).__getitem__, current_indices),
+                )
+                for name in _get_compared_fields(previous, current)
+            )
+        ),
+    )
+    return frozenset(map(Path, itertools.compress(paths, changed)))
+
+
+def compare_scans(previous: HierarchyScan, current: HierarchyScan) -> HierarchyChanges:
+    """
+    Get the paths that were added, removed or modified between the 2 given scans.
+
+    Comparing 2 identical scans is a single pass over each array, and only the blocks
+    of paths that changed are compared element by element.
+    """
+    fields = _get_compared_fields(previous, current)
+    if previous.paths == current.paths:
+        if all(getattr(previous, name) == getattr(current, name) for name in fields):
+            return HierarchyChanges()
+
+        # only compare element by element the blocks that are not identical
+        modified = set()
+        for start in range(0, len(current), _BLOCK_SIZE):
+            block = slice(start, start + _BLOCK_SIZE)
+            if all(
+                getattr(previous, name)[block] == getattr(current, name)[block]
+                for name in fields
+            ):
+                continue
+            indices = array.array("q", range(len(current))[block])
+            paths = current.paths[block]
+            modified.update(_get_modified(paths, previous, indices, current, indices))
+        return HierarchyChanges(modified=frozenset(modified))
+
+    previous_index = dict(zip(previous.paths, itertools.count()))
+    current_index = dict(zip(current.paths, itertools.count()))
+    common = tuple(current_index.keys() & previous_index.keys())
+    modified = _get_modified(
+        common,
+        previous,
+        array.array("q", map(previous_index.__getitem__, common)),
+        current,
+        array.array("q", map(current_index.__getitem__, common)),
+    )
+    return HierarchyChanges(
+        added=frozenset(map(Path, current_index.keys() - previous_index.keys())),
+        removed=frozenset(map(Path, previous_index.keys() - current_index.keys())),
+        modified=modified,
+    )
+
+
+class HierarchyPoller:
+    """
+    Detect the changes in a hierarchy by comparing successive scans of it.
+
+    The interval at which to poll adapts to the activity: it is reset to the minimum
+    after a change, then grows while nothing changes. It also never gets short enough
+    for the scanning to take more than 5% of the time, for slow network shares.
+
+    Args:
+        root_dir: filesystem path to the root directory of the hierarchy.
+        min_interval: minimum amount of seconds between 2 polls.
+        max_interval: maximum amount of seconds between 2 polls.
+        signature:
+            stat signature of the hierarchy when it was last read, so the first poll
+            reports the changes since then. Else the first poll only records the
+            state of the hierarchy.
+    """
+
+    backoff: float = 1.5
+    """
+    Factor applied to the interval every time a poll didn't find any change.
+    """
+
+    def __init__(
+        self,
+        root_dir: Path,
+        min_interval: float = 2.0,
+        max_interval: float = 30.0,
+        signature: Optional[Mapping[Path, StatSignature]] = None,
+    ):
+        self._root_dir = root_dir
+        self.min_interval: float = min_interval
+        self.max_interval: float = max_interval
+        self._interval: float = min_interval
+        self._scan: Optional[HierarchyScan] = None
+        if signature is not None:
+            self._scan = HierarchyScan.from_signature(signature)
+
+    @property
+    def root_dir(self) -> Path:
+        return self._root_dir
+
+    @property
+    def interval(self) -> float:
+        """
+        Amount of seconds to wait before the next poll.
+        """
+        return self._interval
+
+    def poll(self) -> HierarchyChanges:
+        """
+        Scan the hierarchy and compare it with the previous scan.
+
+        Without a signature given at creation, the first poll only record the state of
+        the hierarchy and never report changes.
+        """
+        start_time = time.perf_counter()
+        scan = HierarchyScan.from_directory(self._root_dir)
+        scan_time = time.perf_counter() - start_time
+
+        previous = self._scan
+        self._scan = scan
+        changes = compare_scans(previous, scan) if previous else HierarchyChanges()
+
+        if changes:
+            interval = self.min_interval
+        else:
+            interval = min(self._interval * self.backoff, self.max_interval)
+        self._interval = max(interval, scan_time * 20)
+        LOGGER.debug(
+            f"[{self.__class__.__name__}][poll] scanned {len(scan)} paths in "
+            f"{scan_time * 1000:.1f}ms, compared in "
+            f"{(time.perf_counter() - start_time - scan_time) * 1000:.1f}ms, "
+            f"next in {self._interval:.1f}s"
+        )
+        return changes
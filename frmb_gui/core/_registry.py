@@ -0,0 +1,596 @@
+"""
+Install a hierarchy in the Windows registry, only writing what changed since the
+last installation.
+
+Each enabled menu is installed as a ``shell`` key under the registry paths of its
+top-level menu::
+
+    {registry path}\\shell\\{menu}
+    {registry path}\\shell\\{menu}\\shell\\{child menu}
+    {registry path}\\shell\\{menu}\\shell\\{child menu}\\command
+
+The keys written for each menu are recorded in a :class:`InstallManifest` with the
+menu digest, so the next installation only rebuilds the menus whose digest changed
+and only touches the registry keys whose values are different.
+"""
+
+import abc
+import dataclasses
+import enum
+import hashlib
+import json
+import logging
+import os
+import time
+import types
+from pathlib import Path
+from typing import Mapping
+from typing import Optional
+from typing import Sequence
+
+import frmb_gui
+from ._digest import HierarchyDigest
+from ._hierarchy import FrmbHierarchy
+from ._hierarchy import FrmbNode
+from ._root import FrmbRoot
+from ._utils import slugify
+
+LOGGER = logging.getLogger(__name__)
+
+RegistryValues = Mapping[str, str]
+"""
+Values of a registry key as ``{value name: data}``, the default value name is "".
+"""
+
+
+class RegistryAction(enum.Enum):
+    create = "create"
+    update = "update"
+    delete = "delete"
+
+
+@dataclasses.dataclass(frozen=True)
+class RegistryOperation:
+    """
+    A single change to apply on a registry key.
+
+    The instance is immutable.
+    """
+
+    action: RegistryAction
+
+    key: str
+    """
+    Full path of the registry key, starting with the hive name.
+    """
+
+    values: RegistryValues = dataclasses.field(default_factory=dict)
+    """
+    All the values the key must have after the operation, empty for deletion.
+    """
+
+
+class RegistryBackend(abc.ABC):
+    """
+    Access to a registry-like storage of keys and their values.
+
+    Subclasses only implement the access to a single key; batching is handled by
+    :meth:`apply`.
+    """
+
+    @abc.abstractmethod
+    def get_values(self, key: str) -> Optional[dict[str, str]]:
+        """
+        Returns:
+            the values of the given key, None if it doesn't exist.
+        """
+        pass
+
+    @abc.abstractmethod
+    def set_values(self, key: str, values: RegistryValues):
+        """
+        Create the key if needed and make its values exactly the given ones.
+        """
+        pass
+
+    @abc.abstractmethod
+    def delete_key(self, key: str):
+        """
+        Delete the key if it exists. It must not have any subkey.
+        """
+        pass
+
+    def apply(self, operations: Sequence[RegistryOperation]):
+        """
+        Apply all the given operations, in order, or none of them.
+
+        If an operation fail, the operations already applied are reverted and the
+        error is raised.
+        """
+        previous = {
+            operation.key: self.get_values(operation.key) for operation in operations
+        }
+        applied: list[RegistryOperation] = []
+        try:
+            for operation in operations:
+                if operation.action is RegistryAction.delete:
+                    self.delete_key(operation.key)
+                else:
+                    self.set_values(operation.key, operation.values)
+                applied.append(operation)
+        except Exception:
+            LOGGER.error(
+                f"[{self.__class__.__name__}][apply] reverting {len(applied)} operations"
+            )
+            # deepest keys were deleted first, so restore them last
+            for operation in reversed(applied):
+                values = previous[operation.key]
+                if values is None:
+                    self.delete_key(operation.key)
+                else:
+                    self.set_values(operation.key, values)
+            raise
+
+
+class InMemoryRegistryBackend(RegistryBackend):
+    """
+    A registry stand-in storing the keys in memory, behaving like the Windows one.
+
+    Intended for testing and benchmarking on any platform.
+
+    Args:
+        keys: initial keys as ``{key: values}``.
+    """
+
+    def __init__(self, keys: Optional[Mapping[str, RegistryValues]] = None):
+        self.keys: dict[str, dict[str, str]] = {}
+        self._subkeys: dict[str, set[str]] = {}
+        for key, values in (keys or {}).items():
+            self.set_values(key, values)
+
+    def get_values(self, key: str) -> Optional[dict[str, str]]:
+        values = self.keys.get(key)
+        return None if values is None else dict(values)
+
+    def set_values(self, key: str, values: RegistryValues):
+        # like the Windows registry, missing parent keys are created
+        missing = []
+        parent = key
+        while parent and parent not in self.keys:
+            missing.append(parent)
+            parent = parent.rpartition("\\")[0]
+        for missing_key in reversed(missing):
+            self.keys[missing_key] = {}
+            parent = missing_key.rpartition("\\")[0]
+            if parent:
+                self._subkeys.setdefault(parent, set()).add(missing_key)
+
+        self.keys[key] = dict(values)
+
+    def delete_key(self, key: str):
+        if key not in self.keys:
+            return
+        if self._subkeys.get(key):
+            raise OSError(f"cannot delete registry key {key}: it has subkeys")
+        del self.keys[key]
+        self._subkeys.pop(key, None)
+        parent = key.rpartition("\\")[0]
+        if parent in self._subkeys:
+            self._subkeys[parent].discard(key)
+
+
+class FileRegistryBackend(InMemoryRegistryBackend):
+    """
+    A registry stand-in persisted as a json file, saved after each batch of operations.
+
+    Args:
+        path: filesystem path to a json file that may not exist yet.
+    """
+
+    def __init__(self, path: Path):
+        keys = None
+        if path.exists():
+            keys = json.loads(path.read_text("utf-8"))
+        super().__init__(keys)
+        self.path = path
+
+    def apply(self, operations: Sequence[RegistryOperation]):
+        super().apply(operations)
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(self.keys, indent=4, sort_keys=True), "utf-8")
+        os.replace(tmp_path, self.path)
+
+
+class WindowsRegistryBackend(RegistryBackend):
+    """
+    Access to the actual Windows registry. Values are stored as strings.
+    """
+
+    hive_aliases = {
+        "HKCR": "HKEY_CLASSES_ROOT",
+        "HKCU": "HKEY_CURRENT_USER",
+        "HKLM": "HKEY_LOCAL_MACHINE",
+        "HKU": "HKEY_USERS",
+    }
+
+    def _split_key(self, key: str) -> tuple[int, str]:
+        # XXX: only available on Windows
+        import winreg
+
+        hive_name, _, subkey = key.partition("\\")
+        hive_name = self.hive_aliases.get(hive_name, hive_name)
+        return getattr(winreg, hive_name), subkey
+
+    def get_values(self, key: str) -> Optional[dict[str, str]]:
+        import winreg
+
+        hive, subkey = self._split_key(key)
+        try:
+            handle = winreg.OpenKey(hive, subkey)
+        except FileNotFoundError:
+            return None
+        with handle:
+            value_count = winreg.QueryInfoKey(handle)[1]
+            values = {}
+            for index in range(value_count):
+                name, data, _ = winreg.EnumValue(handle, index)
+                values[name] = str(data)
+            return values
+
+    def set_values(self, key: str, values: RegistryValues):
+        import winreg
+
+        previous = self.get_values(key) or {}
+        hive, subkey = self._split_key(key)
+        with winreg.CreateKeyEx(hive, subkey, 0, winreg.KEY_ALL_ACCESS) as handle:
+            for name in set(previous).difference(values):
+                winreg.DeleteValue(handle, name)
+            for name, data in values.items():
+                if previous.get(name) != data:
+                    winreg.SetValueEx(handle, name, 0, winreg.REG_SZ, data)
+
+    def delete_key(self, key: str):
+        import winreg
+
+        hive, subkey = self._split_key(key)
+        try:
+            winreg.DeleteKey(hive, subkey)
+        except FileNotFoundError:
+            pass
+
+
+def get_registry_backend() -> RegistryBackend:
+    """
+    Get the registry of the current system.
+
+    On other systems than Windows, a file-backed stand-in stored in the user data
+    directory is returned, for development purposes.
+    """
+    if frmb_gui.osplatform.is_windows():
+        return WindowsRegistryBackend()
+    return FileRegistryBackend(frmb_gui.config.user_data_dir / "registry.json")
+
+
+def get_node_registry_keys(
+    node: FrmbNode,
+    parent_keys: Sequence[str],
+    has_children: bool,
+) -> dict[str, dict[str, str]]:
+    """
+    Get the registry keys that must be written to install the given menu.
+
+    Args:
+        node: the menu to install.
+        parent_keys:
+            keys of the parent menu, or the registry paths of the menu if top-level.
+        has_children: True if the menu has enabled children menus.
+
+    Returns:
+        ``{key: values}``, the first keys being the menu keys, one per parent key.
+    """
+    content = node.content
+    name = slugify(node.path.stem)
+    values = {"MUIVerb": content.name}
+    if content.icon:
+        values["Icon"] = str(content.icon)
+    if has_children:
+        values["subcommands"] = ""
+
+    menu_keys = [f"{parent_key}\\shell\\{name}" for parent_key in parent_keys]
+    keys = {key: dict(values) for key in menu_keys}
+    for menu_key in menu_keys:
+        if has_children:
+            keys[f"{menu_key}\\shell"] = {}
+        if content.command:
+            keys[f"{menu_key}\\command"] = {"": " ".join(content.command)}
+    return keys
+
+
+@dataclasses.dataclass(frozen=True)
+class InstalledNode:
+    """
+    What was written in the registry for a single menu.
+
+    The instance is immutable.
+    """
+
+    digest: str
+    """
+    Digest of the menu, including its children, when it was installed.
+    """
+
+    parent_keys: tuple[str, ...]
+    """
+    Keys the menu keys were created under.
+    """
+
+    keys: Mapping[str, RegistryValues]
+    """
+    All the keys written for the menu, excluding its children ones.
+    """
+
+
+@dataclasses.dataclass(frozen=True)
+class InstallManifest:
+    """
+    What was written in the registry for a whole hierarchy.
+
+    The instance is immutable.
+    """
+
+    digest: str
+    """
+    Digest of the whole hierarchy when it was installed.
+    """
+
+    nodes: Mapping[str, InstalledNode]
+    """
+    Installed menus as ``{path relative to the root directory: installed node}``.
+    """
+
+    @classmethod
+    def from_file(cls, path: Path):
+        """
+        Retrieve an instance from a serialized file on disk.
+        """
+        content = json.loads(path.read_text("utf-8"))
+        nodes = {
+            name: InstalledNode(
+                digest=node["digest"],
+                parent_keys=tuple(node["parent_keys"]),
+                keys=node["keys"],
+            )
+            for name, node in content["nodes"].items()
+        }
+        return cls(digest=content["digest"], nodes=types.MappingProxyType(nodes))
+
+    def to_file(self, path: Path):
+        """
+        Serialize this instance to disk, overwriting any existing file.
+        """
+        content = {
+            "digest": self.digest,
+            "nodes": {
+                name: {
+                    "digest": node.digest,
+                    "parent_keys": list(node.parent_keys),
+                    "keys": dict(node.keys),
+                }
+                for name, node in self.nodes.items()
+            },
+        }
+        path.parent.mkdir(parents=True, exist_ok=True)
+        # write then rename so an interrupted write never lose the manifest
+        tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+        tmp_path.write_text(json.dumps(content), "utf-8")
+        os.replace(tmp_path, path)
+
+    def get_keys(self) -> dict[str, RegistryValues]:
+        """
+        Get all the keys written in the registry.
+        """
+        keys = {}
+        for node in self.nodes.values():
+            keys.update(node.keys)
+        return keys
+
+
+def get_manifest_path(root_dir: Path) -> Path:
+    """
+    Get the default location of the install manifest of the given root, in the
+    user data directory.
+
+    Args:
+        root_dir: filesystem path to the root directory of a hierarchy.
+
+    Returns:
+        filesystem path to a file that may not exist.
+    """
+    root_id = hashlib.sha1(str(root_dir.absolute()).encode("utf-8")).hexdigest()
+    name = f"{slugify(root_dir.name)}-{root_id[:12]}.json"
+    return frmb_gui.config.user_data_dir / "installs" / name
+
+
+def _get_key_depth(key: str) -> int:
+    return key.count("\\")
+
+
+def plan_install(
+    hierarchy: FrmbHierarchy,
+    digest: HierarchyDigest,
+    manifest: Optional[InstallManifest] = None,
+) -> tuple[list[RegistryOperation], InstallManifest]:
+    """
+    Compute the registry operations needed to go from the installed manifest to the
+    given hierarchy.
+
+    Menus whose digest and parent keys didn't change since the manifest are not
+    processed at all, with their children.
+
+    Args:
+        hierarchy: snapshot of the hierarchy to install.
+        digest: digest of the same hierarchy, to compare with the manifest.
+        manifest: what is currently installed, None if nothing is.
+
+    Returns:
+        the operations, ordered so they can be applied in sequence, and the manifest
+        describing the registry once they are applied.
+    """
+    root_dir = hierarchy.root_dir
+    previous_nodes = manifest.nodes if manifest else {}
+    nodes: dict[str, InstalledNode] = {}
+    rebuilt: list[str] = []
+
+    stack = [
+        (node, tuple(dict.fromkeys(node.content.paths)))
+        for node in hierarchy.get_children(None)
+    ]
+    while stack:
+        node, parent_keys = stack.pop()
+        name = node.path.relative_to(root_dir).as_posix()
+        node_digest = digest.nodes.get(node.path, "")
+        previous = previous_nodes.get(name)
+
+        if (
+            previous is not None
+            and previous.digest == node_digest
+            and previous.parent_keys == parent_keys
+        ):
+            # the digest include the children so the whole branch is unchanged
+            branch = [node]
+            while branch:
+                branch_node = branch.pop()
+                branch_name = branch_node.path.relative_to(root_dir).as_posix()
+                if branch_name in previous_nodes:
+                    nodes[branch_name] = previous_nodes[branch_name]
+                    branch.extend(hierarchy.get_children(branch_node.path))
+            continue
+
+        if not node.content.enabled:
+            continue
+
+        children = [
+            child
+            for child in hierarchy.get_children(node.path)
+            if child.content.enabled
+        ]
+        keys = get_node_registry_keys(node, parent_keys, has_children=bool(children))
+        nodes[name] = InstalledNode(
+            digest=node_digest,
+            parent_keys=parent_keys,
+            keys=types.MappingProxyType(keys),
+        )
+        rebuilt.append(name)
+
+        menu_keys = tuple(keys)[: len(parent_keys)]
+        stack.extend((child, menu_keys) for child in children)
+
+    # only compare the keys of the menus that could have changed
+    old_keys: dict[str, RegistryValues] = {}
+    new_keys: dict[str, RegistryValues] = {}
+    for name in rebuilt:
+        new_keys.update(nodes[name].keys)
+        if name in previous_nodes:
+            old_keys.update(previous_nodes[name].keys)
+    for name in set(previous_nodes).difference(nodes):
+        old_keys.update(previous_nodes[name].keys)
+
+    deleted = [key for key in old_keys if key not in new_keys]
+    written = [
+        key for key in new_keys if key not in old_keys or old_keys[key] != new_keys[key]
+    ]
+    # subkeys are deleted before their parent, parents are created before subkeys
+    operations = [
+        RegistryOperation(RegistryAction.delete, key)
+        for key in sorted(deleted, key=_get_key_depth, reverse=True)
+    ]
+    operations += [
+        RegistryOperation(
+            RegistryAction.update if key in old_keys else RegistryAction.create,
+            key,
+            new_keys[key],
+        )
+        for key in sorted(written, key=_get_key_depth)
+    ]
+
+    LOGGER.debug(
+        f"[plan_install] rebuilt {len(rebuilt)}/{len(nodes)} menus: "
+        f"{len(operations)} operations"
+    )
+    new_manifest = InstallManifest(
+        digest=digest.digest,
+        nodes=types.MappingProxyType(nodes),
+    )
+    return operations, new_manifest
+
+
+class RegistryInstaller:
+    """
+    Install the hierarchy of roots in a registry, incrementally.
+
+    Args:
+        backend: registry to install the menus in.
+        manifest_path:
+            filesystem path to the json file storing what was installed. Must be
+            unique per root and per registry.
+    """
+
+    def __init__(self, backend: RegistryBackend, manifest_path: Path):
+        self.backend = backend
+        self.manifest_path = manifest_path
+
+    def read_manifest(self) -> Optional[InstallManifest]:
+        """
+        Returns:
+            what is currently installed, None if nothing or if the manifest is invalid.
+        """
+        if not self.manifest_path.exists():
+            return None
+        try:
+            return InstallManifest.from_file(self.manifest_path)
+        except (OSError, ValueError, KeyError) as error:
+            LOGGER.warning(f"cannot read manifest {self.manifest_path}: {error!r}")
+            return None
+
+    def install(self, root: FrmbRoot, dry_run: bool = False) -> list[RegistryOperation]:
+        """
+        Write in the registry what changed in the hierarchy since its last installation.
+
+        All the operations are applied as a single batch. The root file, if any,
+        is updated with the new installed hash.
+
+        Args:
+            root: root whose hierarchy must be installed.
+            dry_run: True to only compute the operations without applying them.
+
+        Returns:
+            the operations applied, empty if nothing changed.
+        """
+        prefix = f"[{self.__class__.__name__}][install]"
+        digest = root.get_content_digest()
+        manifest = self.read_manifest()
+        if manifest is not None and manifest.digest == digest.digest:
+            LOGGER.debug(f"{prefix} {root} is unchanged since its last installation")
+            return []
+
+        operations, new_manifest = plan_install(root.hierarchy, digest, manifest)
+        if dry_run:
+            return operations
+
+        start_time = time.perf_counter()
+        self.backend.apply(operations)
+        new_manifest.to_file(self.manifest_path)
+        duration = time.perf_counter() - start_time
+        LOGGER.info(
+            f"{prefix} applied {len(operations)} registry operations for {root} in "
+            f"{duration * 1000:.1f}ms"
+        )
+
+        root_file = root.root_file
+        if root_file is not None:
+            root_file = dataclasses.replace(
+                root_file, last_installed_hash=digest.digest
+            )
+            root_file.to_file(root.root_file_path)
+        return operations
@@ -2,10 +2,27 @@ import dataclasses
 import json
 import logging
 import shutil
+import sqlite3
+import threading
+import time
+import uuid
 from pathlib import Path
+from typing import ClassVar
+from typing import Iterable
+from typing import Optional
 
 import frmb
 
+from ._digest import HierarchyDigest
+from ._digest import HierarchyDigester
+from ._hierarchy import FrmbHierarchy
+from ._hierarchy import ProgressCallbackType
+from ._hierarchy import get_hierarchy_signature
+from ._hierarchy import patch_hierarchy
+from ._index import HierarchyIndex
+from ._loader import get_loading_workers
+from ._loader import load_hierarchy
+
 LOGGER = logging.getLogger(__name__)
 
 
@@ -27,9 +44,12 @@ class FrmbRootFile:
     Unique identifier that allow to distinguish 2 roots, even if they have the same content.
     """
 
-    last_installed_hash: int
+    last_installed_hash: str
     """
     An hash of the content of the hierarchy the last time it was installed in the registry.
+
+    As returned by :meth:`FrmbRoot.get_content_hash`, so it can be compared across
+    processes.
     """
 
     @classmethod
@@ -62,10 +82,43 @@ class FrmbRoot:
     """
     Represent a directory storing a hierachy of Frmb file that correspond to one or
     more context-menu that must be installed together.
+
+    The hierarchy is read once and cached as an immutable snapshot, that is only rebuilt
+    when a change is detected on disk, or when explicitly asked with :meth:`refresh`.
+
+    When an index path is provided, each new snapshot is also persisted on disk so
+    a later process can display it immediately with :meth:`get_cached_hierarchy`,
+    then only read the files that changed since.
+
+    Accessing the hierarchy is thread-safe.
+
+    Args:
+        path: filesystem path to the root directory.
+        index_path: optional filesystem path to a :class:`HierarchyIndex` database.
+    """
+
+    stale_check_interval: ClassVar[float] = 1.0
+    """
+    Minimum amount of seconds between 2 checks of the filesystem for changes.
     """
 
-    def __init__(self, path: Path):
+    root_file_name: ClassVar[str] = ".frmbroot"
+    """
+    Name of the file storing the :class:`FrmbRootFile`, at the root of the directory.
+    """
+
+    def __init__(self, path: Path, index_path: Optional[Path] = None):
         self._path = path
+        self._index: HierarchyIndex | None = None
+        if index_path:
+            self._index = HierarchyIndex(index_path)
+        # snapshot last read from or written to the index
+        self._indexed: FrmbHierarchy | None = None
+        self._hierarchy: FrmbHierarchy | None = None
+        self._hierarchy_version: int = 0
+        self._last_stale_check: float = 0.0
+        self._digester = HierarchyDigester()
+        self._lock = threading.RLock()
 
     def __str__(self) -> str:
         return f"<{self.__class__.__name__} path={self._path}>"
@@ -85,19 +138,245 @@ class FrmbRoot:
         """
         return self._path
 
+    @property
+    def root_file_path(self) -> Path:
+        """
+        Filesystem path to the root file, that may not exist.
+        """
+        return self._path / self.root_file_name
+
+    @property
+    def root_file(self) -> Optional[FrmbRootFile]:
+        """
+        The file describing the root, None if the directory doesn't have one.
+        """
+        if not self.root_file_path.exists():
+            return None
+        return FrmbRootFile.from_file(self.root_file_path)
+
+    def create_root_file(self, name: str) -> FrmbRootFile:
+        """
+        Write a new root file in the directory, overwriting any existing one.
+
+        Args:
+            name: pretty name for the root, used in the GUI.
+        """
+        root_file = FrmbRootFile(
+            name=name,
+            uuid=str(uuid.uuid4()),
+            last_installed_hash="",
+        )
+        self._path.mkdir(parents=True, exist_ok=True)
+        root_file.to_file(self.root_file_path)
+        return root_file
+
+    @property
+    def hierarchy(self) -> FrmbHierarchy:
+        """
+        Snapshot of the whole hierarchy, rebuilt only if it changed on disk since
+        the last time it was read.
+        """
+        return self.get_hierarchy()
+
     @property
     def children(self) -> list[frmb.FrmbFile]:
         """
         The Frmb files directly at root, used to parse the hierarchy.
         """
-        return frmb.read_menu_hierarchy_as_file(self._path)
+        return [node.file for node in self.hierarchy.get_children()]
+
+    def get_hierarchy(
+        self,
+        refresh: bool = False,
+        progress_callback: Optional[ProgressCallbackType] = None,
+        cancel_event: Optional[threading.Event] = None,
+    ) -> FrmbHierarchy:
+        """
+        Get the snapshot of the whole hierarchy, rebuilding it if it changed on disk.
+
+        Args:
+            refresh: True to rebuild the snapshot even if nothing changed.
+            progress_callback: called after each file is read, if rebuilding.
+            cancel_event: set from another thread to interrupt the rebuilding.
+        """
+        with self._lock:
+            if (
+                refresh
+                or self._hierarchy is None
+                or self.is_stale(cancel_event=cancel_event)
+            ):
+                return self.refresh(
+                    progress_callback=progress_callback,
+                    cancel_event=cancel_event,
+                    incremental=not refresh,
+                )
+            return self._hierarchy
+
+    def get_cached_hierarchy(self) -> Optional[FrmbHierarchy]:
+        """
+        Get the last known snapshot of the hierarchy without reading any frmb file.
+
+        The snapshot is restored from the index if not in memory yet. It may be
+        outdated: the next call to :meth:`get_hierarchy` checks it against the
+        filesystem.
+
+        Returns:
+            None if the hierarchy was never read.
+        """
+        with self._lock:
+            if self._hierarchy is not None or self._index is None:
+                return self._hierarchy
+
+            hierarchy = self._index.read(self._path)
+            if hierarchy is None:
+                return None
+
+            LOGGER.debug(
+                f"[{self.__class__.__name__}][get_cached_hierarchy] restored "
+                f"{len(hierarchy)} files from {self._index.path}"
+            )
+            self._indexed = hierarchy
+            self._hierarchy = hierarchy
+            self._hierarchy_version = max(self._hierarchy_version, hierarchy.version)
+            # force the next access to compare it with the filesystem
+            self._last_stale_check = float("-inf")
+            return hierarchy
+
+    def is_stale(self, cancel_event: Optional[threading.Event] = None) -> bool:
+        """
+        Return True if the filesystem changed since the hierarchy was last read.
+
+        To keep this cheap, the filesystem is only checked every
+        :attr:`stale_check_interval` seconds; in-between the hierarchy is assumed
+        up-to-date.
+
+        Args:
+            cancel_event:
+                set from another thread to interrupt the check, in which case
+                :exc:`HierarchyLoadCancelled` is raised.
+        """
+        with self._lock:
+            if self._hierarchy is None:
+                return True
+
+            now = time.monotonic()
+            if now - self._last_stale_check < self.stale_check_interval:
+                return False
+            self._last_stale_check = now
+
+            signature = get_hierarchy_signature(self._path, cancel_event=cancel_event)
+            return signature != self._hierarchy.signature
+
+    def invalidate(self):
+        """
+        Discard the cached hierarchy so it is read again from disk on next access.
+        """
+        with self._lock:
+            self._hierarchy = None
+
+    def refresh(
+        self,
+        progress_callback: Optional[ProgressCallbackType] = None,
+        cancel_event: Optional[threading.Event] = None,
+        incremental: bool = False,
+    ) -> FrmbHierarchy:
+        """
+        Read again the hierarchy from disk, regardless of it having changed or not.
+
+        Args:
+            progress_callback: called after each file is read.
+            cancel_event:
+                set from another thread to interrupt the reading, in which case
+                :exc:`HierarchyLoadCancelled` is raised and the previous snapshot kept.
+            incremental:
+                True to only read the files whose stat signature changed since the
+                current snapshot, False to read every file again.
 
-    def get_content_hash(self) -> int:
+        Returns:
+            the new hierarchy snapshot
+        """
+        with self._lock:
+            hierarchy = load_hierarchy(
+                self._path,
+                version=self._hierarchy_version + 1,
+                max_workers=get_loading_workers(),
+                progress_callback=progress_callback,
+                cancel_event=cancel_event,
+                previous=self._hierarchy if incremental else None,
+            )
+            self._hierarchy_version = hierarchy.version
+            self._hierarchy = hierarchy
+            self._last_stale_check = time.monotonic()
+            LOGGER.debug(
+                f"[{self.__class__.__name__}][refresh] read {len(hierarchy)} files "
+                f"from {self._path} (version {hierarchy.version})"
+            )
+            if self._index is not None:
+                self._write_index(hierarchy)
+            return hierarchy
+
+    def patch(self, changed_paths: Iterable[Path]) -> tuple[FrmbHierarchy, set[Path]]:
+        """
+        Update the snapshot by only reading again the parts of the hierarchy affected
+        by the given paths, as reported by a filesystem watcher.
+
+        This is intended to be fast enough to be called from the GUI thread, so the
+        index is not written: the next :meth:`refresh` takes care of it.
+
+        Args:
+            changed_paths: filesystem paths of the directories and frmb files that changed.
+
+        Returns:
+            the new snapshot and the path of the parents whose children changed,
+            as returned by :func:`patch_hierarchy`.
+        """
+        with self._lock:
+            if self._hierarchy is None:
+                return self.refresh(), {self._path}
+
+            hierarchy, changed_parents = patch_hierarchy(
+                self._hierarchy,
+                changed_paths,
+                version=self._hierarchy_version + 1,
+            )
+            self._hierarchy_version = hierarchy.version
+            self._hierarchy = hierarchy
+            LOGGER.debug(
+                f"[{self.__class__.__name__}][patch] updated {len(changed_parents)} "
+                f"parents of {self._path} (version {hierarchy.version})"
+            )
+            return hierarchy, changed_parents
+
+    def _write_index(self, hierarchy: FrmbHierarchy):
+        try:
+            self._index.write(hierarchy, previous=self._indexed)
+        except (OSError, sqlite3.Error) as error:
+            LOGGER.warning(f"cannot write index {self._index.path}: {error}")
+            self._indexed = None
+            return
+        self._indexed = hierarchy
+
+    def get_content_digest(self) -> HierarchyDigest:
+        """
+        Get the digest of the whole hierarchy, with the digest of each of its node.
+
+        Only the files that changed since the last call are read and hashed again.
+        The stat signature of the current snapshot is reused if it is up-to-date.
+        """
+        with self._lock:
+            signature = None
+            if self._hierarchy is not None and not self.is_stale():
+                signature = self._hierarchy.signature
+            return self._digester.digest(self._path, signature=signature)
+
+    def get_content_hash(self) -> str:
         """
         Get a hash of the whole hierarchy allowing to compare if 2 hierachies produce
         the same result.
+
+        The hash is deterministic and can be persisted and compared across processes.
         """
-        return hash(tuple(self.children))
+        return self.get_content_digest().digest
 
 
 def delete_root_from_disk(root: FrmbRoot):
@@ -0,0 +1,79 @@
+"""
+Detect the issues of a hierarchy that would produce a broken context-menu.
+"""
+
+import dataclasses
+import logging
+from pathlib import Path
+
+from ._hierarchy import FRMB_SUFFIX
+from ._hierarchy import get_children_dir
+from ._hierarchy import get_hierarchy_signature
+from ._hierarchy import read_node
+
+LOGGER = logging.getLogger(__name__)
+
+
+@dataclasses.dataclass(frozen=True)
+class HierarchyIssue:
+    """
+    A problem found on a file of the hierarchy.
+
+    The instance is immutable.
+    """
+
+    path: Path
+    """
+    Filesystem path to the file or directory having the issue.
+    """
+
+    message: str
+    """
+    Human readable description of the issue.
+    """
+
+    is_error: bool = True
+    """
+    True if the menu cannot be installed, False if it can but might not work as expected.
+    """
+
+
+def validate_hierarchy(root_dir: Path) -> list[HierarchyIssue]:
+    """
+    Read every frmb file of the hierarchy and report the ones that are invalid.
+
+    Args:
+        root_dir: filesystem path to the root directory of the hierarchy.
+
+    Returns:
+        issues sorted by path, empty if the hierarchy is valid.
+    """
+    if not root_dir.is_dir():
+        return [HierarchyIssue(root_dir, "root directory doesn't exist")]
+
+    issues: list[HierarchyIssue] = []
+    signature = get_hierarchy_signature(root_dir)
+    for path, stat in signature.items():
+        if path == root_dir or path.suffix != FRMB_SUFFIX:
+            continue
+
+        has_children = get_children_dir(path) in signature
+        try:
+            node = read_node(path, root_dir, stat=stat, has_children=has_children)
+        except Exception as error:
+            LOGGER.debug(f"[validate_hierarchy] cannot read {path}: {error!r}")
+            issues.append(HierarchyIssue(path, f"cannot be read: {error!r}"))
+            continue
+
+        content = node.content
+        if not content.name:
+            issues.append(HierarchyIssue(path, "name is empty"))
+        if not content.command and not has_children:
+            issues.append(HierarchyIssue(path, "has no command and no children menu"))
+        if node.at_root() and not content.paths:
+            issues.append(HierarchyIssue(path, "top-level menu has no registry path"))
+        if content.icon and not content.icon.exists():
+            message = f"icon {content.icon} doesn't exist"
+            issues.append(HierarchyIssue(path, message, is_error=False))
+
+    return sorted(issues, key=lambda issue: issue.path)
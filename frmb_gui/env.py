@@ -38,6 +38,17 @@ dependencies_list = EnvironmentVariable(f"{ENVPREFIX}_DEPENDENCIES")
 static list of python dependencies used for when the app is frozen.
 """
 
+loading_workers = EnvironmentVariable(f"{ENVPREFIX}_LOADING_WORKERS")
+"""
+Amount of threads used to read a hierarchy from disk. 0 to read sequentially.
+"""
+
+watch_polling = EnvironmentVariable(f"{ENVPREFIX}_WATCH_POLLING")
+"""
+1 to detect the changes of a root by periodically scanning it, 0 to rely on filesystem
+notifications. By default only the roots on network shares are scanned.
+"""
+
 build_id = EnvironmentVariable(f"{ENVPREFIX}_BUILD_ID")
 """
 Set during build by pyinstaller.
@@ -52,6 +63,8 @@ def get_all_variables() -> list["EnvironmentVariable"]:
         debug,
         platform_fake,
         dependencies_list,
+        loading_workers,
+        watch_polling,
         build_id,
     ]
 
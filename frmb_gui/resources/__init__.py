@@ -1,6 +1,23 @@
+from typing import TYPE_CHECKING
+
+from frmb_gui._lazy import get_lazy_attributes
 from .browser import ROOT
 from .browser import get_icon_path
 from .browser import get_style_path
 from .browser import get_stylesheet_path
 from .browser import get_font_family_path
-from ._style import UiStyle
+
+# the style requires Qt and jinja
+__getattr__, __dir__ = get_lazy_attributes(
+    __name__,
+    {
+        "APPLICATION_SCOPE": "._style",
+        "UiStyle": "._style",
+        "split_stylesheet": "._style",
+    },
+)
+
+if TYPE_CHECKING:
+    from ._style import APPLICATION_SCOPE
+    from ._style import UiStyle
+    from ._style import split_stylesheet
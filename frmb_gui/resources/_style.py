@@ -2,19 +2,57 @@ import dataclasses
 import json
 import logging
 import os
+import re
 from pathlib import Path
 from typing import ClassVar
+from typing import Optional
 
-import jinja2
 from qtpy import QtCore
 from qtpy import QtGui
 from qtpy import QtWidgets
 
 import frmb_gui
-from ._jinja import JINJA_ENV
+from ._stylecache import StylesheetCache
+from ._stylecache import get_stylesheet_cache
 
 LOGGER = logging.getLogger(__name__)
 
+APPLICATION_SCOPE = "application"
+"""
+Name of the stylesheet section applied on the whole application.
+"""
+
+_SCOPE_REGEX = re.compile(r"^/\*\s*@scope\s+(\w+)\s*\*/[ \t]*(?:\n|$)", re.MULTILINE)
+
+
+def split_stylesheet(stylesheet: str) -> dict[str, str]:
+    """
+    Split a stylesheet into the sections declared with ``/* @scope <name> */`` comments.
+
+    Everything until the first scope comment belong to the :obj:`APPLICATION_SCOPE`.
+    A scope can be declared multiple times, its sections are concatenated.
+
+    Example::
+
+        QLabel { color: white; }
+        /* @scope HierarchyBrowserWidget */
+        QFrame.HierarchyBrowserWidget { padding: 5px; }
+        /* @scope application */
+        QMenu { padding: 5px; }
+
+    Returns:
+        mapping of ``{scope name: stylesheet}``, in order of declaration
+    """
+    sections: dict[str, list[str]] = {APPLICATION_SCOPE: []}
+    scope = APPLICATION_SCOPE
+    position = 0
+    for match in _SCOPE_REGEX.finditer(stylesheet):
+        sections.setdefault(scope, []).append(stylesheet[position : match.start()])
+        scope = match.group(1)
+        position = match.end()
+    sections.setdefault(scope, []).append(stylesheet[position:])
+    return {scope: "".join(parts).strip("\n") for scope, parts in sections.items()}
+
 
 @dataclasses.dataclass(frozen=True)
 class UiStyle:
@@ -41,9 +79,16 @@ class UiStyle:
     A style can be retrieved just using its name.
     """
 
-    _FONT_FAMILIES_LOADED: ClassVar[list[str]] = []
+    _FONT_IDS: ClassVar[dict[Path, int]] = {}
+    """
+    Id of the font files registered through all the class instances, as ``{path: id}``.
+
+    -1 for the files that could not be registered.
+    """
+
+    _FONT_FILES: ClassVar[dict[str, list[Path]]] = {}
     """
-    Keep track of the families that were loaded through all the class instances.
+    Font files found on disk for each family name.
     """
 
     def __str__(self) -> str:
@@ -82,59 +127,96 @@ class UiStyle:
         """
         return QtGui.QIcon(str(self.get_icon_path(name)))
 
-    def load_font_family(self, family_name: str) -> list[int]:
+    def get_font_styles(self, family_name: str) -> Optional[list[str]]:
         """
-        Register the given font family stored on disk to be accesible in the Qt application.
-
-        Args:
-            family_name: name of the directory containing all the styles of a family.
+        Get the styles of the given font family used by the style, like ``Regular``.
 
         Returns:
-            ids of the font loaded
+            None if the style doesn't specify them, meaning all of them are used.
         """
-        LOGGER.debug(f"loading font family {family_name} ...")
+        return self.content["text"].get("family_styles", {}).get(family_name)
 
-        # this might be the name of a system builtin font
-        if QtGui.QFontDatabase.hasFamily(family_name):
-            return []
+    def get_font_files(self, family_name: str) -> list[Path]:
+        """
+        Get all the font files of the given family stored on disk.
 
-        if family_name in self._FONT_FAMILIES_LOADED:
-            LOGGER.debug(f"font family {family_name} already loaded")
-            return []
+        The directory is only listed once per process.
 
-        family_path = frmb_gui.resources.get_font_family_path(family_name)
-        font_ids = []
+        Args:
+            family_name: name of the directory containing all the styles of a family.
+        """
+        font_files = self._FONT_FILES.get(family_name)
+        if font_files is not None:
+            return font_files
 
+        family_path = frmb_gui.resources.get_font_family_path(family_name)
         if not family_path.exists():
             raise FileNotFoundError(
                 f"Given family name <{family_name}> was not found on disk."
             )
 
-        for file_path in family_path.glob("*"):
-            if file_path.suffix not in [".ttf", ".otf"]:
-                continue
+        font_files = sorted(
+            file_path
+            for file_path in family_path.glob("*")
+            if file_path.suffix in [".ttf", ".otf"]
+        )
+        self._FONT_FILES[family_name] = font_files
+        return font_files
 
-            font_id = QtGui.QFontDatabase.addApplicationFont(str(file_path))
+    def load_font_file(self, file_path: Path) -> int:
+        """
+        Register the given font file to be accesible in the Qt application.
 
-            if font_id == -1:
-                LOGGER.warning(f"cannot load font {file_path}")
-                continue
+        A file is only registered once per process.
+
+        Returns:
+            id of the font or -1 if it cannot be loaded.
+        """
+        font_id = self._FONT_IDS.get(file_path)
+        if font_id is not None:
+            return font_id
+
+        font_id = QtGui.QFontDatabase.addApplicationFont(str(file_path))
+        if font_id == -1:
+            LOGGER.warning(f"cannot load font {file_path}")
+        self._FONT_IDS[file_path] = font_id
+        return font_id
+
+    def load_font_family(
+        self,
+        family_name: str,
+        styles: Optional[list[str]] = None,
+    ) -> list[int]:
+        """
+        Register the given font family stored on disk to be accesible in the Qt application.
 
-            font_ids.append(font_id)
+        Args:
+            family_name: name of the directory containing all the styles of a family.
+            styles:
+                name of the styles to register, like ``Bold``, as found at the end of
+                the font file names. None to register all of them.
 
-        if font_ids:
-            self._FONT_FAMILIES_LOADED.append(family_name)
+        Returns:
+            ids of the font loaded
+        """
+        LOGGER.debug(f"loading font family {family_name} ({styles or 'all'}) ...")
 
-        loaded_font_names: set[str] = {
-            _family_name
-            for _font_id in font_ids
-            for _family_name in QtGui.QFontDatabase.applicationFontFamilies(_font_id)
-        }
-        # XXX: without this trick fonts looks aliased
-        for loaded_font_name in loaded_font_names:
-            font = QtGui.QFont(loaded_font_name)
-            font.setHintingPreference(font.HintingPreference.PreferNoHinting)
-            QtWidgets.QApplication.setFont(font)
+        if family_name not in self._FONT_FILES:
+            # this might be the name of a system builtin font
+            if QtGui.QFontDatabase.hasFamily(family_name):
+                return []
+            # like a Windows font on another system, the fallback family is used
+            if not frmb_gui.resources.get_font_family_path(family_name).exists():
+                LOGGER.warning(f"font family {family_name} not found, skipping")
+                return []
+
+        font_ids = []
+        for file_path in self.get_font_files(family_name):
+            if styles is not None and file_path.stem.split("-")[-1] not in styles:
+                continue
+            font_id = self.load_font_file(file_path)
+            if font_id != -1:
+                font_ids.append(font_id)
 
         return font_ids
 
@@ -142,15 +224,48 @@ class UiStyle:
         """
         Ensure all the families defined in this style are loaded for use.
 
+        Only the font styles used by the style are registered, see
+        :meth:`get_unloaded_font_files` for the others.
+
         Returns:
             dict of {"font families name": "list of font ids"}
         """
         loaded: dict[str, list[int]] = {}
         for family_name in self.get_font_families():
-            loaded[family_name] = self.load_font_family(family_name)
+            styles = self.get_font_styles(family_name)
+            loaded[family_name] = self.load_font_family(family_name, styles=styles)
+
+        # XXX: without this trick fonts looks aliased
+        families = self.content["text"]["family"]
+        font = QtGui.QFont()
+        font.setFamilies([families["default"], families["default_fallback"]])
+        font.setHintingPreference(font.HintingPreference.PreferNoHinting)
+        QtWidgets.QApplication.setFont(font)
+
         return loaded
 
-    def resolve_stylesheet(self, stylesheet: str) -> str:
+    def get_unloaded_font_files(self) -> list[Path]:
+        """
+        Get the font files of the families used by the style, that are not registered.
+
+        Those are not needed to display the application but can still be requested
+        in rich text.
+        """
+        font_files = []
+        for family_name in sorted(self.get_font_families()):
+            if family_name not in self._FONT_FILES:
+                # builtin system font
+                continue
+            for file_path in self.get_font_files(family_name):
+                if file_path not in self._FONT_IDS:
+                    font_files.append(file_path)
+        return font_files
+
+    def resolve_stylesheet(
+        self,
+        stylesheet: str,
+        cache: Optional[StylesheetCache] = None,
+    ) -> str:
         """
         Produce a valid stylesheet with all variables resolved.
 
@@ -159,8 +274,10 @@ class UiStyle:
 
         Args:
             stylesheet: document with potential jinja2 variables
+            cache: where the compiled template is cached, the application one if None.
         """
-        template = JINJA_ENV.from_string(stylesheet)
+        cache = cache or get_stylesheet_cache()
+        template = cache.get_template(stylesheet)
         content = self.content.copy()
         # resolve icon paths
         content["icon"] = {
@@ -172,21 +289,40 @@ class UiStyle:
         resolved = template.render(content)
         return resolved
 
-    def get_stylesheet(self, name: str) -> str:
+    def get_stylesheet(
+        self,
+        name: str,
+        cache: Optional[StylesheetCache] = None,
+    ) -> str:
         """
         Args:
             name: file name of the stylesheet WITHOUT the file extension
+            cache:
+                where the resolved stylesheet is cached, the application one if None.
 
         Returns:
             content of the stylesheet resolved with given style
         """
+        cache = cache or get_stylesheet_cache()
         path = frmb_gui.resources.get_stylesheet_path(name)
         content = path.read_text("utf-8")
+
+        cache_name = f"{name}-{self.name}"
+        cache_key = cache.get_key(content, self.content)
+        stylesheet = cache.read(cache_name, cache_key)
+        if stylesheet is not None:
+            LOGGER.debug(f"using cached stylesheet <{name}> with style={self!s}")
+            return stylesheet
+
+        import jinja2
+
         LOGGER.debug(f"resolving stylesheet <{name}> with style={self!s}")
         try:
-            return self.resolve_stylesheet(content)
+            stylesheet = self.resolve_stylesheet(content, cache=cache)
         except jinja2.exceptions.UndefinedError as error:
             raise ValueError(
                 f"stylesheet template {path} did not resolved fully using "
                 f"style <{self!s}>: {error}"
             )
+        cache.write(cache_name, cache_key, stylesheet)
+        return stylesheet
@@ -0,0 +1,138 @@
+"""
+Cache the stylesheets resolved from their jinja template, in memory and on disk.
+"""
+
+import hashlib
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Optional
+from typing import TYPE_CHECKING
+
+import frmb_gui
+from . import browser
+
+if TYPE_CHECKING:
+    import jinja2
+
+LOGGER = logging.getLogger(__name__)
+
+
+class StylesheetCache:
+    """
+    A two-level cache for stylesheets.
+
+    - compiled jinja templates are kept in memory for the life of the process.
+    - resolved stylesheets are persisted on disk, so jinja doesn't even need to be
+      imported when nothing changed since the last run.
+
+    Resolved stylesheets are identified by a digest of everything that can change
+    their content: the template, the style, the resources location and the
+    application version.
+
+    Args:
+        directory: filesystem path to a directory that may not exist yet.
+    """
+
+    def __init__(self, directory: Path):
+        self._directory = directory
+        self._templates: dict[str, "jinja2.Template"] = {}
+
+    @property
+    def directory(self) -> Path:
+        return self._directory
+
+    def get_template(self, source: str) -> "jinja2.Template":
+        """
+        Get the compiled jinja template for the given source, compiling it if new.
+        """
+        key = hashlib.sha256(source.encode("utf-8")).hexdigest()
+        template = self._templates.get(key)
+        if template is None:
+            from ._jinja import JINJA_ENV
+
+            template = JINJA_ENV.from_string(source)
+            self._templates[key] = template
+        return template
+
+    @staticmethod
+    def get_key(source: str, style_content: dict) -> str:
+        """
+        Get the digest identifying the stylesheet resolved from the given template
+        and style.
+
+        Args:
+            source: content of the jinja template.
+            style_content: content of the style used to resolve the template.
+        """
+        hasher = hashlib.sha256()
+        for part in [
+            source,
+            json.dumps(style_content, sort_keys=True),
+            str(browser.ROOT),
+            frmb_gui.__version__,
+        ]:
+            hasher.update(part.encode("utf-8"))
+            hasher.update(b"\0")
+        return hasher.hexdigest()
+
+    def get_path(self, name: str, key: str) -> Path:
+        """
+        Get the file storing the resolved stylesheet with the given name and key.
+        """
+        return self._directory / f"{name}-{key[:16]}.qss"
+
+    def read(self, name: str, key: str) -> Optional[str]:
+        """
+        Get the resolved stylesheet persisted on disk.
+
+        Args:
+            name: identifier of the stylesheet, only used to organise the files.
+            key: as returned by :meth:`get_key`.
+
+        Returns:
+            None if not persisted.
+        """
+        path = self.get_path(name, key)
+        try:
+            return path.read_text("utf-8")
+        except FileNotFoundError:
+            return None
+        except OSError as error:
+            LOGGER.warning(f"cannot read cached stylesheet {path}: {error}")
+            return None
+
+    def write(self, name: str, key: str, stylesheet: str):
+        """
+        Persist the resolved stylesheet on disk, discarding the previous ones with
+        the same name.
+        """
+        path = self.get_path(name, key)
+        try:
+            self._directory.mkdir(parents=True, exist_ok=True)
+            for previous_path in self._directory.glob(f"{name}-*.qss"):
+                # the glob also match the stylesheets with a name like "{name}-dark"
+                previous_name, _, previous_key = previous_path.stem.rpartition("-")
+                if previous_name == name and len(previous_key) == 16:
+                    previous_path.unlink()
+            # write then rename so another process never read a partial file
+            tmp_path = path.with_suffix(f".{os.getpid()}.tmp")
+            tmp_path.write_text(stylesheet, "utf-8")
+            os.replace(tmp_path, path)
+        except OSError as error:
+            LOGGER.warning(f"cannot write cached stylesheet {path}: {error}")
+
+
+_STYLESHEET_CACHE: Optional[StylesheetCache] = None
+
+
+def get_stylesheet_cache() -> StylesheetCache:
+    """
+    Get the stylesheet cache shared by the whole application.
+    """
+    global _STYLESHEET_CACHE
+    if _STYLESHEET_CACHE is None:
+        directory = frmb_gui.config.user_data_dir / "stylesheets"
+        _STYLESHEET_CACHE = StylesheetCache(directory)
+    return _STYLESHEET_CACHE
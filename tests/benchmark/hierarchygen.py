@@ -0,0 +1,114 @@
+"""
+Generate synthetic Frmb hierarchies on disk, modelled on ``tests/data/structure1``.
+"""
+
+import json
+import random
+import shutil
+from pathlib import Path
+
+THISDIR = Path(__file__).parent
+DATADIR = THISDIR.parent / "data"
+
+# icons of the reference structure, copied to build a pool of icon files
+ICON_SOURCES = [
+    DATADIR / "structure1" / "ffmpeg.ico",
+    DATADIR / "structure1" / "oiiotool.ico",
+]
+
+TOKENS = ["%%MAKETX%%", "%%OIIOTOOL%%", "%%FFMPEG%%", "%ABCINFO%", "%1", "%V"]
+
+
+def get_hierarchy_size(depth: int, fanout: int) -> int:
+    """
+    Get the amount of frmb files of a complete hierarchy of the given shape.
+    """
+    return sum(fanout**level for level in range(1, depth + 1))
+
+
+def _build_command(rng: random.Random, level: int, token_ratio: float) -> list[str]:
+    command = ["cmd", "/k"]
+    for index in range(rng.randint(3, 9)):
+        if rng.random() < token_ratio:
+            command.append(rng.choice(TOKENS))
+        elif index == 0:
+            parent_dirs = "..\\\\" * level
+            command.append(f'""@CWD\\\\{parent_dirs}tool.bat"')
+        else:
+            command.append(f"--option-{rng.randint(0, 999)}")
+    return command
+
+
+def generate_hierarchy(
+    target_dir: Path,
+    depth: int = 3,
+    fanout: int = 10,
+    max_files: int = 0,
+    icons: int = 4,
+    icon_ratio: float = 0.5,
+    token_ratio: float = 0.5,
+    seed: int = 0,
+) -> int:
+    """
+    Write a synthetic hierarchy of frmb files in the given directory.
+
+    Files are created breadth-first so a hierarchy truncated by ``max_files`` stays
+    balanced.
+
+    Args:
+        target_dir: filesystem path to a directory that may not exist yet.
+        depth: amount of nested levels.
+        fanout: amount of children per menu, except for the last level.
+        max_files: maximum amount of frmb files to create, 0 for no limit.
+        icons:
+            amount of distinct icon files, shared by all the menus. Half of them are
+            byte-identical duplicates of the other half.
+        icon_ratio: fraction of the menus having an icon.
+        token_ratio: fraction of the command arguments that are tokens to resolve.
+        seed: initialize the randomness so the same hierarchy can be generated again.
+
+    Returns:
+        amount of frmb files created
+    """
+    rng = random.Random(seed)
+    target_dir.mkdir(parents=True, exist_ok=True)
+
+    icon_names = []
+    for index in range(icons):
+        icon_name = f"icon-{index}.ico"
+        shutil.copy(
+            ICON_SOURCES[index // 2 % len(ICON_SOURCES)], target_dir / icon_name
+        )
+        icon_names.append(icon_name)
+
+    max_files = max_files or get_hierarchy_size(depth, fanout)
+    created = 0
+    # (directory, level) to fill, level 0 being the root directory
+    queue = [(target_dir, 0)]
+    while queue and created < max_files:
+        directory, level = queue.pop(0)
+        directory.mkdir(exist_ok=True)
+
+        for index in range(fanout):
+            if created >= max_files:
+                break
+
+            name = f"menu-{level}-{index:03d}"
+            content = {
+                "name": f"{name} {rng.choice(['convert', 'display', 'export'])}",
+                "command": _build_command(rng, level, token_ratio),
+            }
+            if icon_names and rng.random() < icon_ratio:
+                icon_name = rng.choice(icon_names)
+                content["icon"] = f"@CWD/{'../' * level}{icon_name}"
+            if level == 0:
+                content["paths"] = ["HKEY_CURRENT_USER\\Software\\Classes\\*"]
+
+            path = directory / f"{name}.frmb"
+            path.write_text(json.dumps(content, indent=2), "utf-8")
+            created += 1
+
+            if level + 1 < depth:
+                queue.append((directory / name, level + 1))
+
+    return created
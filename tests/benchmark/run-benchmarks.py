@@ -0,0 +1,435 @@
+"""
+Time the slow paths of the application on a synthetic hierarchy.
+
+Results are printed and can be saved as json, then compared to a previous run to
+detect regressions::
+
+    python tests/benchmark/run-benchmarks.py --output before.json
+    python tests/benchmark/run-benchmarks.py --output after.json --compare before.json
+"""
+
+import argparse
+import datetime
+import itertools
+import json
+import logging
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+from pathlib import Path
+from typing import Callable
+from typing import Optional
+
+import hierarchygen
+
+LOGGER = logging.getLogger(__name__)
+
+
+class BenchmarkSuite:
+    """
+    Collect the timings of multiple benchmarks.
+
+    Args:
+        repeat: how many times each benchmark is run.
+    """
+
+    def __init__(self, repeat: int):
+        self.repeat = repeat
+        self.results: dict[str, dict[str, float]] = {}
+
+    def run(
+        self,
+        name: str,
+        function: Callable[[], object],
+        setup: Optional[Callable[[], None]] = None,
+    ):
+        """
+        Time the given function, excluding the time spent in setup.
+
+        Args:
+            name: unique identifier of the benchmark in the results.
+            function: code to time.
+            setup: called before each run of the function.
+        """
+        timings = []
+        for _ in range(self.repeat):
+            if setup:
+                setup()
+            start = time.perf_counter()
+            function()
+            timings.append(time.perf_counter() - start)
+        self.record(name, timings)
+
+    def record(self, name: str, timings: list[float]):
+        """
+        Store timings measured outside :meth:`run`.
+
+        Args:
+            name: unique identifier of the benchmark in the results.
+            timings: in seconds, one per run.
+        """
+        self.results[name] = {
+            "min": min(timings),
+            "median": statistics.median(timings),
+            "mean": statistics.mean(timings),
+            "max": max(timings),
+            "repeat": len(timings),
+        }
+        LOGGER.info(f"{name: <45} {self.results[name]['median'] * 1000:10.2f} ms")
+
+
+def run_benchmarks(root_dir: Path, suite: BenchmarkSuite):
+    """
+    Run all the benchmarks on the given hierarchy.
+    """
+    import frmb_gui
+    import frmb_gui.core
+    from frmb_gui.assets._delete import MenuDeleterWidget
+    from frmb_gui.assets._hierarchybrowser import HierarchyBrowserTreeView
+
+    app = frmb_gui.get_qapp()
+
+    state = {}
+
+    def new_root():
+        state["root"] = frmb_gui.core.FrmbRoot(root_dir)
+
+    suite.run("FrmbRoot.children[cold]", lambda: state["root"].children, new_root)
+    suite.run("FrmbRoot.children[warm]", lambda: state["root"].children)
+    suite.run(
+        "FrmbRoot.get_content_hash[cold]",
+        lambda: state["root"].get_content_hash(),
+        new_root,
+    )
+    suite.run(
+        "FrmbRoot.get_content_hash[warm]",
+        lambda: state["root"].get_content_hash(),
+    )
+
+    manifest_path = root_dir.parent / "manifest.json"
+
+    def new_installer():
+        manifest_path.unlink(missing_ok=True)
+        backend = frmb_gui.core.InMemoryRegistryBackend()
+        state["installer"] = frmb_gui.core.RegistryInstaller(backend, manifest_path)
+
+    def edit_files(count: int):
+        for path in itertools.islice(state["root"].hierarchy.nodes, count):
+            path.write_text(path.read_text("utf-8"), "utf-8")
+            os.utime(path, ns=(time.time_ns(), time.time_ns()))
+
+    def edit_one_file():
+        edit_files(1)
+
+    def install():
+        state["installer"].install(state["root"])
+
+    suite.run("RegistryInstaller.install[cold]", install, new_installer)
+    suite.run("RegistryInstaller.install[unchanged]", install)
+    suite.run("RegistryInstaller.install[one file]", install, edit_one_file)
+
+    def scan():
+        state["scan"] = frmb_gui.core.HierarchyScan.from_directory(root_dir)
+
+    def compare_scans():
+        frmb_gui.core.compare_scans(state["scan"], state["new_scan"])
+
+    def scan_unchanged():
+        state["new_scan"] = frmb_gui.core.HierarchyScan.from_directory(root_dir)
+
+    def scan_one_file():
+        edit_one_file()
+        state["new_scan"] = frmb_gui.core.HierarchyScan.from_directory(root_dir)
+
+    suite.run("HierarchyScan.from_directory", scan)
+    suite.run("compare_scans[unchanged]", compare_scans, scan_unchanged)
+    suite.run("compare_scans[one file]", compare_scans, scan_one_file)
+
+    hierarchy = state["root"].hierarchy
+    treeview = HierarchyBrowserTreeView()
+    treeview.resize(1280, 720)
+    treeview.show()
+
+    def clear_treeview():
+        # populating a view displaying the same root only reconcile its rows
+        treeview.change_root(state["root"], populate=False)
+        app.processEvents()
+
+    def populate():
+        treeview.populate(hierarchy)
+        app.processEvents()
+
+    def populate_expanded():
+        treeview.populate(hierarchy)
+        treeview.expandAll()
+        app.processEvents()
+
+    suite.run("HierarchyBrowserTreeView.populate", populate, clear_treeview)
+    suite.run(
+        "HierarchyBrowserTreeView.populate[expanded]",
+        populate_expanded,
+        clear_treeview,
+    )
+
+    # refreshing the expanded tree with a newer snapshot of the same root
+    def read_unchanged():
+        state["hierarchy"] = frmb_gui.core.read_hierarchy(root_dir)
+
+    def read_changed():
+        edit_files(10)
+        state["hierarchy"] = frmb_gui.core.read_hierarchy(root_dir)
+
+    def refresh():
+        treeview.populate(state["hierarchy"])
+        app.processEvents()
+
+    suite.run("HierarchyBrowserTreeView.populate[refresh]", refresh, read_unchanged)
+    suite.run(
+        "HierarchyBrowserTreeView.populate[refresh 10 files]",
+        refresh,
+        read_changed,
+    )
+
+    # repolish cost with the expanded tree on screen
+    scope = "HierarchyBrowserWidget"
+    app.add_stylesheet_owner(treeview, scope)
+    sections = app.get_stylesheet_sections()
+    stylesheet = "\n".join(sections.values())
+
+    def reload_stylesheet():
+        app.reload_stylesheet()
+        app.processEvents()
+
+    def change_section():
+        # pretend the section changed since the last application
+        app._stylesheet_sections[scope] = ""
+
+    def set_full_stylesheet():
+        app.setStyleSheet(stylesheet)
+        app.processEvents()
+
+    suite.run("FrmbApplication.reload_stylesheet[unchanged]", reload_stylesheet)
+    suite.run(
+        "FrmbApplication.reload_stylesheet[one section]",
+        reload_stylesheet,
+        change_section,
+    )
+    suite.run("QApplication.setStyleSheet[whole document]", set_full_stylesheet)
+    app.setStyleSheet(sections[frmb_gui.resources.APPLICATION_SCOPE])
+    treeview.close()
+
+    deleter = MenuDeleterWidget(menu_files=state["root"].children)
+    suite.run(
+        "MenuDeleterWidget.delete_all_menus[dry_run]",
+        lambda: deleter.delete_all_menus(dry_run=True),
+    )
+
+    style = app.current_style
+    suite.run("UiStyle.get_stylesheet", lambda: style.get_stylesheet("main"))
+
+
+def run_tree_benchmarks(root_dir: Path, suite: BenchmarkSuite, label: str):
+    """
+    Compare the ways of filling the hierarchy tree view with all its rows.
+
+    Args:
+        root_dir: the hierarchy to display.
+        suite: to store the results to.
+        label: appended to the benchmark names, to distinguish the hierarchy sizes.
+    """
+    import frmb_gui
+    import frmb_gui.core
+    from frmb_gui.assets._hierarchybrowser import HierarchyBrowserTreeView
+
+    app = frmb_gui.get_qapp()
+    root = frmb_gui.core.FrmbRoot(root_dir)
+    hierarchy = root.hierarchy
+    state = {}
+
+    def new_treeview():
+        if "treeview" in state:
+            state["treeview"].close()
+            state["treeview"].deleteLater()
+        treeview = HierarchyBrowserTreeView()
+        treeview.resize(1280, 720)
+        treeview.show()
+        treeview.change_root(root, populate=False)
+        treeview.populate(hierarchy)
+        app.processEvents()
+        state["treeview"] = treeview
+
+    def expand_per_level():
+        # each level is fetched once expanded
+        state["treeview"].expandAll()
+        app.processEvents()
+
+    def expand_bulk():
+        # the previous implementation of expand_all(), that blocks until done
+        treeview = state["treeview"]
+        treeview.setUpdatesEnabled(False)
+        treeview.model().sourceModel().fetch_all()
+        treeview.expandAll()
+        treeview.setUpdatesEnabled(True)
+        app.processEvents()
+
+    def expand_bulk_timed():
+        # the event loop is blocked for the whole call
+        start = time.perf_counter()
+        expand_bulk()
+        state.setdefault("longest", []).append(time.perf_counter() - start)
+
+    def expand_scheduled():
+        treeview = state["treeview"]
+        populator = treeview.model().sourceModel().populator
+        treeview.expand_all()
+        # the longest time the event loop was blocked
+        longest = 0.0
+        while populator.is_running():
+            start = time.perf_counter()
+            app.processEvents()
+            longest = max(longest, time.perf_counter() - start)
+        app.processEvents()
+        state.setdefault("longest", []).append(longest)
+
+    def resize_columns():
+        header = state["treeview"].header()
+        header.resizeSections(header.ResizeMode.ResizeToContents)
+        app.processEvents()
+
+    def resize_columns_default():
+        # the amount of rows measured by Qt by default
+        state["treeview"].header().setResizeContentsPrecision(1000)
+        resize_columns()
+
+    def new_expanded_treeview():
+        new_treeview()
+        expand_bulk()
+
+    suite.run(
+        f"HierarchyBrowserTreeView.expandAll[{label}]",
+        expand_per_level,
+        new_treeview,
+    )
+
+    # the populator used by expand_all(), against the blocking fetch_all()
+    for name, function in [
+        ("FrmbHierarchyModel.fetch_all", expand_bulk_timed),
+        ("HierarchyPopulator", expand_scheduled),
+    ]:
+        suite.run(f"{name}[{label}]", function, new_treeview)
+        suite.record(f"{name}[{label} longest frame]", state.pop("longest"))
+    for case in [label, f"{label} longest frame"]:
+        name = f"HierarchyPopulator[{case}]"
+        blocking = suite.results[f"FrmbHierarchyModel.fetch_all[{case}]"]["median"]
+        change = suite.results[name]["median"] / blocking - 1
+        LOGGER.info(f"{name: <45} {change * 100:+8.1f} % vs fetch_all")
+    suite.run(
+        f"HierarchyBrowserTreeView.resizeSections[{label} default]",
+        resize_columns_default,
+        new_expanded_treeview,
+    )
+    suite.run(
+        f"HierarchyBrowserTreeView.resizeSections[{label} sampled]",
+        resize_columns,
+        new_expanded_treeview,
+    )
+    state["treeview"].close()
+
+
+def compare_results(results: dict, previous: dict):
+    """
+    Log the relative change of each benchmark median compared to a previous run.
+    """
+    for name, result in results["benchmarks"].items():
+        previous_result = previous["benchmarks"].get(name)
+        if not previous_result:
+            continue
+        change = result["median"] / previous_result["median"] - 1
+        LOGGER.info(f"{name: <45} {change * 100:+8.1f} %")
+
+
+def main(argv: Optional[list[str]] = None):
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0].strip())
+    parser.add_argument("--depth", type=int, default=3)
+    parser.add_argument("--fanout", type=int, default=10)
+    parser.add_argument("--max-files", type=int, default=0)
+    parser.add_argument("--icons", type=int, default=4)
+    parser.add_argument("--token-ratio", type=float, default=0.5)
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=5)
+    parser.add_argument(
+        "--tree-sizes",
+        type=int,
+        nargs="*",
+        default=[1000, 10000, 50000],
+        help="amount of files of the hierarchies used to benchmark the tree view.",
+    )
+    parser.add_argument("--output", type=Path, help="json file to write results to.")
+    parser.add_argument("--compare", type=Path, help="json file of a previous run.")
+    parsed = parser.parse_args(argv)
+
+    logging.basicConfig(level=logging.INFO, format="{message}", style="{")
+    # the widgets are benchmarked without a display
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    # frmb_gui parse the command line on its own
+    sys.argv = sys.argv[:1]
+
+    parameters = {
+        "depth": parsed.depth,
+        "fanout": parsed.fanout,
+        "max_files": parsed.max_files,
+        "icons": parsed.icons,
+        "token_ratio": parsed.token_ratio,
+        "seed": parsed.seed,
+    }
+
+    with tempfile.TemporaryDirectory(prefix="frmb_gui-benchmark") as tmp_dir:
+        root_dir = Path(tmp_dir) / "root"
+        files = hierarchygen.generate_hierarchy(root_dir, **parameters)
+        LOGGER.info(f"generated {files} frmb files in {root_dir}")
+
+        suite = BenchmarkSuite(repeat=parsed.repeat)
+        run_benchmarks(root_dir, suite)
+
+        for tree_size in parsed.tree_sizes:
+            tree_dir = Path(tmp_dir) / f"tree-{tree_size}"
+            hierarchygen.generate_hierarchy(
+                tree_dir,
+                depth=5,
+                fanout=10,
+                max_files=tree_size,
+                seed=parsed.seed,
+            )
+            run_tree_benchmarks(tree_dir, suite, label=f"{tree_size // 1000}k")
+
+    import frmb_gui
+    import qtpy
+
+    results = {
+        "metadata": {
+            "date": datetime.datetime.now().isoformat(),
+            "frmb_gui": frmb_gui.__version__,
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "qt": qtpy.QT_VERSION,
+            "qt_api": qtpy.API_NAME,
+            "files": files,
+            "parameters": parameters,
+        },
+        "benchmarks": suite.results,
+    }
+
+    if parsed.output:
+        parsed.output.write_text(json.dumps(results, indent=4), "utf-8")
+        LOGGER.info(f"results written to {parsed.output}")
+
+    if parsed.compare:
+        previous = json.loads(parsed.compare.read_text("utf-8"))
+        compare_results(results, previous)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,13 @@
+import os
+
+import pytest
+from qtpy import QtWidgets
+
+
+@pytest.fixture(scope="session")
+def qapp() -> QtWidgets.QApplication:
+    """
+    The Qt application shared by all the tests, without any display.
+    """
+    os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+    return QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
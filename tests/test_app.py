@@ -0,0 +1,108 @@
+import json
+import logging
+import subprocess
+import sys
+import time
+
+from qtpy import QtWidgets
+
+from frmb_gui._app import IdleTaskQueue
+
+FIRST_PAINT_SCRIPT = """
+import json
+import os
+import sys
+import time
+
+os.environ.setdefault("QT_QPA_PLATFORM", "offscreen")
+
+from qtpy import QtWidgets
+
+import frmb_gui
+
+events = []
+unloaded_fonts = []
+
+
+class Widget(QtWidgets.QWidget):
+    def paintEvent(self, event):
+        events.append("paint")
+        unloaded_fonts.append(len(app.current_style.get_unloaded_font_files()))
+        super().paintEvent(event)
+
+
+app = frmb_gui.get_qapp()
+app.call_when_idle(lambda: events.append("task"))
+# the second reload must not schedule another font loading
+app.reload_style()
+widget = Widget()
+widget.show()
+
+end_time = time.perf_counter() + 5
+idle_queue = app._idle_queue
+while not idle_queue.is_started() or idle_queue._tasks:
+    if time.perf_counter() > end_time:
+        break
+    app.processEvents()
+    time.sleep(0.01)
+unloaded_fonts.append(len(app.current_style.get_unloaded_font_files()))
+print(json.dumps({"events": events, "unloaded_fonts": unloaded_fonts}))
+"""
+
+
+def _process_events(duration: float):
+    app = QtWidgets.QApplication.instance()
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def test__IdleTaskQueue(qapp: QtWidgets.QApplication, caplog):
+    calls = []
+
+    def task1():
+        calls.append(1)
+
+    def task2():
+        raise ValueError("task2")
+
+    def task3():
+        calls.append(3)
+
+    queue = IdleTaskQueue()
+    queue.add(task1)
+    queue.add(task2)
+    queue.add(task3)
+    # already scheduled
+    queue.add(task1)
+    _process_events(0.1)
+    assert calls == []
+
+    with caplog.at_level(logging.ERROR, logger="frmb_gui._app"):
+        queue.start()
+        _process_events(0.1)
+    assert calls == [1, 3]
+    assert "task2" in caplog.text
+
+    # can be scheduled again once run
+    queue.add(task1)
+    _process_events(0.1)
+    assert calls == [1, 3, 1]
+
+
+def test__FrmbApplication__call_when_idle():
+    # the application is a singleton, so it is tested in its own process
+    result = subprocess.run(
+        [sys.executable, "-c", FIRST_PAINT_SCRIPT],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    output = json.loads(result.stdout.splitlines()[-1])
+    events = output["events"]
+    assert "task" in events
+    assert events.index("paint") < events.index("task")
+    # the font styles not used by the style are registered after the first paint
+    assert output["unloaded_fonts"][0] > 0
+    assert output["unloaded_fonts"][-1] == 0
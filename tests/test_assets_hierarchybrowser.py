@@ -0,0 +1,151 @@
+import shutil
+from pathlib import Path
+
+from qtpy import QtCore
+from qtpy import QtTest
+from qtpy import QtWidgets
+
+import frmb_gui.core
+from frmb_gui.assets._hierarchybrowser import FrmbHierarchyModel
+
+THISDIR = Path(__file__).parent
+DATADIR = THISDIR / "data"
+
+
+def _get_fetched_paths(model: FrmbHierarchyModel) -> list[Path]:
+    """
+    Get the path of every row of the model, checking they were all fetched.
+    """
+    paths = []
+    indexes = [model.index(row, 0) for row in range(model.rowCount())]
+    while indexes:
+        index = indexes.pop()
+        assert not model.canFetchMore(index)
+        paths.append(model.get_node(index).path)
+        rows = range(model.rowCount(index))
+        indexes.extend(model.index(row, 0, index) for row in rows)
+    return paths
+
+
+def test__FrmbHierarchyModel(qapp: QtWidgets.QApplication):
+    hierarchy = frmb_gui.core.read_hierarchy(DATADIR / "structure1")
+    model = FrmbHierarchyModel()
+    proxy = QtCore.QSortFilterProxyModel()
+    proxy.setSourceModel(model)
+
+    model.set_children_getter(hierarchy.get_children)
+    model.fetchMore(QtCore.QModelIndex())
+    top_paths = [node.path for node in hierarchy.get_children()]
+    assert model.rowCount() == len(top_paths)
+
+    # children are only fetched once requested
+    parent_path = DATADIR / "structure1" / "ffmpeg-to-gifs.frmb"
+    parent = model.index(top_paths.index(parent_path), 0)
+    assert model.hasChildren(parent)
+    assert model.rowCount(parent) == 0
+    assert model.canFetchMore(parent)
+    model.fetchMore(parent)
+    assert not model.canFetchMore(parent)
+    assert model.rowCount(parent) == len(hierarchy.get_children(parent_path))
+
+    proxy.sort(0, QtCore.Qt.SortOrder.DescendingOrder)
+    names = [proxy.index(row, 0).data() for row in range(proxy.rowCount())]
+    assert names == sorted(names, reverse=True)
+    proxy_parent = proxy.mapFromSource(parent)
+    children_names = [
+        proxy.index(row, 0, proxy_parent).data()
+        for row in range(proxy.rowCount(proxy_parent))
+    ]
+    assert children_names == sorted(children_names, reverse=True)
+
+    warnings = []
+
+    def message_handler(message_type, context, message):
+        if message_type != QtCore.QtMsgType.QtDebugMsg:
+            warnings.append(message)
+
+    previous_handler = QtCore.qInstallMessageHandler(message_handler)
+    try:
+        mode = QtTest.QAbstractItemModelTester.FailureReportingMode.Warning
+        # fetch and check every row of the models, then every change made to them.
+        # XXX: the testers fetch the rows they check, so inserting unfetched rows
+        #   would make them start an insertion while checking the previous one.
+        model_tester = QtTest.QAbstractItemModelTester(model, mode)
+        proxy_tester = QtTest.QAbstractItemModelTester(proxy, mode)
+        assert sorted(_get_fetched_paths(model)) == sorted(hierarchy.nodes)
+        model.update_children(lambda path: hierarchy.get_children(path)[:1])
+        assert proxy.rowCount() == 1
+        model.set_children_getter(None)
+    finally:
+        QtCore.qInstallMessageHandler(previous_handler)
+
+    assert not warnings, "\n".join(warnings)
+    assert proxy.rowCount() == 0
+
+
+def test__FrmbHierarchyModel__update_children(
+    qapp: QtWidgets.QApplication, tmp_path: Path
+):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+    hierarchy = frmb_gui.core.read_hierarchy(root_dir)
+
+    model = FrmbHierarchyModel()
+    model.set_children_getter(hierarchy.get_children)
+    model.fetchMore(QtCore.QModelIndex())
+    parent_path = root_dir / "ffmpeg-to-gifs.frmb"
+    paths = [node.path for node in hierarchy.get_children()]
+    parent = QtCore.QPersistentModelIndex(model.index(paths.index(parent_path), 0))
+    model.fetchMore(QtCore.QModelIndex(parent))
+    assert model.rowCount(QtCore.QModelIndex(parent)) == 2
+
+    new_file = root_dir / "ffmpeg-to-gifs" / "a-new-file.frmb"
+    shutil.copy(root_dir / "ffmpeg-to-gifs" / "video-to-gif-interactive.frmb", new_file)
+    shutil.rmtree(root_dir / "maketx")
+    (root_dir / "maketx.frmb").unlink()
+    reset = []
+    model.modelReset.connect(lambda: reset.append(True))
+    new_hierarchy = frmb_gui.core.read_hierarchy(root_dir)
+    model.update_children(new_hierarchy.get_children)
+
+    assert not reset
+    assert parent.isValid()
+    assert model.get_node(QtCore.QModelIndex(parent)).path == parent_path
+    assert model.rowCount() == len(paths) - 1
+    children = [
+        model.get_node(model.index(row, 0, QtCore.QModelIndex(parent))).path
+        for row in range(model.rowCount(QtCore.QModelIndex(parent)))
+    ]
+    assert children == [node.path for node in new_hierarchy.get_children(parent_path)]
+
+
+def test__FrmbHierarchyModel__fetch_all(qapp: QtWidgets.QApplication):
+    hierarchy = frmb_gui.core.read_hierarchy(DATADIR / "structure1")
+
+    model = FrmbHierarchyModel()
+    model.set_children_getter(hierarchy.get_children)
+    model.fetch_all()
+
+    assert sorted(_get_fetched_paths(model)) == sorted(hierarchy.nodes)
+
+
+def test__HierarchyPopulator(qapp: QtWidgets.QApplication):
+    hierarchy = frmb_gui.core.read_hierarchy(DATADIR / "structure1")
+
+    model = FrmbHierarchyModel()
+    model.set_children_getter(hierarchy.get_children)
+    model.populator.chunk_size = 1
+    fetched = []
+    model.populator.fetched.connect(lambda index: fetched.append(model.get_node(index)))
+    model.populator.start()
+    assert model.populator.is_running()
+    # nothing happens until the event loop runs
+    assert not model.rowCount()
+
+    while model.populator.is_running():
+        qapp.processEvents()
+
+    assert sorted(_get_fetched_paths(model)) == sorted(hierarchy.nodes)
+    assert {node.path for node in fetched} == {
+        path for path, node in hierarchy.nodes.items() if node.has_children
+    }
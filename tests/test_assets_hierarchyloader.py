@@ -0,0 +1,94 @@
+import logging
+import shutil
+import threading
+import time
+from pathlib import Path
+
+from qtpy import QtWidgets
+
+import frmb_gui.core
+from frmb_gui.assets._hierarchyloader import HierarchyLoader
+
+THISDIR = Path(__file__).parent
+DATADIR = THISDIR / "data"
+
+
+def _process_events(duration: float, until=None):
+    app = QtWidgets.QApplication.instance()
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time and not (until and until()):
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def test__HierarchyLoader__superseded(qapp: QtWidgets.QApplication, tmp_path: Path):
+    shutil.copytree(DATADIR / "structure1", tmp_path / "root1")
+    shutil.copytree(DATADIR / "structure1", tmp_path / "root2")
+    root1 = frmb_gui.core.FrmbRoot(tmp_path / "root1")
+    root2 = frmb_gui.core.FrmbRoot(tmp_path / "root2")
+
+    loader = HierarchyLoader()
+    loaded = []
+    loader.loaded.connect(lambda root, hierarchy: loaded.append((root, hierarchy)))
+    loader.load(root1)
+    loader.load(root2)
+    _process_events(5.0, until=lambda: loaded)
+    # let the first load deliver its result, if not already
+    _process_events(0.2)
+
+    assert len(loaded) == 1
+    root, hierarchy = loaded[0]
+    assert root is root2
+    assert hierarchy.root_dir == root2.path
+    assert not loader.is_loading()
+
+
+def test__HierarchyLoader__cancel(
+    qapp: QtWidgets.QApplication,
+    tmp_path: Path,
+    monkeypatch,
+    caplog,
+):
+    shutil.copytree(DATADIR / "structure1", tmp_path / "root")
+    root = frmb_gui.core.FrmbRoot(tmp_path / "root")
+
+    # block the load in the worker thread until cancelled
+    started = threading.Event()
+    release = threading.Event()
+
+    def get_cached_hierarchy(self):
+        started.set()
+        release.wait(5.0)
+        return None
+
+    monkeypatch.setattr(
+        frmb_gui.core.FrmbRoot, "get_cached_hierarchy", get_cached_hierarchy
+    )
+
+    read_paths = []
+    read_node = frmb_gui.core._loader.read_node
+
+    def spy_read_node(path: Path, **kwargs):
+        read_paths.append(path)
+        return read_node(path=path, **kwargs)
+
+    monkeypatch.setattr(frmb_gui.core._loader, "read_node", spy_read_node)
+
+    loader = HierarchyLoader()
+    emitted = []
+    loader.loaded.connect(lambda *args: emitted.append(args))
+    loader.failed.connect(lambda *args: emitted.append(args))
+
+    with caplog.at_level(logging.DEBUG, logger="frmb_gui.assets._hierarchyloader"):
+        loader.load(root)
+        assert started.wait(5.0)
+        loader.cancel()
+        assert not loader.is_loading()
+        release.set()
+        _process_events(5.0, until=lambda: "cancelled load" in caplog.text)
+        _process_events(0.2)
+
+    assert "cancelled load" in caplog.text
+    assert not emitted
+    # interrupted while walking the hierarchy, before reading any file
+    assert not read_paths
@@ -0,0 +1,129 @@
+import logging
+import shutil
+import time
+from pathlib import Path
+
+from qtpy import QtCore
+from qtpy import QtGui
+from qtpy import QtWidgets
+
+from frmb_gui.assets._iconcache import IconCache
+from frmb_gui.assets._iconcache import IconLoader
+
+
+def _write_icon(path: Path, color: str, size: int = 16) -> Path:
+    image = QtGui.QImage(size, size, QtGui.QImage.Format.Format_ARGB32)
+    image.fill(QtGui.QColor(color))
+    assert image.save(str(path), "PNG")
+    return path
+
+
+def test__IconCache__eviction(qapp: QtWidgets.QApplication, tmp_path: Path):
+    red = _write_icon(tmp_path / "red.png", "red")
+    green = _write_icon(tmp_path / "green.png", "green")
+    blue = _write_icon(tmp_path / "blue.png", "blue")
+    # 16x16 pixels of 4 bytes
+    cache = IconCache(max_cost=2 * 1024)
+
+    cache.get_icon(red)
+    cache.get_icon(green)
+    assert cache.statistics.cost == 2 * 1024
+    # red is now the most recently used
+    cache.get_icon(red)
+    cache.get_icon(blue)
+
+    statistics = cache.statistics
+    assert statistics.evictions == 1
+    assert statistics.cost == 2 * 1024
+    assert cache.peek_icon(green) is None
+    assert cache.peek_icon(red) is not None
+    assert cache.peek_icon(blue) is not None
+
+    # an icon bigger than the budget is still kept
+    big = _write_icon(tmp_path / "big.png", "black", size=64)
+    assert cache.get_icon(big) is not None
+    assert cache.peek_icon(big) is not None
+    assert cache.statistics.cost == 64 * 64 * 4
+
+
+def test__IconCache__deduplication(qapp: QtWidgets.QApplication, tmp_path: Path):
+    red = _write_icon(tmp_path / "red.png", "red")
+    copy = tmp_path / "copy.png"
+    shutil.copy(red, copy)
+    cache = IconCache()
+
+    icon = cache.get_icon(red)
+    assert cache.get_icon(copy) is icon
+    statistics = cache.statistics
+    assert statistics.misses == 2
+    assert statistics.deduplicated == 1
+    assert statistics.cost == 16 * 16 * 4
+
+    assert cache.get_icon(red) is icon
+    assert cache.statistics.hits == 1
+
+
+def test__IconCache__broken(qapp: QtWidgets.QApplication, tmp_path: Path, caplog):
+    missing = tmp_path / "missing.png"
+    corrupted = tmp_path / "corrupted.png"
+    corrupted.write_bytes(b"not an image")
+    cache = IconCache()
+
+    with caplog.at_level(logging.WARNING, logger="frmb_gui.assets._iconcache"):
+        assert cache.get_icon(missing) is None
+        assert cache.get_icon(corrupted) is None
+        assert len(caplog.records) == 1
+        assert cache.is_broken(missing)
+        assert cache.is_broken(corrupted)
+
+        # not accessed nor reported again
+        _write_icon(missing, "red")
+        assert cache.get_icon(missing) is None
+        assert cache.get_icon(corrupted) is None
+        assert len(caplog.records) == 1
+    assert cache.statistics.broken_hits == 2
+
+    cache.clear()
+    assert not cache.is_broken(missing)
+    assert cache.get_icon(missing) is not None
+
+
+def test__IconLoader(qapp: QtWidgets.QApplication, tmp_path: Path):
+    path = _write_icon(tmp_path / "icon.png", "red")
+    loader = IconLoader(cache=IconCache())
+    loaded = []
+    loader.loaded.connect(loaded.append)
+
+    def wait_loaded(count: int):
+        end_time = time.perf_counter() + 5
+        while len(loaded) < count and time.perf_counter() < end_time:
+            qapp.processEvents()
+            time.sleep(0.01)
+        assert len(loaded) == count
+
+    assert loader.request_icon(path) is None
+    assert loader.is_pending(path)
+    wait_loaded(1)
+    icon = loader.request_icon(path)
+    assert icon is not None
+    assert not loader.is_pending(path)
+    assert loader.cache.statistics.misses == 1
+    assert loader.cache.statistics.hits == 1
+
+    # checked again once cancelled, but unchanged
+    loader.cancel()
+    assert loader.request_icon(path) is icon
+    wait_loaded(2)
+    assert loader.request_icon(path) is icon
+    assert loader.cache.statistics.misses == 1
+
+    # the outdated icon is returned while the modified file is decoded
+    _write_icon(path, "blue", size=32)
+    loader.cancel()
+    assert loader.request_icon(path) is icon
+    assert loader.is_pending(path)
+    wait_loaded(3)
+    new_icon = loader.request_icon(path)
+    assert new_icon is not icon
+    assert new_icon.availableSizes() == [QtCore.QSize(32, 32)]
+    assert loader.cache.statistics.misses == 2
@@ -0,0 +1,96 @@
+import json
+import shutil
+import subprocess
+import sys
+from pathlib import Path
+
+import frmb_gui.cli
+
+THISDIR = Path(__file__).parent
+DATADIR = THISDIR / "data"
+
+
+def test__CLI__commands(tmp_path: Path, capsys):
+    root_dir = tmp_path / "structure1"
+    other_dir = tmp_path / "structure2"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+    shutil.copytree(DATADIR / "structure1", other_dir)
+
+    cli = frmb_gui.cli.CLI(["scan", str(root_dir)])
+    assert cli.run_command() == 0
+    result = json.loads(capsys.readouterr().out)
+    assert result["files"] == len(list(root_dir.rglob("*.frmb")))
+
+    cli = frmb_gui.cli.CLI(["validate", str(root_dir)])
+    assert cli.run_command() == 0
+    assert json.loads(capsys.readouterr().out)["valid"]
+
+    edited = other_dir / "maketx" / "convert-tx.frmb"
+    edited.write_text(edited.read_text("utf-8") + "\n", "utf-8")
+    (other_dir / "oiiotool" / "rescale-512.frmb").unlink()
+    cli = frmb_gui.cli.CLI(["diff", str(root_dir), str(other_dir)])
+    assert cli.run_command() == 1
+    result = json.loads(capsys.readouterr().out)
+    assert result["changed"] == ["maketx/convert-tx.frmb"]
+    assert result["removed"] == ["oiiotool/rescale-512.frmb"]
+    assert result["added"] == []
+
+    output = tmp_path / "export.json"
+    cli = frmb_gui.cli.CLI(["export", str(root_dir), "--output", str(output)])
+    assert cli.run_command() == 0
+    menus = json.loads(output.read_text("utf-8"))["menus"]
+    assert [menu["file"] for menu in menus] == sorted(
+        path.name for path in root_dir.glob("*.frmb")
+    )
+
+    registry = tmp_path / "registry.json"
+    command = ["install", str(root_dir), "--registry", str(registry)]
+    cli = frmb_gui.cli.CLI(command + ["--dry-run"])
+    assert cli.run_command() == 0
+    operations = json.loads(capsys.readouterr().out)["operations"]
+    assert operations and not registry.exists()
+
+    cli = frmb_gui.cli.CLI(command)
+    assert cli.run_command() == 0
+    assert json.loads(capsys.readouterr().out)["operations"] == operations
+    assert registry.exists()
+
+
+def test__CLI__missing_root(tmp_path: Path, capsys):
+    root_dir = DATADIR / "structure1"
+    missing_dir = tmp_path / "missing"
+
+    for command in [
+        ["scan", str(missing_dir)],
+        ["hash", str(missing_dir)],
+        ["diff", str(root_dir), str(missing_dir)],
+        ["export", str(missing_dir)],
+        ["install", str(missing_dir), "--registry", str(tmp_path / "registry.json")],
+    ]:
+        cli = frmb_gui.cli.CLI(command)
+        assert cli.run_command() == 2, command
+        result = json.loads(capsys.readouterr().out)
+        assert result == {
+            "root": str(missing_dir),
+            "error": "root directory doesn't exist",
+        }
+    assert not (tmp_path / "registry.json").exists()
+
+
+def test__CLI__no_qt():
+    script = """
+import sys
+import frmb_gui.__main__
+
+sys.argv = ["frmb", "hash", sys.argv[1]]
+try:
+    frmb_gui.__main__.main()
+except SystemExit:
+    pass
+assert "qtpy" not in sys.modules, "qtpy was imported"
+"""
+    subprocess.run(
+        [sys.executable, "-c", script, str(DATADIR / "structure1")],
+        check=True,
+        capture_output=True,
+    )
@@ -0,0 +1,31 @@
+from pathlib import Path
+
+import frmb_gui.core
+
+
+def test__RootCatalog(tmp_path: Path):
+    root = frmb_gui.core.FrmbRoot(tmp_path / "root1")
+    root_file = root.create_root_file("first root")
+    other_dir = tmp_path / "root2"
+
+    catalog = frmb_gui.core.RootCatalog(tmp_path / "roots.json")
+    entry = catalog.add(root.path)
+    assert entry.uuid == root_file.uuid
+    assert entry.name == "first root"
+    assert catalog.add(root.path) is entry
+    assert catalog.add(other_dir).uuid is None
+    assert root.path in catalog
+    assert catalog.get_by_uuid(root_file.uuid) is entry
+    catalog.last_selected = other_dir
+    catalog.save()
+
+    restored = frmb_gui.core.RootCatalog(catalog.path)
+    restored.load()
+    assert list(restored) == list(catalog)
+    assert restored.get_by_uuid(root_file.uuid).path == root.path
+    assert restored.last_selected == other_dir
+
+    restored.remove(other_dir)
+    assert other_dir not in restored
+    assert restored.last_selected is None
+    assert len(restored) == 1
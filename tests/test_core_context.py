@@ -0,0 +1,24 @@
+import json
+from pathlib import Path
+
+import frmb_gui.core
+
+
+def test__load_runtime_dependencies(tmp_path: Path):
+    cache_path = tmp_path / "dependencies.json"
+
+    dependencies = frmb_gui.core.load_runtime_dependencies(cache_path)
+    names = [name for name, version in dependencies]
+    assert "pytest" in names
+    assert "python" in names
+    assert cache_path.exists()
+
+    # the persisted dependencies are used instead of collecting them again
+    cache_path.write_text(json.dumps([["fake", "1.0"]]), "utf-8")
+    assert frmb_gui.core.load_runtime_dependencies(cache_path) == [("fake", "1.0")]
+
+
+def test__request_runtime_dependencies():
+    future = frmb_gui.core.request_runtime_dependencies(persist=False)
+    assert frmb_gui.core.request_runtime_dependencies() is future
+    assert future.result(timeout=30) == frmb_gui.core.get_runtime_dependencies()
@@ -0,0 +1,226 @@
+import os
+import shutil
+import threading
+from pathlib import Path
+
+import pytest
+
+import frmb_gui.core
+
+THISDIR = Path(__file__).parent
+DATADIR = THISDIR / "data"
+
+
+def test__read_hierarchy(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+
+    hierarchy = frmb_gui.core.read_hierarchy(root_dir)
+    top_names = [node.path.name for node in hierarchy.get_children()]
+    assert top_names == sorted(top_names)
+    assert "ffmpeg-to-gifs.frmb" in top_names
+    assert len(hierarchy) == len(list(root_dir.rglob("*.frmb")))
+
+    parent = root_dir / "ffmpeg-to-gifs" / "video-to-gif-presets.frmb"
+    children = hierarchy.get_children(parent)
+    assert len(children) == 6
+    assert all(not child.at_root() for child in children)
+
+    iterated = list(hierarchy.iterate())
+    assert len(iterated) == len(hierarchy)
+
+
+def test__get_hierarchy_signature__cancel():
+    cancel_event = threading.Event()
+    root_dir = DATADIR / "structure1"
+    signature = frmb_gui.core.get_hierarchy_signature(root_dir, cancel_event)
+    assert root_dir in signature
+
+    cancel_event.set()
+    with pytest.raises(frmb_gui.core.HierarchyLoadCancelled):
+        frmb_gui.core.get_hierarchy_signature(root_dir, cancel_event)
+    with pytest.raises(frmb_gui.core.HierarchyLoadCancelled):
+        frmb_gui.core.load_hierarchy(root_dir, cancel_event=cancel_event)
+
+
+def test__FrmbRoot__hierarchy_cache(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+
+    root = frmb_gui.core.FrmbRoot(root_dir)
+    root.stale_check_interval = 0.0
+    hierarchy = root.hierarchy
+    assert root.hierarchy is hierarchy
+    assert not root.is_stale()
+
+    new_file = root_dir / "maketx" / "convert-tx-new.frmb"
+    shutil.copy(root_dir / "maketx" / "convert-tx.frmb", new_file)
+    # ensure the mtime changes even on filesystem with a coarse resolution
+    os.utime(new_file.parent, ns=(0, 0))
+    assert root.is_stale()
+
+    new_hierarchy = root.hierarchy
+    assert new_hierarchy is not hierarchy
+    assert new_hierarchy.version == hierarchy.version + 1
+    assert new_file in new_hierarchy.nodes
+
+    root.invalidate()
+    assert root.hierarchy is not new_hierarchy
+    assert root.refresh().version == new_hierarchy.version + 2
+
+
+def test__HierarchyDigester(tmp_path: Path):
+    root_dir1 = tmp_path / "structure1"
+    root_dir2 = tmp_path / "structure2"
+    shutil.copytree(DATADIR / "structure1", root_dir1)
+    shutil.copytree(DATADIR / "structure1", root_dir2)
+
+    digester = frmb_gui.core.HierarchyDigester()
+    digest1 = digester.digest(root_dir1)
+    digest2 = digester.digest(root_dir2)
+    assert digest1.digest == digest2.digest
+    assert digester.digest(root_dir1) == digest1
+
+    edited = root_dir1 / "ffmpeg-to-gifs" / "video-to-gif-interactive.frmb"
+    edited.write_text(edited.read_text("utf-8") + "\n", "utf-8")
+    new_digest1 = digester.digest(root_dir1)
+    assert new_digest1.digest != digest1.digest
+    assert new_digest1.get_changed(digest1) == {
+        edited,
+        edited.parent,
+        root_dir1 / "ffmpeg-to-gifs.frmb",
+        root_dir1,
+    }
+
+
+def test__HierarchyDigester__incremental(tmp_path: Path, monkeypatch):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+
+    hashed = []
+    _hash = frmb_gui.core._digest._hash
+
+    def counting_hash(*parts: bytes) -> str:
+        hashed.append(parts[0])
+        return _hash(*parts)
+
+    monkeypatch.setattr(frmb_gui.core._digest, "_hash", counting_hash)
+    digester = frmb_gui.core.HierarchyDigester()
+    digest = digester.digest(root_dir)
+    assert hashed.count(b"node") == len(list(root_dir.rglob("*.frmb")))
+
+    hashed.clear()
+    assert digester.digest(root_dir) is digest
+    assert not hashed
+
+    presets_dir = root_dir / "ffmpeg-to-gifs" / "video-to-gif-presets"
+    edited = presets_dir / "togif-24fps-sd1-floyd.frmb"
+    edited.write_text(edited.read_text("utf-8") + "\n", "utf-8")
+    digest = digester.digest(root_dir)
+    # the file and its 2 ancestors, in 3 directories
+    assert hashed.count(b"file") == 1
+    assert hashed.count(b"node") == 3
+    assert hashed.count(b"dir") == 3
+
+    # the same result as digesting everything again
+    added = root_dir / "maketx" / "convert-tx-new.frmb"
+    shutil.copy(root_dir / "maketx" / "convert-tx.frmb", added)
+    shutil.rmtree(presets_dir)
+    (root_dir / "oiiotool" / "rescale-512.frmb").unlink()
+    digest = digester.digest(root_dir)
+    assert digest == frmb_gui.core.HierarchyDigester().digest(root_dir)
+    assert added in digest.nodes
+    assert edited not in digest.nodes
+
+
+def test__FrmbRoot__get_content_digest(tmp_path: Path, monkeypatch):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+    root = frmb_gui.core.FrmbRoot(root_dir)
+    hierarchy = root.hierarchy
+
+    walked = []
+    monkeypatch.setattr(
+        frmb_gui.core._digest,
+        "get_hierarchy_signature",
+        lambda *args, **kwargs: walked.append(args),
+    )
+    digest = root.get_content_digest()
+    # the signature of the up-to-date snapshot is reused
+    assert not walked
+    assert set(digest.nodes) == set(hierarchy.signature)
+
+
+def test__load_hierarchy(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+
+    expected = frmb_gui.core.read_hierarchy(root_dir)
+    result = frmb_gui.core.load_hierarchy(root_dir, max_workers=4)
+    assert result == expected
+    assert list(result.iterate()) == list(expected.iterate())
+
+    result = frmb_gui.core.load_hierarchy(root_dir, parallel=False)
+    assert result == expected
+
+
+def test__HierarchyIndex(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+    index_path = tmp_path / "index" / "structure1.sqlite"
+
+    root = frmb_gui.core.FrmbRoot(root_dir, index_path=index_path)
+    assert root.get_cached_hierarchy() is None
+    hierarchy = root.hierarchy
+    assert index_path.exists()
+
+    new_root = frmb_gui.core.FrmbRoot(root_dir, index_path=index_path)
+    cached = new_root.get_cached_hierarchy()
+    assert cached == hierarchy
+    assert list(cached.iterate()) == list(hierarchy.iterate())
+    # nothing changed on disk so the cached snapshot is kept
+    assert new_root.hierarchy is cached
+
+    removed = root_dir / "maketx" / "convert-tx.frmb"
+    removed.unlink()
+    os.utime(removed.parent, ns=(0, 0))
+    new_root.invalidate()
+    new_hierarchy = new_root.get_hierarchy()
+    assert removed not in new_hierarchy.nodes
+
+    index = frmb_gui.core.HierarchyIndex(index_path)
+    assert index.read(root_dir) == new_hierarchy
+    assert index.read(tmp_path) is None
+
+
+def test__patch_hierarchy(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+    hierarchy = frmb_gui.core.read_hierarchy(root_dir)
+
+    edited = root_dir / "ffmpeg-to-gifs" / "video-to-gif-interactive.frmb"
+    edited.write_text(edited.read_text("utf-8") + "\n", "utf-8")
+    # a new file with a new children directory
+    new_file = root_dir / "maketx" / "convert-tx-new.frmb"
+    shutil.copy(root_dir / "maketx" / "convert-tx.frmb", new_file)
+    shutil.copytree(root_dir / "ffmpeg-to-gifs", new_file.parent / "convert-tx-new")
+    removed_dir = root_dir / "ffmpeg-to-gifs" / "video-to-gif-presets"
+    shutil.rmtree(removed_dir)
+
+    changed = [edited, new_file.parent, removed_dir, tmp_path / "unrelated"]
+    patched, parents = frmb_gui.core.patch_hierarchy(hierarchy, changed, version=1)
+    assert patched == frmb_gui.core.read_hierarchy(root_dir, version=1)
+    assert (
+        patched.nodes[root_dir / "maketx.frmb"]
+        is hierarchy.nodes[root_dir / "maketx.frmb"]
+    )
+    assert parents == {
+        root_dir / "ffmpeg-to-gifs.frmb",
+        root_dir / "ffmpeg-to-gifs" / "video-to-gif-presets.frmb",
+        root_dir / "maketx.frmb",
+        new_file,
+        new_file.parent / "convert-tx-new" / "video-to-gif-presets.frmb",
+    }
+
+    patched, parents = frmb_gui.core.patch_hierarchy(patched, changed, version=2)
+    assert parents == set()
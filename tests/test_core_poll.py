@@ -0,0 +1,79 @@
+import os
+import shutil
+from pathlib import Path
+
+import frmb_gui.core
+from frmb_gui.core._poll import _get_mount_types
+
+THISDIR = Path(__file__).parent
+DATADIR = THISDIR / "data"
+
+
+def test__compare_scans(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+
+    scan = frmb_gui.core.HierarchyScan.from_directory(root_dir)
+    assert len(scan) == len(frmb_gui.core.get_hierarchy_signature(root_dir))
+    assert not frmb_gui.core.compare_scans(scan, scan)
+
+    edited = root_dir / "maketx" / "convert-tx.frmb"
+    edited.write_text(edited.read_text("utf-8") + "\n", "utf-8")
+    changes = frmb_gui.core.compare_scans(
+        scan, frmb_gui.core.HierarchyScan.from_directory(root_dir)
+    )
+    assert changes.modified == {edited}
+    assert not changes.added and not changes.removed
+
+    scan = frmb_gui.core.HierarchyScan.from_directory(root_dir)
+    added = root_dir / "maketx" / "convert-tx-new.frmb"
+    shutil.copy(edited, added)
+    shutil.rmtree(root_dir / "ffmpeg-to-gifs" / "video-to-gif-presets")
+    os.utime(added.parent, ns=(0, 0))
+    changes = frmb_gui.core.compare_scans(
+        scan, frmb_gui.core.HierarchyScan.from_directory(root_dir)
+    )
+    assert changes.added == {added}
+    assert root_dir / "ffmpeg-to-gifs" / "video-to-gif-presets" in changes.removed
+    assert changes.modified == {added.parent, root_dir / "ffmpeg-to-gifs"}
+
+
+def test__HierarchyPoller(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+
+    poller = frmb_gui.core.HierarchyPoller(root_dir, min_interval=1.0, max_interval=2.0)
+    assert poller.interval == 1.0
+    assert not poller.poll()
+    assert poller.interval == 1.0 * poller.backoff
+    assert not poller.poll()
+    assert poller.interval == 2.0
+
+    edited = root_dir / "maketx" / "convert-tx.frmb"
+    edited.write_text(edited.read_text("utf-8") + "\n", "utf-8")
+    assert poller.poll().paths == {edited}
+    assert poller.interval == 1.0
+
+
+def test__HierarchyPoller__signature(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+    signature = frmb_gui.core.get_hierarchy_signature(root_dir)
+
+    scan = frmb_gui.core.HierarchyScan.from_signature(signature)
+    assert not frmb_gui.core.compare_scans(
+        scan, frmb_gui.core.HierarchyScan.from_directory(root_dir)
+    )
+
+    # edited between the reading of the hierarchy and the start of the polling
+    edited = root_dir / "maketx" / "convert-tx.frmb"
+    edited.write_text(edited.read_text("utf-8") + "\n", "utf-8")
+    poller = frmb_gui.core.HierarchyPoller(root_dir, signature=signature)
+    assert poller.poll().paths == {edited}
+    assert not poller.poll()
+
+
+def test__is_network_path():
+    assert not frmb_gui.core.is_network_path(THISDIR)
+    # the mount points are only listed once in a while
+    assert _get_mount_types() is _get_mount_types()
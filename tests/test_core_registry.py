@@ -0,0 +1,75 @@
+import json
+import shutil
+from pathlib import Path
+
+import pytest
+
+import frmb_gui.core
+from frmb_gui.core import RegistryAction
+
+THISDIR = Path(__file__).parent
+DATADIR = THISDIR / "data"
+
+
+def test__RegistryInstaller(tmp_path: Path):
+    root_dir = tmp_path / "structure1"
+    shutil.copytree(DATADIR / "structure1", root_dir)
+    root = frmb_gui.core.FrmbRoot(root_dir)
+    root.stale_check_interval = 0.0
+    root.create_root_file("structure1")
+
+    backend = frmb_gui.core.InMemoryRegistryBackend()
+    installer = frmb_gui.core.RegistryInstaller(backend, tmp_path / "manifest.json")
+
+    operations = installer.install(root)
+    assert operations
+    assert all(operation.action is RegistryAction.create for operation in operations)
+    assert root.root_file.last_installed_hash == root.get_content_hash()
+    menu_key = "HKEY_CURRENT_USER\\Software\\Classes\\*\\shell\\maketx"
+    assert backend.keys[menu_key]["MUIVerb"] == "maketx"
+    assert f"{menu_key}\\shell\\convert-tx\\command" in backend.keys
+
+    # nothing changed
+    assert installer.install(root) == []
+
+    # only the keys of the edited menu are updated
+    edited = root_dir / "maketx" / "convert-tx.frmb"
+    content = json.loads(edited.read_text("utf-8"))
+    content["name"] = "new name"
+    edited.write_text(json.dumps(content), "utf-8")
+    operations = installer.install(root)
+    assert [(operation.action, operation.key) for operation in operations] == [
+        (RegistryAction.update, f"{menu_key}\\shell\\convert-tx")
+    ]
+    assert backend.keys[f"{menu_key}\\shell\\convert-tx"]["MUIVerb"] == "new name"
+
+    # removed menus are deleted, subkeys first
+    shutil.rmtree(root_dir / "maketx")
+    (root_dir / "maketx.frmb").unlink()
+    operations = installer.install(root)
+    assert all(operation.action is RegistryAction.delete for operation in operations)
+    assert operations[-1].key == menu_key
+    assert not any(key.startswith(menu_key) for key in backend.keys)
+
+    # a fresh installer reads the manifest from disk
+    installer = frmb_gui.core.RegistryInstaller(backend, tmp_path / "manifest.json")
+    assert installer.install(root) == []
+
+
+def test__RegistryBackend__apply(tmp_path: Path):
+    backend = frmb_gui.core.FileRegistryBackend(tmp_path / "registry.json")
+    backend.set_values("HKCU\\a", {"": "a"})
+    operations = [
+        frmb_gui.core.RegistryOperation(RegistryAction.update, "HKCU\\a", {"": "b"}),
+        frmb_gui.core.RegistryOperation(RegistryAction.create, "HKCU\\a\\b", {}),
+        # cannot delete a key with subkeys
+        frmb_gui.core.RegistryOperation(RegistryAction.delete, "HKCU\\a"),
+    ]
+    with pytest.raises(OSError):
+        backend.apply(operations)
+    # reverted
+    assert backend.keys == {"HKCU": {}, "HKCU\\a": {"": "a"}}
+
+    backend.apply(operations[:2])
+    reloaded = frmb_gui.core.FileRegistryBackend(tmp_path / "registry.json")
+    assert reloaded.keys == backend.keys
@@ -0,0 +1,47 @@
+import json
+import subprocess
+import sys
+
+IMPORT_TIME_BUDGET = 0.300
+"""
+Maximum amount of seconds to cold import the core modules.
+"""
+
+HEAVY_MODULES = ["qtpy", "jinja2", "pkg_resources", "frmb_gui.assets"]
+
+SCRIPT = """
+import json
+import sys
+import time
+
+start = time.perf_counter()
+import frmb_gui
+import frmb_gui.core
+import frmb_gui.constants
+duration = time.perf_counter() - start
+
+heavy_modules = [name for name in sys.argv[1:] if name in sys.modules]
+print(json.dumps({"duration": duration, "heavy_modules": heavy_modules}))
+"""
+
+
+def _import_in_new_process() -> dict:
+    result = subprocess.run(
+        [sys.executable, "-c", SCRIPT, *HEAVY_MODULES],
+        check=True,
+        capture_output=True,
+        text=True,
+    )
+    return json.loads(result.stdout)
+
+
+def test__import_time__core():
+    # keep the best of multiple runs to be less sensitive to system noise
+    results = [_import_in_new_process() for _ in range(3)]
+    assert results[0]["heavy_modules"] == []
+
+    duration = min(result["duration"] for result in results)
+    assert duration < IMPORT_TIME_BUDGET, (
+        f"importing the core modules took {duration * 1000:.1f}ms, "
+        f"over the budget of {IMPORT_TIME_BUDGET * 1000:.0f}ms"
+    )
@@ -0,0 +1,46 @@
+import logging
+from pathlib import Path
+
+from qtpy import QtGui
+from qtpy import QtWidgets
+
+from frmb_gui._paintguard import guard_paint
+from frmb_gui._paintguard import install_paint_guard
+from frmb_gui._paintguard import uninstall_paint_guard
+
+
+def test__guard_paint(qapp: QtWidgets.QApplication, tmp_path: Path, caplog):
+    path = tmp_path / "style.json"
+    path.write_text("{}", "utf-8")
+
+    class ReadingWidget(QtWidgets.QWidget):
+        read = False
+
+        @guard_paint
+        def paintEvent(self, event: QtGui.QPaintEvent):
+            if self.read:
+                path.read_text("utf-8")
+            super().paintEvent(event)
+
+    install_paint_guard()
+    try:
+        widget = ReadingWidget()
+        widget.resize(50, 50)
+        widget.show()
+
+        with caplog.at_level(logging.WARNING, logger="frmb_gui._paintguard"):
+            widget.repaint()
+            qapp.processEvents()
+            assert not caplog.records
+
+            widget.read = True
+            widget.repaint()
+            qapp.processEvents()
+            # accesses outside paint events are not reported
+            path.read_text("utf-8")
+
+        assert len(caplog.records) == 1
+        assert "ReadingWidget.paintEvent" in caplog.records[0].message
+        widget.close()
+    finally:
+        uninstall_paint_guard()
@@ -0,0 +1,102 @@
+from pathlib import Path
+
+from qtpy import QtWidgets
+
+import frmb_gui.resources
+from frmb_gui.resources._stylecache import StylesheetCache
+from frmb_gui.resources._style import APPLICATION_SCOPE
+from frmb_gui.resources._style import split_stylesheet
+
+
+def test__UiStyle__get_stylesheet__cache(tmp_path: Path):
+    style_path = frmb_gui.resources.get_style_path("main")
+    style = frmb_gui.resources.UiStyle.from_path(style_path)
+    cache = StylesheetCache(tmp_path / "cache")
+
+    stylesheet = style.get_stylesheet("main", cache=cache)
+    assert "QTreeView" in stylesheet
+    cached_files = list(cache.directory.glob("*.qss"))
+    assert len(cached_files) == 1
+
+    assert style.get_stylesheet("main", cache=StylesheetCache(cache.directory)) == (
+        stylesheet
+    )
+
+    # a different style produce a different stylesheet, replacing the previous one
+    content = style.content.copy()
+    content["spacing"] = {**content["spacing"], "small": "9px"}
+    new_style = frmb_gui.resources.UiStyle(content=content, name=style.name)
+    assert new_style.get_stylesheet("main", cache=cache) != stylesheet
+    assert list(cache.directory.glob("*.qss")) != cached_files
+    assert len(list(cache.directory.glob("*.qss"))) == 1
+
+
+def test__StylesheetCache__write(tmp_path: Path):
+    cache = StylesheetCache(tmp_path / "cache")
+    main_key = StylesheetCache.get_key("main", {})
+    dark_key = StylesheetCache.get_key("main-dark", {})
+    cache.write("main-dark", dark_key, "dark")
+    cache.write("main", main_key, "main")
+    assert cache.read("main-dark", dark_key) == "dark"
+    assert cache.read("main", main_key) == "main"
+
+    new_key = StylesheetCache.get_key("main", {"new": True})
+    cache.write("main", new_key, "new")
+    assert cache.read("main", main_key) is None
+    assert cache.read("main", new_key) == "new"
+    assert cache.read("main-dark", dark_key) == "dark"
+    assert len(list(cache.directory.glob("*.qss"))) == 2
+
+
+def test__UiStyle__load_font_families(qapp: QtWidgets.QApplication, monkeypatch):
+    # start as if no font was registered yet in this process
+    monkeypatch.setattr(frmb_gui.resources.UiStyle, "_FONT_IDS", {})
+    monkeypatch.setattr(frmb_gui.resources.UiStyle, "_FONT_FILES", {})
+    style_path = frmb_gui.resources.get_style_path("main")
+    style = frmb_gui.resources.UiStyle.from_path(style_path)
+
+    loaded = style.load_font_families()
+
+    family_styles = style.content["text"]["family_styles"]
+    registered = set(frmb_gui.resources.UiStyle._FONT_IDS)
+    for family_name, styles in family_styles.items():
+        assert loaded[family_name]
+        family_files = set(style.get_font_files(family_name))
+        assert {
+            file_path.stem.split("-")[-1] for file_path in family_files & registered
+        } == set(styles)
+
+    unloaded = set(style.get_unloaded_font_files())
+    assert unloaded
+    assert not unloaded & registered
+    all_files = {
+        file_path
+        for family_name in family_styles
+        for file_path in style.get_font_files(family_name)
+    }
+    assert unloaded | registered == all_files
+
+    style.load_font_file(sorted(unloaded)[0])
+    assert len(style.get_unloaded_font_files()) == len(unloaded) - 1
+
+
+def test__split_stylesheet():
+    stylesheet = (
+        "QLabel { color: white; }\n"
+        "/* @scope HierarchyBrowserWidget */\n"
+        "QFrame.HierarchyBrowserWidget { padding: 5px; }\n"
+        "/* @scope application */\n"
+        "QMenu { padding: 5px; }\n"
+    )
+    sections = split_stylesheet(stylesheet)
+    assert sections == {
+        APPLICATION_SCOPE: "QLabel { color: white; }\nQMenu { padding: 5px; }",
+        "HierarchyBrowserWidget": "QFrame.HierarchyBrowserWidget { padding: 5px; }",
+    }
+
+    style_path = frmb_gui.resources.get_style_path("main")
+    style = frmb_gui.resources.UiStyle.from_path(style_path)
+    sections = split_stylesheet(style.get_stylesheet("main"))
+    assert "QTreeView" in sections[APPLICATION_SCOPE]
+    assert "HierarchyBrowserWidget" not in sections[APPLICATION_SCOPE]
+    assert "QFrame.HierarchyBrowserWidget" in sections["HierarchyBrowserWidget"]
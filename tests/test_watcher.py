@@ -0,0 +1,121 @@
+import os
+import time
+from pathlib import Path
+
+from qtpy import QtCore
+from qtpy import QtWidgets
+
+from frmb_gui._watcher import FileWatcherService
+
+
+def _process_events(duration: float):
+    app = QtCore.QCoreApplication.instance()
+    end_time = time.perf_counter() + duration
+    while time.perf_counter() < end_time:
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def test__FileWatcherService(qapp: QtWidgets.QApplication, tmp_path: Path):
+    path = tmp_path / "style.json"
+    path.write_text("0", "utf-8")
+
+    calls = []
+    watcher = FileWatcherService(delay=100)
+    watcher.watch("style", [path], calls.append)
+
+    # a burst of changes only trigger one call
+    for index in range(1, 4):
+        path.write_text("0" * index, "utf-8")
+        _process_events(0.02)
+    _process_events(0.5)
+    assert calls == [{path}]
+
+    # saving with an atomic rename keep the file watched
+    tmp_file = tmp_path / "style.json.tmp"
+    tmp_file.write_text("atomic", "utf-8")
+    os.replace(tmp_file, path)
+    _process_events(0.5)
+    assert len(calls) == 2
+
+    path.write_text("after rename", "utf-8")
+    _process_events(0.5)
+    assert len(calls) == 3
+
+    watcher.unwatch("style")
+    path.write_text("unwatched", "utf-8")
+    _process_events(0.5)
+    assert len(calls) == 3
+    assert not watcher.is_watching("style")
+
+
+def test__FileWatcherService__update(qapp: QtWidgets.QApplication, tmp_path: Path):
+    path1 = tmp_path / "file1.frmb"
+    path2 = tmp_path / "file2.frmb"
+    path1.write_text("1", "utf-8")
+    path2.write_text("2", "utf-8")
+
+    calls = []
+    watcher = FileWatcherService(delay=100)
+    watcher.watch("root", [path1], calls.append)
+    watcher.update("root", added=[path2], removed=[path1])
+
+    # modified in place, without any event on the parent directory
+    path2.write_text("22", "utf-8")
+    _process_events(0.5)
+    assert calls == [{path2}]
+
+    path1.write_text("11", "utf-8")
+    _process_events(0.5)
+    assert calls == [{path2}]
+
+
+def test__FileWatcherService__shared(qapp: QtWidgets.QApplication, tmp_path: Path):
+    path1 = tmp_path / "file1.frmb"
+    path2 = tmp_path / "file2.frmb"
+    path1.write_text("1", "utf-8")
+    path2.write_text("2", "utf-8")
+
+    calls = []
+    watcher = FileWatcherService(delay=100)
+    watcher.watch("group1", [path1], calls.append)
+    watcher.watch("group2", [path2], calls.append)
+    # replacing a group keep watching the paths it shares with the previous one
+    watcher.watch("group1", [path1, path2], calls.append)
+    watcher.unwatch("group2")
+
+    path2.write_text("22", "utf-8")
+    _process_events(0.5)
+    assert calls == [{path2}]
+
+    watcher.unwatch("group1")
+    assert not watcher._watcher.files()
+    assert not watcher._watcher.directories()
+
+
+def test__FileWatcherService__failed(
+    qapp: QtWidgets.QApplication, tmp_path: Path, monkeypatch
+):
+    path1 = tmp_path / "file1.frmb"
+    path2 = tmp_path / "file2.frmb"
+    missing = tmp_path / "missing.frmb"
+    path1.write_text("1", "utf-8")
+    path2.write_text("2", "utf-8")
+
+    watcher = FileWatcherService(delay=100)
+    add_paths = watcher._watcher.addPaths
+
+    def refusing_add_paths(paths: list[str]) -> list[str]:
+        # like when the system limit of watched files is reached
+        refused = [path for path in paths if path == str(path2)]
+        return add_paths([path for path in paths if path not in refused]) + refused
+
+    monkeypatch.setattr(watcher._watcher, "addPaths", refusing_add_paths)
+    failures = []
+    watcher.failed.connect(lambda name, paths: failures.append((name, paths)))
+
+    watcher.watch("root", [path1, missing], lambda paths: None)
+    assert failures == []
+
+    watcher.update("root", added=[path2])
+    assert failures == [("root", {path2})]